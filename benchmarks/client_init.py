@@ -0,0 +1,32 @@
+"""Micro-benchmark of ThreeScaleClient construction
+
+No requests are sent, it measures just the cost of creating the client
+(and of the first access to one resource client).
+
+Usage:
+    python -m benchmarks.client_init [number]
+"""
+import sys
+import timeit
+
+from threescale_api import ThreeScaleClient
+
+URL = "https://tenant-admin.example.invalid"
+
+
+def construct():
+    return ThreeScaleClient(URL, "token")
+
+
+def construct_and_use():
+    return construct().services
+
+
+def main(number: int = 10000):
+    for name, func in (("construct", construct), ("construct + services", construct_and_use)):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:24} {best / number * 1e6:8.2f} us per client")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
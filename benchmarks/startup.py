@@ -0,0 +1,74 @@
+"""Cold start benchmark: package import and the first request
+
+Every sample runs in a fresh interpreter (sys.executable), the first request goes
+to a local HTTP server, so the numbers do not depend on network. Compare medians
+between revisions to catch cold start regressions; `python -X importtime` shows
+where the import time goes.
+
+Usage:
+    python -m benchmarks.startup [runs]
+"""
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+
+SCENARIOS = {
+    "import threescale_api": "import threescale_api",
+    "import ThreeScaleClient": "from threescale_api import ThreeScaleClient",
+    "first request": (
+        "from threescale_api import ThreeScaleClient\n"
+        "ThreeScaleClient({url!r}, 'token').services.fetch(1)"
+    ),
+}
+
+TIMER = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = json.dumps({"service": {"id": 1}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def measure(code: str, runs: int) -> list:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", TIMER.format(code=code)], env=env,
+                             check=True, capture_output=True, text=True).stdout
+        results.append(float(out.splitlines()[-1]))
+    return results
+
+
+def main(runs: int = 10):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for name, code in SCENARIOS.items():
+            results = measure(code.format(url=url), runs)
+            print(f"{name:24} median {statistics.median(results) * 1000:7.1f} ms"
+                  f"  min {min(results) * 1000:7.1f} ms")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -25,7 +25,7 @@ setup(
     maintainer="Matej Dujava",
     maintainer_email="mdujava@redhat.com",
     url="https://github.com/3scale-qe/3scale-api-python",
-    packages=find_packages(exclude=("tests",)),
+    packages=find_packages(exclude=("tests", "benchmarks")),
     long_description=long_description,
     long_description_content_type="text/markdown",
     include_package_data=True,
@@ -1,3 +1,15 @@
-from threescale_api import log_config
+import pytest
+
+from threescale_api import client, log_config
 
 log_config.load_config()
+
+
+@pytest.fixture()
+def url():
+    return 'http://localhost'
+
+
+@pytest.fixture()
+def api(url):
+    return client.ThreeScaleClient(url=url, token='test-token')
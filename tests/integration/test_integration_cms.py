@@ -119,6 +119,13 @@ def test_partial_list(api, cms_partial):
     assert len(parts_list) >= 1
     assert all('draft' in part.entity.keys() and 'published' in part.entity.keys()
                 for part in parts_list)
+    # without content, it is loaded lazily
+    parts_list = api.cms_partials.list(content=False)
+    assert all('draft' not in part.entity.keys() for part in parts_list)
+    assert all(part['draft'] is not None or part['published'] is not None
+               for part in parts_list)
+    assert all('draft' in part.entity.keys() and 'published' in part.entity.keys()
+                for part in parts_list)
 
 
 def test_partial_can_be_created(cms_partial_params, cms_partial):
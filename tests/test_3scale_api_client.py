@@ -1,3 +1,7 @@
+import subprocess
+import sys
+from functools import cached_property
+
 import pytest
 
 from threescale_api import client
@@ -28,3 +32,35 @@ def test_api_client_initialization(api, url):
     assert api.parent == api
     assert api.threescale_client == api
     assert api.admin_api_url == f'{url}/admin/api'
+
+
+@pytest.mark.smoke
+def test_api_client_resource_clients_are_lazy(api):
+    assert 'services' not in vars(api)
+    services = api.services
+    assert api.services is services
+    assert services.threescale_client is api
+
+
+@pytest.mark.smoke
+def test_api_client_every_property_is_available(api):
+    properties = {name: value for name, value in vars(client.ThreeScaleClient).items()
+                  if isinstance(value, (property, cached_property))}
+    assert isinstance(properties['fields_definitions'], cached_property)
+    assert isinstance(properties['cms_builtin_partials'], cached_property)
+    for name, value in properties.items():
+        first = getattr(api, name)
+        if isinstance(value, cached_property):
+            assert getattr(api, name) is first, name
+            assert first.threescale_client is api, name
+
+
+@pytest.mark.smoke
+def test_client_import_skips_optional_modules():
+    modules = ('gzip', 'threescale_api.analytics', 'threescale_api.export',
+               'threescale_api.proxy_diff')
+    code = (f"import sys\nimport threescale_api.client\n"
+            f"print(','.join(m for m in {modules!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.strip() == ''
@@ -0,0 +1,208 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import responses
+
+from threescale_api import analytics, errors
+from threescale_api.cache import AnalyticsCache
+
+
+def usage(values, since='2024-01-01T00:00:00Z', granularity='month', metric='hits'):
+    return {
+        'metric': {'system_name': metric},
+        'period': {'name': 'year', 'since': since, 'granularity': granularity},
+        'total': sum(values),
+        'values': values,
+    }
+
+
+def add_usage(url, app_id, values, status=200, **kwargs):
+    responses.add(responses.GET, f'{url}/stats/applications/{app_id}/usage.json',
+                  json=usage(values, **kwargs), status=status)
+
+
+@pytest.mark.smoke
+def test_series_from_response():
+    series = analytics.UsageSeries.from_response(
+        usage([1, 2, 3], since='2024-11-01T00:00:00+01:00'), 'services', 7)
+    assert series.key == (7, 'hits')
+    assert len(series) == 3
+    assert [moment.month for moment in series.datetimes()] == [11, 12, 1]
+    assert series.datetimes()[2].year == 2025
+    assert series.total() == 6
+
+    yearly = series.resample('year')
+    assert list(yearly.values) == [3.0, 3.0]
+    assert [moment.year for moment in yearly.datetimes()] == [2024, 2025]
+    with pytest.raises(ValueError):
+        yearly.resample('day')
+
+
+@pytest.mark.smoke
+def test_sum_and_top_n():
+    first = analytics.UsageSeries.from_response(usage([1, 2]), 'applications', 1)
+    second = analytics.UsageSeries.from_response(usage([5, 0, 1]), 'applications', 2)
+    total = analytics.sum_series([first, second])
+    assert list(total.values) == [6.0, 2.0, 1.0]
+    assert analytics.top_n([first, second], 1) == [second]
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_series_by_application(api, url):
+    add_usage(url, 1, [0, 4])
+    series = api.analytics.series_by_application(1, period='month')
+    assert series.resource_type == 'applications'
+    assert series.values.tolist() == [0.0, 4.0]
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_series_many(api, url):
+    add_usage(url, 1, [1, 1])
+    add_usage(url, 2, [2, 2])
+    add_usage(url, 3, [], status=404)
+
+    result = api.analytics.series_many([1, 2, 3], 'applications', ignore_errors=True)
+    assert sorted(result) == [(1, 'hits'), (2, 'hits')]
+    assert result[(2, 'hits')].total() == 4
+
+    with pytest.raises(errors.ApiClientError):
+        api.analytics.series_many([1, 3], 'applications')
+
+
+def daily_usage(request):
+    """Callback answering one hit per day between since and until of the request"""
+    body = json.loads(request.body)
+    since = analytics.to_datetime(body['since'])
+    until = analytics.to_datetime(body['until'])
+    days = (until - since).days + 1
+    return 200, {}, json.dumps(usage([1] * days, since=since.isoformat(), granularity='day'))
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_cache_keeps_closed_buckets(api, url):
+    responses.add_callback(responses.GET, f'{url}/stats/applications/1/usage.json',
+                           callback=daily_usage)
+    cache = AnalyticsCache()
+    params = dict(since='2024-01-01T00:00:00Z', until='2024-01-10T00:00:00Z',
+                  granularity='day', cache=cache)
+
+    first = api.analytics.series_by_application(1, **params)
+    assert len(first) == 10
+    second = api.analytics.series_by_application(1, **params)
+    assert second == first
+    assert len(responses.calls) == 1
+
+    params.update(since='2024-01-05T12:00:00Z', until='2024-01-20T00:00:00Z')
+    third = api.analytics.series_by_application(1, **params)
+    assert len(responses.calls) == 2
+    assert json.loads(responses.calls[1].request.body)['since'].startswith('2024-01-11')
+    assert third.datetimes()[0].day == 5
+    assert len(third) == 16
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_open_bucket_is_refetched(api, url):
+    responses.add_callback(responses.GET, f'{url}/stats/applications/1/usage.json',
+                           callback=daily_usage)
+    cache = AnalyticsCache()
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    since = (today - timedelta(days=3)).isoformat()
+
+    series = api.analytics.series_by_application(1, since=since, granularity='day', cache=cache)
+    assert len(series) == 4
+    api.analytics.series_by_application(1, since=since, granularity='day', cache=cache)
+    body = json.loads(responses.calls[1].request.body)
+    assert analytics.to_datetime(body['since']) == today
+    assert 'period' not in body
+
+    assert api.analytics.refresh(series) == 0
+    assert len(series) == 4
+    assert analytics.to_datetime(
+        json.loads(responses.calls[2].request.body)['since']) == today
+
+
+@pytest.mark.smoke
+def test_extend_series():
+    series = analytics.UsageSeries.from_response(usage([1, 2]), 'applications', 1)
+    update = analytics.UsageSeries.from_response(
+        usage([5, 6, 7], since='2024-02-01T00:00:00Z'), 'applications', 1)
+    assert series.extend(update) == 2
+    assert series.values.tolist() == [1.0, 5.0, 6.0, 7.0]
+    gap = analytics.UsageSeries.from_response(
+        usage([1], since='2024-09-01T00:00:00Z'), 'applications', 1)
+    with pytest.raises(ValueError):
+        series.extend(gap)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_response_codes_many(api, url):
+    for service_id in (1, 2):
+        responses.add(responses.GET, f'{url}/stats/services/{service_id}/usage_response_code.json',
+                      json={**usage([service_id, 0]), 'response_code': {'code': '2XX'}})
+
+    result = api.analytics.response_codes_many([1, 2], response_codes=['2XX'], period='month')
+    assert sorted(result) == [(1, '2XX'), (2, '2XX')]
+    assert result[(2, '2XX')].metric == '2XX'
+    assert result[(2, '2XX')].total() == 2
+    body = json.loads(responses.calls[0].request.body)
+    assert body == {'response_code': '2XX', 'period': 'month'}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_top_applications_many(api, url):
+    responses.add(responses.GET, f'{url}/stats/services/1/top_applications.json', json={
+        'period': {'name': 'month', 'since': '2024-03-01T00:00:00Z'},
+        'metric': {'system_name': 'hits'},
+        'applications': [{'id': 10, 'name': 'a', 'value': 7}, {'id': 11, 'name': 'b', 'value': 3}],
+    })
+    responses.add(responses.GET, f'{url}/stats/services/2/top_applications.json', status=403,
+                  json={'error': 'forbidden'})
+
+    result = api.analytics.top_applications_many([1, 2], since='2024-03-01', ignore_errors=True)
+    assert list(result) == [1]
+    assert [(app.resource_id, app.total()) for app in result[1]] == [(10, 7.0), (11, 3.0)]
+    assert result[1][0].datetimes()[0].month == 3
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_top_applications_of_week(api, url):
+    responses.add(responses.GET, f'{url}/stats/services/1/top_applications.json', json={
+        'period': {'name': 'week', 'since': '2024-03-04T00:00:00+01:00'},
+        'applications': [{'id': 10, 'name': 'a', 'value': 7}],
+    })
+
+    app, = api.analytics.top_applications(1, since='2024-03-04', period='week')
+    assert app.granularity == 'day'
+    assert app.resample('month').total() == 7
+    assert app.datetimes()[0].isoformat() == '2024-03-04T00:00:00+01:00'
+    with pytest.raises(ValueError):
+        api.analytics.top_applications(1, since='2024-03-04', period='fortnight')
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_cached_series_naive_since_in_timezone(api, url):
+    responses.add(responses.GET, f'{url}/stats/applications/1/usage.json',
+                  json=usage([1, 2], since='2024-01-01T00:00:00+01:00', granularity='day'))
+    cache = AnalyticsCache()
+
+    series = api.analytics.series_by_application(
+        1, since='2024-01-01T00:00:00', until='2024-01-02T00:00:00', granularity='day',
+        timezone='Europe/Prague', cache=cache)
+    # naive since is left for 3scale to interpret in the timezone, not taken as UTC
+    assert json.loads(responses.calls[0].request.body)['since'] == '2024-01-01T00:00:00'
+    assert series.datetimes()[0].isoformat() == '2024-01-01T00:00:00+01:00'
+
+    again = api.analytics.series_by_application(
+        1, since='2024-01-01T00:00:00', until='2024-01-02T00:00:00', granularity='day',
+        timezone='Europe/Prague', cache=cache)
+    assert len(responses.calls) == 1
+    assert list(again.values) == [1, 2]
@@ -0,0 +1,152 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import responses
+
+from threescale_api import errors, utils
+
+
+def add_service(url, service_id, status=200):
+    responses.add(responses.GET, f'{url}/admin/api/services/{service_id}.json',
+                  json={'service': {'id': service_id, 'system_name': f'svc{service_id}'}},
+                  status=status)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_fetch_distinct_ids_once(api, url):
+    add_service(url, 1)
+    add_service(url, 2)
+
+    with api.batch_loads(listing_threshold=None):
+        services = [api.services.read(service_id) for service_id in (1, 2, 1, 2, 1)]
+        assert len(responses.calls) == 0
+        assert [svc['system_name'] for svc in services] == ['svc1', 'svc2', 'svc1', 'svc2', 'svc1']
+
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_use_listing_above_threshold(api, url):
+    responses.add(responses.GET, f'{url}/admin/api/services.json',
+                  json={'services': [{'service': {'id': i, 'system_name': f'svc{i}'}}
+                                     for i in range(1, 4)]})
+    responses.add(responses.GET, f'{url}/admin/api/services.json', json={'services': []})
+
+    with api.batch_loads(listing_threshold=3):
+        services = [api.services.read(service_id) for service_id in (1, 2, 3)]
+        assert services[2]['system_name'] == 'svc3'
+        assert services[0]['system_name'] == 'svc1'
+
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_isolate_errors(api, url):
+    add_service(url, 1)
+    add_service(url, 2, status=404)
+
+    with api.batch_loads(listing_threshold=None):
+        ok, missing = api.services.read(1), api.services.read(2)
+        with pytest.raises(errors.ApiClientError):
+            missing.entity
+        assert ok['system_name'] == 'svc1'
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_read_without_batching_is_not_cached(api, url):
+    add_service(url, 1)
+    assert api.loader(api.services) is None
+    api.services.read(1)['id']
+    api.services.read(1)['id']
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_evict_changed_entities(api, url):
+    add_service(url, 1)
+    responses.add(responses.PUT, f'{url}/admin/api/services/1.json',
+                  json={'service': {'id': 1, 'system_name': 'renamed'}})
+    responses.add(responses.DELETE, f'{url}/admin/api/services/1.json')
+
+    with api.batch_loads(listing_threshold=None):
+        assert api.services.read(1)['system_name'] == 'svc1'
+        responses.replace(responses.GET, f'{url}/admin/api/services/1.json',
+                          json={'service': {'id': 1, 'system_name': 'renamed'}})
+        api.services.update(1, params={'system_name': 'renamed'})
+        assert api.services.read(1)['system_name'] == 'renamed'
+        responses.replace(responses.GET, f'{url}/admin/api/services/1.json', status=404,
+                          json={'status': 'Not found'})
+        api.services.delete(1)
+        with pytest.raises(errors.ApiClientError):
+            api.services.read(1).entity
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_fetch_without_holding_lock(api, url):
+    second_fetched = threading.Event()
+
+    def slow(request):
+        # the first fetch finishes only after another reader fetched its entity
+        assert second_fetched.wait(5)
+        return 200, {}, '{"service": {"id": 1, "system_name": "svc1"}}'
+
+    def fast(request):
+        second_fetched.set()
+        return 200, {}, '{"service": {"id": 2, "system_name": "svc2"}}'
+    responses.add_callback(responses.GET, f'{url}/admin/api/services/1.json', callback=slow)
+    responses.add_callback(responses.GET, f'{url}/admin/api/services/2.json', callback=fast)
+
+    with api.batch_loads(listing_threshold=None):
+        first = api.services.read(1)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(lambda: first['system_name'])
+            while not api.loader(api.services)._resolving:
+                time.sleep(0.001)
+            assert api.services.read(2)['system_name'] == 'svc2'
+            assert future.result() == 'svc1'
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_apply_to_calling_context_only(api, url):
+    add_service(url, 1)
+    inside, leave = threading.Event(), threading.Event()
+
+    def batched():
+        with api.batch_loads(listing_threshold=None):
+            inside.set()
+            assert leave.wait(5)
+            return [api.services.read(1)['id'] for _ in range(3)]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(batched)
+        assert inside.wait(5)
+        # thread outside of the context reads without batching
+        assert [api.services.read(1)['id'] for _ in range(3)] == [1, 1, 1]
+        assert len(responses.calls) == 3
+        with api.batch_loads(listing_threshold=None):
+            pass
+        # exit of another context does not switch batching off
+        leave.set()
+        assert future.result() == [1, 1, 1]
+    assert len(responses.calls) == 4
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_batch_loads_reach_parallel_workers(api, url):
+    add_service(url, 1)
+
+    with api.batch_loads(listing_threshold=None):
+        results = [result for _, result, _ in utils.run_parallel(
+            lambda _: api.services.read(1)['id'], range(4), max_workers=4)]
+    assert results == [1] * 4
+    assert len(responses.calls) == 1
@@ -0,0 +1,118 @@
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import responses
+
+from threescale_api import errors, utils
+from threescale_api.resources import BillingReport
+
+
+@pytest.mark.smoke
+def test_rate_limiter():
+    limiter = utils.RateLimiter(rate=50)
+    started = time.monotonic()
+    list(utils.run_parallel(lambda _: limiter.acquire(), range(6), max_workers=6))
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_trigger_billing_accounts(api, url):
+    for account_id in (1, 2):
+        responses.add(responses.POST,
+                      f'{url}/master/api/providers/9/accounts/{account_id}/billing_jobs.json',
+                      json={})
+    responses.add(responses.POST, f'{url}/master/api/providers/9/accounts/3/billing_jobs.json',
+                  status=422, json={'errors': 'invalid'})
+
+    report = api.tenants.trigger_billing_accounts(9, [1, 2, 3], '2024-01-31', rate=100)
+    assert sorted(report.triggered) == [1, 2]
+    assert list(report.failed) == [3]
+    assert json.loads(responses.calls[0].request.body) == {'date': '2024-01-31'}
+    assert report.as_dict()['triggered'] == 2
+    assert not report.ok
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_tenant_billing_can_not_be_awaited(api, url):
+    responses.add(responses.POST, f'{url}/master/api/providers/9/billing_jobs.json', json={})
+
+    report = api.tenants.trigger_billing_many([9], '2024-01-31')
+    assert report.triggered == [9] and report.scope == BillingReport.TENANTS
+    with pytest.raises(ValueError):
+        api.invoices.wait_for_billing(report, timeout=1)
+    assert len(responses.calls) == 1
+
+
+def invoice_listing(polls, rounds, month='2024-01'):
+    """Invoices listing answering rounds[n] (list of invoices) on the n-th poll"""
+    def callback(request):
+        query = parse_qs(urlsplit(request.url).query)
+        assert query['month'] == [month]
+        if query['page'] != ['1']:
+            return 200, {}, json.dumps({'invoices': []})
+        polls.append(1)
+        invoices = rounds[min(len(polls), len(rounds)) - 1]
+        return 200, {}, json.dumps({'invoices': [{'invoice': invoice} for invoice in invoices]})
+    return callback
+
+
+def invoice(account_id, state='open', updated_at='2024-01-15', invoice_id=None):
+    return {'id': invoice_id or 100 + account_id, 'account_id': account_id, 'state': state,
+            'updated_at': updated_at}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_billing(api, url):
+    polls = []
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json', callback=invoice_listing(
+        polls, [[invoice(1), invoice(7)], [invoice(1), invoice(2), invoice(7)]]))
+    report = BillingReport('2024-01-31')
+    report.triggered = [1, 2]
+
+    api.invoices.wait_for_billing(report, interval=0.01, page_workers=2)
+    assert len(polls) == 2
+    assert report.invoices == {1: [101], 2: [102]}
+    assert report.ok
+    assert report.as_dict()['completion_seconds'] is not None
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_billing_ignores_invoices_existing_before(api, url):
+    polls = []
+    responses.add(responses.POST, f'{url}/master/api/providers/9/accounts/1/billing_jobs.json',
+                  json={})
+    responses.add(responses.POST, f'{url}/master/api/providers/9/accounts/2/billing_jobs.json',
+                  json={})
+    open_invoices = [invoice(1), invoice(2)]
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json', callback=invoice_listing(
+        polls, [open_invoices, open_invoices,
+                [invoice(1, state='pending', updated_at='2024-01-31'), invoice(2),
+                 invoice(2, invoice_id=300)]]))
+
+    report = api.tenants.trigger_billing_accounts(9, [1, 2], '2024-01-31',
+                                                  invoices=api.invoices)
+    assert report.before == {1: {101: ('open', '2024-01-15')}, 2: {102: ('open', '2024-01-15')}}
+    api.invoices.wait_for_billing(report, interval=0.01)
+    # the poll right after the trigger sees the old open invoices only
+    assert len(polls) == 3
+    assert report.invoices == {1: [101], 2: [300]}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_billing_times_out(api, url):
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json',
+                           callback=invoice_listing([], [[invoice(1)]]))
+    report = BillingReport('2024-01-31')
+    report.triggered = [1, 2]
+
+    with pytest.raises(errors.WaitTimeout):
+        api.invoices.wait_for_billing(report, timeout=0.05, interval=0.01)
+    assert report.pending == [2]
+    assert not report.ok
@@ -0,0 +1,96 @@
+import pytest
+import requests
+import responses
+
+from threescale_api import client, errors
+from threescale_api.breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from threescale_api.scheduler import RequestScheduler
+
+
+@pytest.fixture()
+def breaker():
+    return CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+
+@pytest.fixture()
+def rest(url, breaker):
+    return client.RestApiClient(url=url, token='test-token', breaker=breaker, throws=False)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_circuit_opens_and_fails_fast(rest, url, breaker):
+    responses.add(responses.GET, f'{url}/some.json', status=503)
+
+    rest.get(path='/some')
+    assert breaker.state('localhost') == CLOSED
+    rest.get(path='/some')
+    assert breaker.state('localhost') == OPEN
+
+    with pytest.raises(errors.CircuitOpenError):
+        rest.get(path='/other')
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_connection_errors_open_circuit(rest, url, breaker):
+    responses.add(responses.GET, f'{url}/some.json',
+                  body=requests.exceptions.ConnectionError('refused'))
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            rest.get(path='/some')
+    assert breaker.states() == {'localhost': OPEN}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_half_open_probe_closes_circuit(rest, url, breaker):
+    responses.add(responses.GET, f'{url}/some.json', status=200)
+    breaker.record_failure('localhost')
+    breaker.record_failure('localhost')
+    breaker.recovery_timeout = 0
+
+    assert breaker.state('localhost') == HALF_OPEN
+    rest.get(path='/some')
+    assert breaker.state('localhost') == CLOSED
+    assert breaker.states() == {}
+
+
+@pytest.mark.smoke
+def test_half_open_allows_single_probe(breaker):
+    breaker.record_failure('localhost')
+    breaker.record_failure('localhost')
+    breaker.recovery_timeout = 0
+
+    breaker.before('localhost')
+    with pytest.raises(errors.CircuitOpenError):
+        breaker.before('localhost')
+    breaker.record_failure('localhost')
+    assert breaker.state('localhost') in (OPEN, HALF_OPEN)
+
+
+@pytest.mark.smoke
+def test_per_endpoint_key():
+    breaker = CircuitBreaker(per_endpoint=True)
+    assert breaker.key('https://host/admin/api/services/12/metrics.json') == \
+        'host/admin/api/services/:id/metrics.json'
+    assert CircuitBreaker().key('https://host/admin/api/services.json') == 'host'
+
+
+@pytest.mark.smoke
+def test_local_errors_do_not_open_circuit(url, breaker, monkeypatch):
+    rest = client.RestApiClient(url=url, token='test-token', breaker=breaker, throws=False,
+                                scheduler=RequestScheduler())
+
+    def interrupted(**kwargs):
+        raise KeyboardInterrupt()
+    monkeypatch.setattr(rest._session, 'request', interrupted)
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            rest.get(path='/some', lane='nonexistent')
+        with pytest.raises(KeyboardInterrupt):
+            rest.get(path='/some')
+    assert breaker.states() == {}
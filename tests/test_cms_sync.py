@@ -0,0 +1,171 @@
+import itertools
+import json
+import re
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import responses
+
+from threescale_api.cms import LocalPortal
+
+
+class FakeCms:
+    """Minimal in-memory CMS API"""
+
+    def __init__(self, url):
+        self.base = f'{url}/admin/api/cms'
+        self.ids = itertools.count(100)
+        self.sections = [{'id': 1, 'parent_id': None, 'partial_path': '/', 'title': 'Root'}]
+        self.files = []
+        self.versions = itertools.count(1)
+        self.templates = [{'id': 2, 'type': 'layout', 'system_name': 'main',
+                           'draft': None, 'published': 'L', 'updated_at': 'v0'},
+                          {'id': 3, 'type': 'page', 'system_name': 'guide', 'path': '/docs/guide',
+                           'draft': 'old', 'published': 'old', 'updated_at': 'v0'}]
+        self.writes = []
+        self.reads = []
+        self.read_threads = set()
+
+    def register(self):
+        for kind in ('sections', 'files', 'templates'):
+            responses.add_callback(responses.GET, f'{self.base}/{kind}.json',
+                                   callback=lambda req, kind=kind: self.list(req, kind))
+            responses.add_callback(responses.POST, f'{self.base}/{kind}.json',
+                                   callback=lambda req, kind=kind: self.create(req, kind))
+            responses.add_callback(responses.PUT, re.compile(rf'{self.base}/{kind}/\d+\.json'),
+                                   callback=lambda req, kind=kind: self.update(req, kind))
+            responses.add_callback(responses.DELETE,
+                                   re.compile(rf'{self.base}/{kind}/\d+\.json'),
+                                   callback=lambda req, kind=kind: self.delete(req, kind))
+        responses.add_callback(responses.PUT,
+                               re.compile(rf'{self.base}/templates/\d+/publish\.json'),
+                               callback=self.publish)
+        responses.add_callback(responses.GET, re.compile(rf'{self.base}/templates/\d+\.json'),
+                               callback=self.read)
+
+    def list(self, request, kind):
+        query = parse_qs(urlsplit(request.url).query)
+        items = getattr(self, kind) if query['page'] == ['1'] else []
+        if kind == 'templates':
+            items = [item for item in items if item['type'] == query['type'][0]]
+            if query.get('content') != ['true']:
+                items = [{key: value for key, value in item.items()
+                          if key not in ('draft', 'published')} for item in items]
+        return 200, {}, json.dumps({'collection': items})
+
+    def read(self, request):
+        item = self._find('templates', request.url)
+        self.reads.append(item['id'])
+        self.read_threads.add(threading.current_thread().name)
+        return 200, {}, json.dumps(item)
+
+    def create(self, request, kind):
+        item = dict(self._body(request), id=next(self.ids))
+        item['updated_at'] = f'v{next(self.versions)}'
+        getattr(self, kind).append(item)
+        self.writes.append(('create', kind, item['id']))
+        return 201, {}, json.dumps(item)
+
+    def update(self, request, kind):
+        item = self._find(kind, request.url)
+        item.update(self._body(request), updated_at=f'v{next(self.versions)}')
+        self.writes.append(('update', kind, item['id']))
+        return 200, {}, json.dumps(item)
+
+    def delete(self, request, kind):
+        getattr(self, kind).remove(self._find(kind, request.url))
+        return 200, {}, ''
+
+    def publish(self, request):
+        item = self._find('templates', request.url.replace('/publish', ''))
+        item.update(published=item['draft'], draft=None, updated_at=f'v{next(self.versions)}')
+        self.writes.append(('publish', 'templates', item['id']))
+        return 200, {}, json.dumps(item)
+
+    def _find(self, kind, url):
+        item_id = int(re.search(r'/(\d+)\.json', url).group(1))
+        return next(item for item in getattr(self, kind) if item['id'] == item_id)
+
+    @staticmethod
+    def _body(request):
+        body = request.body.read() if hasattr(request.body, 'read') else request.body
+        if isinstance(body, bytes) and b'Content-Disposition' in body:
+            fields = re.findall(rb'name="(\w+)"\r\n\r\n(.*?)\r\n', body)
+            return {name.decode(): value.decode() for name, value in fields}
+        return json.loads(body) if body else {}
+
+
+@pytest.fixture()
+def portal(tmp_path):
+    (tmp_path / '_layouts').mkdir()
+    (tmp_path / '_layouts' / 'main.html.liquid').write_text('L')
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'index.html.liquid').write_text('Docs')
+    (tmp_path / 'docs' / 'guide.html.liquid').write_text('Guide')
+    (tmp_path / 'docs' / 'logo.png').write_bytes(b'\x89PNG')
+    return tmp_path
+
+
+@pytest.mark.smoke
+def test_scan_local_portal(portal):
+    local = LocalPortal.scan(str(portal))
+    assert local.sections == ['/docs']
+    assert list(local.layouts) == ['main']
+    assert sorted(local.pages) == ['/docs', '/docs/guide']
+    assert list(local.files) == ['/docs/logo.png']
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_sync_uploads_only_changes(api, url, portal):
+    cms = FakeCms(url)
+    cms.register()
+
+    dry = api.cms.sync(str(portal), dry_run=True)
+    assert sorted(dry.created) == ['file:/docs/logo.png', 'page:/docs', 'section:/docs']
+    assert cms.writes == []
+
+    report = api.cms.sync(str(portal))
+    assert report.ok
+    assert sorted(report.created) == ['file:/docs/logo.png', 'page:/docs', 'section:/docs']
+    assert report.updated == ['page:/docs/guide']
+    assert sorted(report.published) == ['page:/docs', 'page:/docs/guide']
+    assert report.unchanged == ['layout:main']
+    assert cms.templates[1]['published'] == 'Guide'
+    page = next(item for item in cms.templates if item.get('path') == '/docs')
+    assert page['section_id'] == cms.sections[1]['id']
+    assert cms.files[0]['section_id'] == str(cms.sections[1]['id'])
+
+    writes = len(cms.writes)
+    reads = len(cms.reads)
+    again = api.cms.sync(str(portal))
+    assert again.as_dict() == {'created': 0, 'updated': 0, 'published': 0, 'unchanged': 5,
+                               'failed': 0}
+    assert len(cms.writes) == writes
+    assert len(cms.reads) == reads
+
+    (portal / 'docs' / 'logo.png').write_bytes(b'\x89PNG changed')
+    assert api.cms.sync(str(portal)).updated == ['file:/docs/logo.png']
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_sync_fetches_content_of_changed_templates_only(api, url, portal):
+    cms = FakeCms(url)
+    cms.register()
+    manifest = portal / 'docs' / 'sync.json'
+
+    api.cms.sync(str(portal), manifest=str(manifest))
+    assert sorted(cms.reads) == [2, 3]
+    # content of stale templates is fetched by the workers
+    assert threading.main_thread().name not in cms.read_threads
+    assert manifest.exists()
+    assert all(item.get('path') != '/docs/sync.json' for item in cms.files)
+
+    cms.reads.clear()
+    cms.templates[0].update(draft='remote', updated_at='remote')
+    report = api.cms.sync(str(portal), manifest=str(manifest))
+    assert cms.reads == [2]
+    assert report.updated == ['layout:main']
+    assert cms.templates[0]['published'] == 'L'
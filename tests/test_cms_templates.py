@@ -0,0 +1,56 @@
+import pytest
+import responses
+from responses import matchers
+
+
+def _listing(url, query, template):
+    base = f'{url}/admin/api/cms/templates'
+    responses.add(responses.GET, f'{base}.json',
+                  match=[matchers.query_param_matcher(
+                      dict(query, type='layout', page='1', per_page='100',
+                           access_token='test-token'))],
+                  json={'collection': [template]})
+    responses.add(responses.GET, f'{base}.json', json={'collection': []})
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_template_content_is_listed_by_default(api, url):
+    # absent draft must not trigger a fetch, content was requested
+    _listing(url, {'content': 'true'},
+             {'id': 1, 'type': 'layout', 'system_name': 'main', 'published': 'body'})
+
+    layouts = api.cms_layouts.list()
+    assert layouts[0]['published'] == 'body'
+    assert layouts[0]['draft'] is None
+    assert not layouts[0].content_pending
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_template_content_is_loaded_lazily(api, url):
+    _listing(url, {}, {'id': 1, 'type': 'layout', 'system_name': 'main'})
+    responses.add(responses.GET, f'{url}/admin/api/cms/templates/1.json',
+                  json={'id': 1, 'system_name': 'main', 'draft': None, 'published': 'body'})
+
+    layouts = api.cms_layouts.list(content=False)
+    assert len(responses.calls) == 2
+    assert layouts[0]['system_name'] == 'main'
+    assert 'published' not in layouts[0].entity
+
+    assert layouts[0]['published'] == 'body'
+    assert layouts[0]['draft'] is None
+    assert len(responses.calls) == 3
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_select_by_without_content(api, url):
+    _listing(url, {}, {'id': 1, 'type': 'layout', 'system_name': 'main'})
+
+    layouts = api.cms_layouts.select_by(system_name='main', content=False)
+    assert [layout.entity_id for layout in layouts] == [1]
+    # listing pages only, no request per template
+    assert len(responses.calls) == 2
+    assert layouts[0].content_pending
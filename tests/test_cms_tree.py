@@ -0,0 +1,62 @@
+import pytest
+import responses
+
+from tests.test_cms_sync import FakeCms
+
+
+@pytest.fixture()
+def cms(url):
+    cms = FakeCms(url)
+    cms.sections += [{'id': 10, 'parent_id': 1, 'partial_path': '/docs', 'title': 'docs'},
+                     {'id': 11, 'parent_id': 10, 'partial_path': '/docs/api', 'title': 'api'},
+                     {'id': 12, 'parent_id': 1, 'partial_path': '/blog', 'title': 'blog'}]
+    cms.files += [{'id': 20, 'section_id': 11, 'path': '/docs/api/spec.json'}]
+    cms.templates[1]['section_id'] = 10
+    cms.register()
+    return cms
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_tree_lookup_and_walk(api, cms):
+    tree = api.cms.tree()
+    calls = len(responses.calls)
+    assert api.cms.tree() is tree
+
+    assert tree.lookup('/docs/guide')['system_name'] == 'guide'
+    assert tree.lookup('/docs/api/spec.json').entity_id == 20
+    assert tree.lookup('/docs/api').entity_id == 11
+    assert tree.lookup('/nothing') is None
+    assert [section['partial_path'] for section in tree.children('/')] == ['/blog', '/docs']
+
+    walked = [(section['partial_path'], [item.entity_id for item in files + templates])
+              for section, _, files, templates in tree.walk('/docs')]
+    assert walked == [('/docs', [3]), ('/docs/api', [20])]
+    assert len(responses.calls) == calls
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_tree_follows_writes(api, cms):
+    tree = api.cms.tree()
+
+    section = api.cms_sections.create(dict(title='v2', partial_path='/docs/v2', parent_id=10))
+    assert tree.section('/docs/v2').entity_id == section.entity_id
+    assert [item['partial_path'] for item in tree.children(10)] == ['/docs/api', '/docs/v2']
+
+    page = tree.page('/docs/guide')
+    api.cms_pages.update(page.entity_id, params=dict(path='/docs/howto'))
+    assert tree.page('/docs/guide') is None
+    assert tree.page('/docs/howto').entity_id == 3
+
+    api.cms_files.delete(20)
+    assert tree.file('/docs/api/spec.json') is None
+    assert tree.contents(11) == ([], [])
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_writes_do_not_create_cms(api, cms):
+    api.cms_sections.create(dict(title='v2', partial_path='/docs/v2', parent_id=10))
+    api.cms_files.delete(20)
+    assert 'cms' not in vars(api)
@@ -0,0 +1,89 @@
+import email
+import io
+
+import pytest
+import responses
+
+from threescale_api import utils
+from tests.test_cms_sync import FakeCms
+
+
+def parse(body: utils.MultipartStream) -> dict:
+    data = body.read()
+    assert len(data) == len(body)
+    message = email.message_from_bytes(
+        f'Content-Type: {body.content_type}\r\n\r\n'.encode() + data)
+    return {part.get_param('name', header='Content-Disposition'):
+            (part.get_filename(), part.get_payload(decode=True)) for part in message.get_payload()}
+
+
+@pytest.mark.smoke
+def test_multipart_stream_reads_files_in_chunks(tmp_path):
+    path = tmp_path / 'sdk.zip'
+    path.write_bytes(b'x' * 1000)
+    progress = []
+    with utils.MultipartStream(fields=dict(path='/sdk.zip', section_id=None),
+                               files={'attachment': str(path),
+                                      'extra': ('notes.txt', io.BytesIO(b'notes'))},
+                               chunk_size=100,
+                               progress=lambda sent, total: progress.append((sent, total))) \
+            as body:
+        chunks = iter(lambda: body.read(128), b'')
+        data = b''.join(chunks)
+    assert len(data) == len(body)
+    assert progress[-1] == (len(body), len(body))
+    assert len(progress) > 8
+
+    with utils.MultipartStream(fields=dict(path='/sdk.zip', section_id=None),
+                               files={'attachment': str(path),
+                                      'extra': ('notes.txt', io.BytesIO(b'notes'))}) as body:
+        parts = parse(body)
+    assert parts == {'path': (None, b'/sdk.zip'), 'attachment': ('sdk.zip', b'x' * 1000),
+                     'extra': ('notes.txt', b'notes')}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_upload_streams_file(api, url, tmp_path):
+    cms = FakeCms(url)
+    cms.register()
+    path = tmp_path / 'intro.mp4'
+    path.write_bytes(b'v' * 5000)
+    progress = []
+
+    uploaded = api.cms_files.upload('/media/intro.mp4', str(path), section_id=1,
+                                    progress=lambda sent, total: progress.append(sent))
+    assert uploaded['path'] == '/media/intro.mp4'
+    assert uploaded['section_id'] == '1'
+    assert progress[-1] > 5000
+    request = responses.calls[0].request
+    assert request.headers['Content-Type'].startswith('multipart/form-data; boundary=')
+    assert int(request.headers['Content-Length']) == progress[-1]
+
+    replaced = api.cms_files.upload('/media/intro.mp4', io.BytesIO(b'new'),
+                                    entity_id=uploaded['id'])
+    assert replaced['id'] == uploaded['id']
+    assert responses.calls[1].request.method == 'PUT'
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_upload_many(api, url, tmp_path):
+    cms = FakeCms(url)
+    cms.files.append({'id': 50, 'path': '/a.txt', 'section_id': 1})
+    cms.register()
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        (tmp_path / name).write_text(name)
+    files = {f'/{name}': str(tmp_path / name) for name in ('a.txt', 'b.txt', 'c.txt')}
+    files['/missing.txt'] = str(tmp_path / 'missing.txt')
+    progress = {}
+
+    results = {result.path: result for result in api.cms_files.upload_many(
+        files, section_id=1, progress=lambda path, sent, total: progress.update({path: sent}))}
+    assert sorted(results) == ['/a.txt', '/b.txt', '/c.txt', '/missing.txt']
+    assert not results['/missing.txt'].ok
+    assert isinstance(results['/missing.txt'].error, FileNotFoundError)
+    assert results['/a.txt'].file['id'] == 50
+    assert {results[path].file['id'] for path in ('/b.txt', '/c.txt')}.isdisjoint({50})
+    assert sorted(progress) == ['/a.txt', '/b.txt', '/c.txt']
+    assert sorted(write[0] for write in cms.writes) == ['create', 'create', 'update']
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+import responses
+
+from threescale_api import errors, utils
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_default_timeout_is_applied(api, url):
+    responses.add(responses.GET, f'{url}/some.json', json={})
+
+    api.rest.get(path='/some')
+    assert responses.calls[0].request.req_kwargs['timeout'] == utils.DEFAULT_TIMEOUT
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deadline_shortens_timeout(api, url):
+    responses.add(responses.GET, f'{url}/some.json', json={})
+
+    with api.deadline(5):
+        api.rest.get(path='/some')
+    connect, read = responses.calls[0].request.req_kwargs['timeout']
+    assert connect <= 5 and read <= 5
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deadline_aborts_pagination(api, url):
+    def page(request):
+        time.sleep(0.06)
+        return 200, {}, '{"services": [{"service": {"id": 1}}]}'
+
+    responses.add_callback(responses.GET, f'{url}/admin/api/services.json', callback=page)
+
+    with pytest.raises(errors.DeadlineExceeded):
+        with api.deadline(0.1):
+            api.services.list()
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.smoke
+def test_nested_deadline_cannot_extend_outer():
+    with utils.deadline(1):
+        with utils.deadline(100):
+            assert utils.remaining_time() <= 1
+        assert utils.remaining_time() <= 1
+    assert utils.remaining_time() is None
+
+
+@pytest.mark.smoke
+def test_deadline_propagates_to_workers():
+    with utils.deadline(10):
+        remaining = [result for _, result, _ in
+                     utils.run_parallel(lambda _: utils.remaining_time(), range(3))]
+    assert all(0 < value <= 10 for value in remaining)
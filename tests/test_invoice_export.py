@@ -0,0 +1,138 @@
+import csv
+import gzip
+import hashlib
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import responses
+
+from threescale_api import errors, utils
+
+PAGES = {1: [1, 2], 2: [3, 4], 3: [5]}
+
+
+def invoice_pages(failing=()):
+    def callback(request):
+        page = int(parse_qs(urlsplit(request.url).query)['page'][0])
+        if page in failing:
+            return 503, {}, json.dumps({'error': 'unavailable'})
+        invoices = [{'invoice': {'id': i, 'friendly_id': f'inv-{i}', 'cost': i * 10}}
+                    for i in PAGES.get(page, [])]
+        return 200, {}, json.dumps({'invoices': invoices})
+    return callback
+
+
+def add_details(url):
+    for invoice_id in range(1, 6):
+        responses.add(responses.GET, f'{url}/api/invoices/{invoice_id}/line_items.json',
+                      json={'line_items': [{'line_item': {'id': invoice_id, 'cost': 1}}]})
+        responses.add(responses.GET,
+                      f'{url}/api/invoices/{invoice_id}/payment_transactions.json',
+                      json={'payment_transactions': []})
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_export_jsonl_gzip(api, url, tmp_path):
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json', callback=invoice_pages())
+    add_details(url)
+    path = tmp_path / 'invoices.jsonl.gz'
+
+    assert api.invoices.export(str(path), page_workers=2) == 5
+
+    with gzip.open(path, 'rt') as file:
+        records = [json.loads(line) for line in file]
+    assert [record['id'] for record in records] == [1, 2, 3, 4, 5]
+    assert records[2]['line_items'] == [{'id': 3, 'cost': 1}]
+    assert records[2]['payment_transactions'] == []
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_export_csv_resumes_from_checkpoint(api, url, tmp_path):
+    failing = {3}
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json',
+                           callback=invoice_pages(failing))
+    add_details(url)
+    path = tmp_path / 'invoices.csv'
+    checkpoint = tmp_path / 'invoices.checkpoint'
+
+    with pytest.raises(errors.ApiClientError):
+        api.invoices.export(str(path), checkpoint=str(checkpoint), page_workers=1,
+                            payment_transactions=False)
+    assert json.loads(checkpoint.read_text())['page'] == 2
+
+    failing.clear()
+    assert api.invoices.export(str(path), checkpoint=str(checkpoint),
+                               payment_transactions=False) == 5
+    assert not checkpoint.exists()
+
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['friendly_id'] for row in rows] == ['inv-1', 'inv-2', 'inv-3', 'inv-4', 'inv-5']
+    assert json.loads(rows[4]['line_items']) == [{'id': 5, 'cost': 1}]
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_list_by_account_paginates(api, url):
+    responses.add_callback(responses.GET, f'{url}/api/accounts/7/invoices.json',
+                           callback=invoice_pages())
+    invoices = api.invoices.list_by_account(7)
+    assert [invoice['id'] for invoice in invoices] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_download_pdfs_skips_same_files(api, url, tmp_path):
+    body = b'%PDF-1.4 invoice'
+    etag = hashlib.md5(body).hexdigest()
+    responses.add_callback(responses.GET, f'{url}/api/invoices.json', callback=invoice_pages())
+    for invoice_id in range(1, 6):
+        responses.add(responses.GET, f'https://s3.example.com/inv-{invoice_id}.pdf', body=body,
+                      headers={'Content-Length': str(len(body)), 'ETag': f'"{etag}"'})
+    invoices = api.invoices.list()
+    for invoice in invoices:
+        invoice.entity['pdf_url'] = f"https://s3.example.com/{invoice['friendly_id']}.pdf"
+    invoices[4].entity['pdf_url'] = None
+    (tmp_path / 'inv-2.pdf').write_bytes(b'%PDF-1.4 corrupted')
+
+    results = {result.invoice['id']: result for result in
+               api.invoices.download_pdfs(invoices, directory=str(tmp_path), checksum=True)}
+    assert [results[i].downloaded for i in range(1, 5)] == [True] * 4
+    assert not results[5].ok
+    assert (tmp_path / 'inv-2.pdf').read_bytes() == body
+
+    results = list(api.invoices.download_pdfs(invoices[:4], directory=str(tmp_path),
+                                              checksum=True))
+    assert all(result.ok and not result.downloaded for result in results)
+    assert results[0].size == len(body)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_download_checks_size_by_ranged_request(tmp_path):
+    body = b'%PDF-1.4 invoice'
+    served = []
+
+    def pdf(request):
+        if request.headers.get('Range') == 'bytes=0-0':
+            served.append('range')
+            return 206, {'Content-Range': f'bytes 0-0/{len(body)}'}, body[:1]
+        served.append('full')
+        return 200, {'Content-Length': str(len(body))}, body
+    responses.add_callback(responses.GET, 'https://s3.example.com/inv-1.pdf', callback=pdf)
+    path = tmp_path / 'inv-1.pdf'
+    session = utils.create_session()
+
+    assert utils.download(session, 'https://s3.example.com/inv-1.pdf', str(path)) == \
+        (True, len(body))
+    assert utils.download(session, 'https://s3.example.com/inv-1.pdf', str(path)) == \
+        (False, len(body))
+    path.write_bytes(b'%PDF-1.4 older')
+    assert utils.download(session, 'https://s3.example.com/inv-1.pdf', str(path)) == \
+        (True, len(body))
+    assert served == ['full', 'range', 'range', 'full']
+    assert path.read_bytes() == body
+    assert [item.name for item in tmp_path.iterdir()] == ['inv-1.pdf']
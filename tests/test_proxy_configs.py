@@ -0,0 +1,189 @@
+import json
+import re
+
+import pytest
+import responses
+
+from threescale_api import errors, proxy_diff, resources
+from threescale_api.cache import ProxyConfigCache
+
+
+@pytest.fixture()
+def configs(api):
+    service = resources.Service(client=api.services, entity={'id': 7, 'system_name': 'svc'})
+    return resources.Proxy(client=service.proxy, entity={'service_id': 7}).configs
+
+
+def config(version, env='sandbox', policies=('apicast',), rules=(), **proxy):
+    return {
+        'id': 100 + version, 'version': version, 'environment': env,
+        'content': {
+            'id': 7,
+            'proxy': dict({
+                'policy_chain': [{'name': name, 'version': 'builtin', 'configuration': {}}
+                                 for name in policies],
+                'proxy_rules': [dict(rule) for rule in rules],
+                'backend_api_configs': [],
+            }, **proxy),
+        },
+    }
+
+
+def add_versions(url, configs_by_version, env='sandbox'):
+    pattern = re.compile(rf'{url}/admin/api/services/7/proxy/configs/{env}/(\d+)\.json')
+
+    def callback(request):
+        version = int(pattern.match(request.url).group(1))
+        if version not in configs_by_version:
+            return 404, {}, '{"status": "Not found"}'
+        return 200, {}, json.dumps({'proxy_config': configs_by_version[version]})
+    responses.add_callback(responses.GET, pattern, callback=callback)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_version_is_cached_on_disk(configs, url, tmp_path):
+    add_versions(url, {1: config(1), 2: config(2, policies=('apicast', 'cors'))})
+    cache = ProxyConfigCache(str(tmp_path))
+
+    fetched = configs.version(2, cache=cache)
+    cached = configs.version(2, cache=cache)
+    assert len(responses.calls) == 1
+    assert cached.entity == fetched.entity
+    assert cached['content']['proxy']['policy_chain'][1]['name'] == 'cors'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # another cache instance on the same directory (e.g. next process)
+    assert ProxyConfigCache(str(tmp_path)).get(
+        cache.key(url, 7, 'sandbox', 2)) == fetched.entity
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_same_content_stored_once(configs, url, tmp_path):
+    add_versions(url, {3: config(3)}, env='sandbox')
+    add_versions(url, {1: config(1, env='production')}, env='production')
+    cache = ProxyConfigCache(str(tmp_path))
+    configs.version(3, env='sandbox', cache=cache)
+    configs.version(1, env='production', cache=cache)
+
+    assert len(cache) == 2
+    assert len(list((tmp_path / 'objects').rglob('*.json.gz'))) == 1
+    assert configs.version(1, env='production', cache=cache)['environment'] == 'production'
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_corrupt_cache_files_are_fetched_again(configs, url, tmp_path):
+    add_versions(url, {1: config(1), 2: config(2)})
+    cache = ProxyConfigCache(str(tmp_path))
+    configs.version(1, cache=cache)
+    configs.version(2, cache=cache)
+
+    obj = next((tmp_path / 'objects').rglob('*.json.gz'))
+    obj.write_bytes(obj.read_bytes()[:10])
+    with open(cache._ref_path(cache.key(url, 7, 'sandbox', 2)), 'w') as file:
+        file.write('{"entity"')
+
+    assert configs.version(1, cache=cache)['version'] == 1
+    assert configs.version(2, cache=cache)['version'] == 2
+    assert len(responses.calls) == 4
+    assert configs.version(1, cache=cache)['content']['id'] == 7
+    assert configs.version(2, cache=cache)['content']['id'] == 7
+    assert len(responses.calls) == 4
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_versions_range(configs, url, tmp_path):
+    add_versions(url, {version: config(version) for version in range(1, 11)})
+    responses.add(responses.GET, f'{url}/admin/api/services/7/proxy/configs/sandbox/latest.json',
+                  json={'proxy_config': config(10)})
+    cache = ProxyConfigCache(str(tmp_path))
+    configs.version(4, cache=cache)
+
+    fetched = configs.versions(3, cache=cache, max_workers=4)
+    assert [item['version'] for item in fetched] == list(range(3, 11))
+    # latest + 7 versions not cached yet
+    assert len(responses.calls) == 1 + 1 + 7
+    assert [item['version'] for item in configs.versions(3, 10, cache=cache)] == \
+        list(range(3, 11))
+    assert len(responses.calls) == 9
+
+    with pytest.raises(errors.ApiClientError):
+        configs.versions(9, 12)
+
+
+def rule(method, pattern, delta=1, **kwargs):
+    return dict({'id': len(pattern), 'http_method': method, 'pattern': pattern,
+                 'metric_system_name': 'hits', 'delta': delta, 'owner_type': 'Proxy',
+                 'owner_id': 7, 'updated_at': 'now'}, **kwargs)
+
+
+@pytest.mark.smoke
+def test_diff_sections():
+    old = config(1, policies=('apicast', 'cors', 'headers'),
+                 rules=(rule('GET', '/a'), rule('GET', '/b'), rule('POST', '/c')),
+                 backend_api_configs=[{'path': '/', 'backend_api': {'id': 1}}],
+                 error_status_auth_failed=403)
+    new = config(2, policies=('cors', 'apicast', 'rate_limit'),
+                 rules=(rule('GET', '/a', updated_at='later', id=999),
+                        rule('GET', '/b', delta=5), rule('PUT', '/c')),
+                 backend_api_configs=[{'path': '/', 'backend_api': {'id': 2}},
+                                      {'path': '/v2', 'backend_api': {'id': 3}}],
+                 error_status_auth_failed=401)
+    new['content']['proxy']['policy_chain'][0]['configuration'] = {'allow_origin': '*'}
+
+    diff = proxy_diff.diff(old, new)
+    assert diff.summary() == {
+        'old_version': 1, 'new_version': 2, 'changed': True,
+        'policies': {'added': 1, 'removed': 1, 'changed': 1},
+        'mapping_rules': {'added': 1, 'removed': 1, 'changed': 1},
+        'backend_routes': {'added': 1, 'removed': 0, 'changed': 1},
+        'policy_order_changed': True, 'settings': 1}
+    assert diff.policies.changed[0].fields == {'configuration.allow_origin': (None, '*')}
+    assert diff.mapping_rules.changed[0].key == ('Proxy', 7, 'GET', '/b')
+    assert diff.mapping_rules.changed[0].fields == {'delta': (1, 5)}
+    assert diff.backend_routes.changed[0].fields == {'backend_api.id': (1, 2)}
+    assert diff.settings == {'error_status_auth_failed': (403, 401)}
+    assert '+ backend_routes /v2' in diff.lines()
+    assert '- mapping_rules Proxy 7 POST /c' in diff.lines()
+
+    summary = proxy_diff.diff(old, new, summary=True)
+    assert summary.summary() == diff.summary()
+    assert summary.mapping_rules.changed[0].fields == {}
+
+    assert not proxy_diff.diff(old, config(3, policies=('apicast', 'cors', 'headers'),
+                                           rules=old['content']['proxy']['proxy_rules'],
+                                           backend_api_configs=[{'path': '/',
+                                                                 'backend_api': {'id': 1}}],
+                                           error_status_auth_failed=403))
+
+
+@pytest.mark.smoke
+def test_diff_rules_with_same_pattern():
+    old = config(1, rules=(rule('GET', '/a'), rule('GET', '/a', metric_system_name='search')))
+    new = config(2, rules=(rule('GET', '/a'),
+                           rule('GET', '/a', metric_system_name='search', delta=2),
+                           rule('GET', '/a', metric_system_name='extra')))
+
+    diff = proxy_diff.diff(old, new)
+    assert diff.summary()['mapping_rules'] == {'added': 1, 'removed': 0, 'changed': 1}
+    assert diff.mapping_rules.changed[0].key == ('Proxy', 7, 'GET', '/a', 2)
+    assert diff.mapping_rules.changed[0].fields == {'delta': (1, 2)}
+    assert '+ mapping_rules Proxy 7 GET /a 3' in diff.lines()
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_configs_diff(configs, url):
+    add_versions(url, {1: config(1), 2: config(2, policies=('apicast', 'cors'))})
+    responses.add(responses.GET,
+                  f'{url}/admin/api/services/7/proxy/configs/production/latest.json',
+                  json={'proxy_config': config(1, env='production')})
+
+    diff = configs.diff('latest', 2, env='production', new_env='sandbox')
+    assert (diff.old_version, diff.new_version) == (1, 2)
+    assert [change.key for change in diff.policies.added] == [('cors', 1)]
+    assert not configs.diff(1, configs.version(1), summary=True)
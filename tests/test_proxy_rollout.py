@@ -0,0 +1,252 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+import responses
+
+import requests
+
+from threescale_api import errors, resources, utils
+
+
+def service(api, service_id=7):
+    return resources.Service(client=api.services, entity={'id': service_id, 'system_name': 's'})
+
+
+class FakeConfigs:
+    """Latest configs of a service answering conditional requests"""
+
+    def __init__(self, url, service_id=7, sandbox=3, production=1, lag=2, promoted=False,
+                 changed=True):
+        self.base = f'{url}/admin/api/services/{service_id}/proxy'
+        self.versions = {'sandbox': sandbox, 'production': production}
+        # whether the proxy has changes to deploy
+        self.changed = changed
+        # sandbox version the production config was promoted from
+        self.source = sandbox if promoted else sandbox - 1
+        self.promotions = 0
+        self.pending = {}
+        self.lag = lag
+        self.conditional = 0
+
+    def register(self):
+        for env in self.versions:
+            responses.add_callback(responses.GET, f'{self.base}/configs/{env}/latest.json',
+                                   callback=lambda req, env=env: self.latest(req, env))
+        responses.add_callback(responses.POST, f'{self.base}/deploy.json', callback=self.deploy)
+        responses.add_callback(
+            responses.POST, f'{self.base}/configs/sandbox/{self.versions["sandbox"]}/promote.json',
+            callback=self.promote)
+
+    def latest(self, request, env):
+        if env in self.pending:
+            self.pending[env][0] -= 1
+            if self.pending[env][0] <= 0:
+                self.versions[env] = self.pending.pop(env)[1]
+        if not self.versions[env]:
+            return 404, {}, '{"status": "Not found"}'
+        etag = f'"{env}-{self.versions[env]}"'
+        if request.headers.get('If-None-Match'):
+            self.conditional += 1
+            if request.headers['If-None-Match'] == etag:
+                return 304, {'ETag': etag}, ''
+        return 200, {'ETag': etag}, json.dumps({'proxy_config': self.config(env)})
+
+    def deploy(self, _):
+        # new sandbox version is created by the deploy itself, only when something changed
+        if self.changed:
+            self.versions['sandbox'] += 1
+            self.changed = False
+        return 200, {}, json.dumps({'proxy': {'service_id': 7}})
+
+    def promote(self, request):
+        assert json.loads(request.body) == {'to': 'production'}
+        version = self.versions['production'] + 1
+        self.pending['production'] = [self.lag, version]
+        self.source = self.versions['sandbox']
+        self.promotions += 1
+        return 201, {}, json.dumps({'proxy_config': dict(self.config('production'),
+                                                         version=version)})
+
+    def config(self, env):
+        source = self.versions['sandbox'] if env == 'sandbox' else self.source
+        return {'id': 1, 'version': self.versions[env], 'environment': env,
+                'content': {'proxy': {'source': source}}}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deploy_and_wait(api, url):
+    configs = FakeConfigs(url)
+    configs.register()
+
+    config = service(api).proxy.deploy_and_wait(interval=0.01)
+    assert config['version'] == 4
+    assert config['environment'] == 'sandbox'
+    assert configs.conditional == 1
+    assert len(responses.calls) == 3
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deploy_without_changes(api, url):
+    configs = FakeConfigs(url, changed=False)
+    configs.register()
+
+    config = service(api).proxy.deploy_and_wait(timeout=1, interval=0.01)
+    assert config['version'] == 3
+    # unchanged latest config answered by not modified response, no polling
+    assert configs.conditional == 1
+    assert len(responses.calls) == 3
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deploy_and_wait_for_first_config(api, url):
+    configs = FakeConfigs(url, sandbox=0, changed=False)
+    configs.register()
+    configs.pending['sandbox'] = [4, 1]
+
+    assert service(api).proxy.deploy_and_wait(timeout=1, interval=0.01)['version'] == 1
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_promote_and_wait_with_probe(api, url):
+    configs = FakeConfigs(url)
+    configs.register()
+    probes = iter([False, False, True])
+
+    config = service(api).proxy.configs.promote_and_wait(interval=0.01,
+                                                         probe=lambda: next(probes))
+    assert (config['version'], config['environment']) == (2, 'production')
+    assert next(probes, None) is None
+
+
+def gateway(endpoint='http://gateway'):
+    app = SimpleNamespace(api_client_verify=True, authobj=lambda: None,
+                          service=SimpleNamespace(proxy=SimpleNamespace(
+                              fetch=lambda: {'sandbox_endpoint': endpoint})))
+    return utils.HttpClient(app)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deploy_and_wait_with_starting_gateway(api, url):
+    FakeConfigs(url).register()
+    responses.add(responses.GET, 'http://gateway/', body=requests.ConnectionError('refused'))
+    responses.add(responses.GET, 'http://gateway/', status=503)
+    responses.add(responses.GET, 'http://gateway/', status=200)
+    probe = gateway()
+
+    config = service(api).proxy.deploy_and_wait(timeout=5, interval=0.01, probe=probe)
+    assert config['version'] == 4
+    assert len([call for call in responses.calls if 'gateway' in call.request.url]) == 3
+    # retries of the probe client itself stay untouched
+    assert probe.session.get_adapter('http://gateway/').max_retries.total == 8
+    assert probe.without_retries().session.get_adapter('http://gateway/').max_retries.total \
+        == 0
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_probe_respects_timeout(api, url):
+    FakeConfigs(url).register()
+    responses.add(responses.GET, 'http://gateway/', body=requests.ConnectionError('refused'))
+
+    started = time.monotonic()
+    with pytest.raises(errors.WaitTimeout):
+        service(api).proxy.deploy_and_wait(timeout=0.3, interval=0.01, probe=gateway())
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_times_out(api, url):
+    configs = FakeConfigs(url, lag=1000)
+    configs.register()
+
+    with pytest.raises(errors.WaitTimeout):
+        service(api).proxy.configs.promote_and_wait(timeout=0.1, interval=0.01)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_deploy_many(api, url):
+    FakeConfigs(url, service_id=7).register()
+    FakeConfigs(url, service_id=8).register()
+    responses.add(responses.POST, f'{url}/admin/api/services/9/proxy/deploy.json', status=422,
+                  json={'error': 'invalid'})
+    responses.add(responses.GET, f'{url}/admin/api/services/9/proxy/configs/sandbox/latest.json',
+                  status=404, json={'status': 'Not found'})
+    services = [service(api, service_id) for service_id in (7, 8, 9)]
+
+    results = {result.service.entity_id: result
+               for result in api.services.deploy_many(services, interval=0.01)}
+    assert results[7].ok and results[8].ok
+    assert results[7].config['version'] == 4
+    assert results[7].elapsed > 0
+    assert isinstance(results[9].error, errors.ApiClientError)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_promote_many(api, url):
+    fakes = {service_id: FakeConfigs(url, service_id=service_id, lag=1,
+                                     promoted=service_id == 12)
+             for service_id in range(10, 20)}
+    for fake in fakes.values():
+        fake.register()
+    services = [service(api, service_id) for service_id in fakes]
+
+    results = {result.service.entity_id: result
+               for result in api.services.promote_many(services, rate=1000, interval=0.01)}
+    assert all(result.ok for result in results.values())
+    assert results[12].skipped and fakes[12].promotions == 0
+    assert [service_id for service_id, result in results.items() if result.skipped] == [12]
+    assert all(fake.promotions == 1 for service_id, fake in fakes.items() if service_id != 12)
+    assert results[10].version == 3
+    assert (results[10].config['version'], results[10].config['environment']) == \
+        (2, 'production')
+    assert set(results[10].timings) == {'resolve', 'promote', 'wait'}
+    assert set(results[12].timings) == {'resolve'}
+    assert resources.ProxyRollout(services[0]).timings is None
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_promote_many_with_probe(api, url):
+    FakeConfigs(url, lag=1).register()
+    probed = []
+
+    results = list(api.services.promote_many([service(api)], interval=0.01,
+                                             probe=lambda: probed.append(1) or True))
+    assert results[0].ok
+    assert probed == [1]
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_promote_many_raises_unexpected_errors(api, url):
+    FakeConfigs(url, lag=1).register()
+
+    def probe():
+        raise RuntimeError('broken probe')
+
+    with pytest.raises(RuntimeError):
+        list(api.services.promote_many([service(api)], interval=0.01, probe=probe))
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_promote_many_rate_limit(api, url):
+    fakes = [FakeConfigs(url, service_id=service_id) for service_id in range(10, 14)]
+    for fake in fakes:
+        fake.register()
+    services = [service(api, fake_id) for fake_id in range(10, 14)]
+
+    results = list(api.services.promote_many(services, wait=False, rate=20, max_workers=4))
+    assert all(result.ok and not result.skipped for result in results)
+    # 4 promotions at 20/s, the first one is immediate
+    assert max(result.timings['promote'] for result in results) >= 0.1
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import responses
+
+from threescale_api import registry as registry_module
+from threescale_api.registry import ClientRegistry
+
+
+@pytest.fixture()
+def registry():
+    return ClientRegistry(max_clients=2)
+
+
+@pytest.mark.smoke
+def test_registry_caches_clients(registry):
+    api = registry.get('https://one-admin.example.invalid', 'token')
+    assert registry.get('https://one-admin.example.invalid', 'token') is api
+    assert registry.get('https://one-admin.example.invalid', 'other') is not api
+    assert len(registry) == 2
+
+
+@pytest.mark.smoke
+def test_registry_shares_session_per_host(registry):
+    first = registry.get('https://one-admin.example.invalid', 'token')
+    second = registry.get('https://one-admin.example.invalid', 'other')
+    third = registry.get('https://two-admin.example.invalid', 'token')
+    assert first.rest.session is second.rest.session
+    assert first.rest.session is not third.rest.session
+
+
+@pytest.mark.smoke
+def test_registry_evicts_least_recently_used(registry):
+    registry.get('https://one-admin.example.invalid', 'token')
+    registry.get('https://two-admin.example.invalid', 'token')
+    registry.get('https://one-admin.example.invalid', 'token')
+    registry.get('https://three-admin.example.invalid', 'token')
+    assert ('https://one-admin.example.invalid', 'token') in registry
+    assert ('https://two-admin.example.invalid', 'token') not in registry
+
+
+@pytest.mark.smoke
+def test_registry_evicts_idle_clients():
+    registry = ClientRegistry(idle_timeout=0)
+    registry.get('https://one-admin.example.invalid', 'token')
+    registry.get('https://two-admin.example.invalid', 'token')
+    assert len(registry) == 1
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_registry_metrics(registry):
+    url = 'https://one-admin.example.invalid'
+    responses.add(responses.GET, f'{url}/admin/api/services/1.json', json={'service': {'id': 1}})
+    responses.add(responses.GET, f'{url}/admin/api/services/2.json', status=404)
+    api = registry.get(url, 'token', throws=False)
+    api.services.fetch(1)
+    api.rest.get(url=f'{url}/admin/api/services/2')
+    metrics = registry.metrics()[(url, 'token', True)]
+    assert metrics['requests'] == 2
+    assert metrics['errors'] == 1
+
+
+@pytest.mark.smoke
+def test_registry_keys_clients_by_ssl_verify(registry):
+    url = 'https://one-admin.example.invalid'
+    insecure = registry.get(url, 'token', ssl_verify=False)
+    secure = registry.get(url, 'token', ssl_verify=True)
+    assert secure is not insecure
+    assert secure.rest._ssl_verify and not insecure.rest._ssl_verify
+    assert registry.get(url, 'token') is secure
+    assert ClientRegistry(ssl_verify=False).get(url, 'token').rest._ssl_verify is False
+
+    registry.evict(url, 'token', ssl_verify=False)
+    assert (url, 'token', False) not in registry
+    assert (url, 'token') in registry
+
+
+@pytest.mark.smoke
+def test_registry_creates_clients_without_blocking_others(registry, monkeypatch):
+    created = threading.Event()
+    release = threading.Event()
+    client_klass = registry_module.ThreeScaleClient
+
+    def slow_client(url, token, **kwargs):
+        if 'slow' in url:
+            created.set()
+            assert release.wait(5)
+        return client_klass(url, token, **kwargs)
+    monkeypatch.setattr(registry_module, 'ThreeScaleClient', slow_client)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow = executor.submit(registry.get, 'https://slow-admin.example.invalid', 'token')
+        assert created.wait(5)
+        fast = executor.submit(registry.get, 'https://fast-admin.example.invalid', 'token')
+        assert fast.result(timeout=5) is not None
+        release.set()
+        assert slow.result() is registry.get('https://slow-admin.example.invalid', 'token')
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+import responses
+
+from threescale_api import client, errors, utils
+from threescale_api.scheduler import RequestScheduler
+
+
+@pytest.mark.smoke
+def test_lane_concurrency_cap():
+    scheduler = RequestScheduler(lanes={'bulk': dict(max_concurrency=2)}, default_lane='bulk')
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(_):
+        with scheduler.slot():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    list(utils.run_parallel(work, range(8), max_workers=8))
+    assert max(peak) == 2
+    assert scheduler.metrics()['bulk']['requests'] == 8
+    assert scheduler.metrics()['bulk']['queue_depth'] == 0
+
+
+@pytest.mark.smoke
+def test_priority_lane_admitted_first():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = []
+    started = threading.Event()
+
+    def hold():
+        with scheduler.slot('bulk'):
+            started.set()
+            time.sleep(0.1)
+
+    def request(lane):
+        with scheduler.slot(lane):
+            order.append(lane)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    started.wait()
+    bulk = threading.Thread(target=request, args=('bulk',))
+    bulk.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=request, args=('interactive',))
+    interactive.start()
+    for thread in (holder, bulk, interactive):
+        thread.join()
+
+    assert order == ['interactive', 'bulk']
+    assert scheduler.metrics()['interactive']['wait_time_max'] > 0
+
+
+@pytest.mark.smoke
+def test_unknown_lane():
+    scheduler = RequestScheduler()
+    with pytest.raises(ValueError):
+        with scheduler.slot('nonexistent'):
+            pass
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_pagination_runs_in_bulk_lane(url):
+    api = client.ThreeScaleClient(url=url, token='test-token', scheduler=RequestScheduler())
+    responses.add(responses.GET, f'{url}/admin/api/services.json',
+                  json={'services': [{'service': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/services.json', json={'services': []})
+    responses.add(responses.GET, f'{url}/admin/api/services/1.json',
+                  json={'service': {'id': 1}})
+
+    assert len(api.services.list()) == 1
+    api.services.fetch(1)
+    metrics = api.rest.scheduler.metrics()
+    assert metrics['bulk']['requests'] == 2
+    assert metrics['interactive']['requests'] == 1
+
+    with api.rest.lane('interactive'):
+        api.services.list()
+    assert api.rest.scheduler.metrics()['interactive']['requests'] == 2
+
+
+@pytest.mark.smoke
+@responses.activate
+@pytest.mark.parametrize('bulk_lane, used', [(None, 'api'), ('export', 'export')])
+def test_pagination_with_custom_lanes(url, bulk_lane, used):
+    scheduler = RequestScheduler(lanes={'api': {}, 'export': dict(max_concurrency=1)},
+                                 default_lane='api', bulk_lane=bulk_lane)
+    api = client.ThreeScaleClient(url=url, token='test-token', scheduler=scheduler)
+    responses.add(responses.GET, f'{url}/admin/api/services.json',
+                  json={'services': [{'service': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/services.json', json={'services': []})
+
+    assert len(api.services.list()) == 1
+    assert scheduler.metrics()[used]['requests'] == 2
+
+
+@pytest.mark.smoke
+def test_unknown_bulk_lane():
+    with pytest.raises(ValueError):
+        RequestScheduler(lanes={'api': {}}, default_lane='api', bulk_lane='bulk')
+
+
+@pytest.mark.smoke
+def test_run_parallel_propagates_lane():
+    scheduler = RequestScheduler()
+
+    with scheduler.lane('bulk'):
+        lanes = [result for _, result, _ in
+                 utils.run_parallel(lambda _: scheduler.current_lane(), range(4))]
+    assert lanes == ['bulk'] * 4
+    assert scheduler.current_lane() == 'interactive'
+
+
+@pytest.mark.smoke
+def test_slot_wait_respects_deadline(url):
+    scheduler = RequestScheduler(lanes={'bulk': dict(max_concurrency=1)}, default_lane='bulk')
+    rest = client.RestApiClient(url=url, token='test-token', scheduler=scheduler)
+
+    with scheduler.slot():
+        started = time.monotonic()
+        with pytest.raises(errors.DeadlineExceeded):
+            with utils.deadline(0.05):
+                rest.get(path='/some')
+        assert time.monotonic() - started < 1
+    assert scheduler.metrics()['bulk']['queue_depth'] == 0
@@ -0,0 +1,140 @@
+import json
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import responses
+
+from threescale_api import snapshot
+
+
+def collection(name, entity, items):
+    return {name: [{entity: item} for item in items]}
+
+
+class FakeTenant:
+    """Routes listings of a small tenant; unknown paths are not found"""
+
+    def __init__(self):
+        self.routes = {
+            'services': collection('services', 'service', [{'id': 1, 'system_name': 'a'},
+                                                           {'id': 2, 'system_name': 'b'}]),
+            'backend_apis': collection('backend_apis', 'backend_api', [{'id': 5}]),
+            'accounts': collection('accounts', 'account', [{'id': 9, 'org_name': 'acme'}]),
+            'backend_apis/5/metrics': collection('metrics', 'metric',
+                                                 [{'id': 50, 'system_name': 'hits'}]),
+            'backend_apis/5/metrics/50/methods': collection('methods', 'method', [{'id': 51}]),
+            'backend_apis/5/mapping_rules': collection('mapping_rules', 'mapping_rule',
+                                                       [{'id': 52}]),
+            'application_plans/30/limits': collection('limits', 'limit', [{'id': 31}]),
+            'application_plans/30/pricing_rules': collection('pricing_rules', 'pricing_rule',
+                                                             [{'id': 32}]),
+        }
+        for service_id in (1, 2):
+            base = f'services/{service_id}'
+            metric_id, plan_id = service_id * 10, service_id * 10 + 8
+            self.routes.update({
+                f'{base}/metrics': collection('metrics', 'metric', [
+                    {'id': metric_id, 'system_name': 'hits'},
+                    {'id': metric_id + 1, 'system_name': 'other'}]),
+                f'{base}/metrics/{metric_id}/methods': collection(
+                    'methods', 'method', [{'id': metric_id + 2, 'system_name': 'get'}]),
+                f'{base}/proxy/mapping_rules': collection('mapping_rules', 'mapping_rule',
+                                                          [{'id': metric_id + 3}]),
+                f'{base}/application_plans': collection('plans', 'application_plan',
+                                                        [{'id': 30 if service_id == 1 else
+                                                          plan_id}]),
+                f'{base}/proxy/policies': {'policies_config': [{'name': 'apicast'}]},
+                f'{base}/backend_usages': collection('backend_usages', 'backend_usage',
+                                                     [{'id': 40 + service_id, 'path': '/'}]),
+            })
+        self.routes['application_plans/28/limits'] = collection('limits', 'limit', [])
+        self.routes['application_plans/28/pricing_rules'] = \
+            collection('pricing_rules', 'pricing_rule', [])
+        self.requests = []
+        self.failing = set()
+
+    def register(self, url):
+        responses.add_callback(responses.GET, re.compile(rf'{url}/admin/api/.*'),
+                               callback=self.get)
+
+    def get(self, request):
+        parts = urlsplit(request.url)
+        path = parts.path[len('/admin/api/'):-len('.json')]
+        self.requests.append(path)
+        if path in self.failing:
+            return 500, {}, '{}'
+        if path not in self.routes:
+            return 404, {}, '{}'
+        page = parse_qs(parts.query).get('page', ['1'])[0]
+        body = self.routes[path]
+        if page != '1':
+            body = {name: [] for name in body}
+        return 200, {}, json.dumps(body)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_export_tenant(api, url, tmp_path):
+    tenant = FakeTenant()
+    tenant.register(url)
+
+    report = api.export(str(tmp_path), max_workers=4)
+    assert report.ok, report.failed
+    assert report.as_dict()['entities'] == {
+        'services': 2, 'backends': 1, 'accounts': 1, 'metrics': 5, 'methods': 3,
+        'mapping_rules': 3, 'app_plans': 2, 'policies': 2, 'backend_usages': 2, 'limits': 1,
+        'pricing_rules': 1}
+    methods = snapshot.load(str(tmp_path), 'methods')
+    assert {'id': 12, 'system_name': 'get', '_parents': {'services': 1, 'metrics': 10}} \
+        in methods
+    assert snapshot.load(str(tmp_path), 'policies')[0]['position'] == 0
+    # methods are listed for hits metrics only
+    assert 'services/1/metrics/11/methods' not in tenant.requests
+    assert not (tmp_path / snapshot.CHECKPOINT).exists()
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_export_requests_only_listings(api, url, tmp_path):
+    tenant = FakeTenant()
+    tenant.register(url)
+
+    # reads of parents would go through the batch loader and its listings
+    with api.batch_loads(listing_threshold=1):
+        assert api.export(str(tmp_path)).ok
+    # no parent is read, every listing costs its pages only (empty last page if paginated)
+    assert set(tenant.requests) <= set(tenant.routes)
+    assert tenant.requests.count('services') == 2
+    assert tenant.requests.count('services/1/proxy/policies') == 1
+    assert tenant.requests.count('application_plans/30/limits') == 1
+    assert tenant.requests.count('services/1/metrics/10/methods') == 1
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_export_resumes_failed_listings(api, url, tmp_path):
+    tenant = FakeTenant()
+    tenant.failing = {'services/2/metrics', 'backend_apis/5/mapping_rules'}
+    tenant.register(url)
+
+    report = api.export(str(tmp_path), compress=True)
+    assert not report.ok
+    assert sorted(report.failed) == ['backends/5/mapping_rules', 'services/2/metrics']
+    assert (tmp_path / snapshot.CHECKPOINT).exists()
+
+    tenant.failing = set()
+    tenant.requests = []
+    report = api.export(str(tmp_path), compress=True)
+    assert report.ok and report.resumed
+    # only the failed listings (and listings below them) run again
+    assert set(tenant.requests) == {'backend_apis/5/mapping_rules', 'services/2/metrics',
+                                    'services/2/metrics/20/methods'}
+    assert len(snapshot.load(str(tmp_path), 'metrics')) == 5
+    assert len(snapshot.load(str(tmp_path), 'methods')) == 3
+    assert len(snapshot.load(str(tmp_path), 'services')) == 2
+
+    report = api.export(str(tmp_path), resume=False)
+    assert report.ok and not report.resumed
+    assert not (tmp_path / 'services.jsonl.gz').exists()
+    assert len(snapshot.load(str(tmp_path), 'services')) == 2
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+import responses
+
+from threescale_api import client, errors
+
+
+@pytest.fixture()
+def master():
+    return client.ThreeScaleClient(url='http://master', token='master-token')
+
+
+def tenant_api(name):
+    return client.ThreeScaleClient(url=f'http://{name}', token=f'{name}-token')
+
+
+def add_services(name, *ids, status=200):
+    responses.add(responses.GET, f'http://{name}/admin/api/services.json',
+                  json={'services': [{'service': {'id': i}} for i in ids]}, status=status)
+    responses.add(responses.GET, f'http://{name}/admin/api/services.json',
+                  json={'services': []})
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_fan_out_merges_results_tagged_by_tenant(master):
+    add_services('one', 1, 2)
+    add_services('two', 3)
+    add_services('broken', status=500)
+    tenants = [tenant_api(name) for name in ('one', 'two', 'broken')]
+
+    results = list(master.tenants.fan_out(lambda api: api.services.list(), tenants))
+
+    values = sorted((result.tenant.url, result.value.entity_id)
+                    for result in results if result.ok)
+    assert values == [('http://one', 1), ('http://one', 2), ('http://two', 3)]
+    failed = [result for result in results if not result.ok]
+    assert len(failed) == 1
+    assert failed[0].tenant.url == 'http://broken'
+    assert isinstance(failed[0].error, errors.ApiClientError)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_fan_out_timeout_per_tenant(master):
+    def slow(request):
+        time.sleep(0.1)
+        return 200, {}, '{"services": [{"service": {"id": 1}}]}'
+
+    responses.add_callback(responses.GET, 'http://slow/admin/api/services.json', callback=slow)
+
+    results = list(master.tenants.fan_out(
+        lambda api: api.services.list(), [tenant_api('slow')], timeout=0.15, flatten=False))
+
+    assert isinstance(results[0].error, errors.DeadlineExceeded)
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+import responses
+
+from threescale_api import client, errors
+from threescale_api.registry import ClientRegistry
+
+
+@pytest.fixture()
+def url():
+    return 'http://master'
+
+
+@pytest.fixture()
+def master(url):
+    return client.ThreeScaleClient(url=url, token='master-token')
+
+
+def add_ready(url):
+    responses.add(responses.GET, f'{url}/admin/api/account_plans.json',
+                  json={'plans': [{'account_plan': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/accounts.json',
+                  json={'accounts': [{'account': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/services.json',
+                  json={'services': [{'service': {'id': 1}}]})
+
+
+def signup(request):
+    name = json.loads(request.body)['org_name']
+    if name == 'broken':
+        return 422, {}, json.dumps({'errors': {'org_name': ['is invalid']}})
+    body = {'signup': {'account': {'id': 1, 'admin_base_url': f'http://{name}'},
+                       'access_token': {'value': f'{name}-token'}}}
+    return 201, {}, json.dumps(body)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_create_many(master, url):
+    responses.add_callback(responses.POST, f'{url}/master/api/providers.json', callback=signup)
+    add_ready('http://one')
+
+    results = list(master.tenants.create_many(
+        [{'org_name': 'one'}, {'org_name': 'broken'}], concurrency=2, timeout=1))
+
+    assert len(results) == 2
+    by_name = {result.spec['org_name']: result for result in results}
+    assert by_name['one'].ok
+    assert by_name['one'].client.url == 'http://one'
+    assert by_name['one'].client.token == 'one-token'
+    assert not by_name['broken'].ok
+    assert isinstance(by_name['broken'].error, errors.ApiClientError)
+    assert by_name['broken'].tenant is None
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_create_many_returns_verifying_clients(master, url):
+    responses.add_callback(responses.POST, f'{url}/master/api/providers.json', callback=signup)
+    add_ready('http://one')
+    registry = ClientRegistry()
+
+    result, = master.tenants.create_many([{'org_name': 'one'}], timeout=1, registry=registry)
+    assert result.ok
+    assert result.client.rest._ssl_verify is True
+    assert result.tenant.admin_api(registry=registry) is result.client
+    # the readiness probe used a client of its own
+    assert ('http://one', 'one-token', False) in registry
+    assert ('http://one', 'one-token', True) in registry
@@ -0,0 +1,83 @@
+import pytest
+import responses
+
+from threescale_api import resources
+from threescale_api.registry import ClientRegistry
+
+
+def add_ready(url, services=({'service': {'id': 1}},), status=200):
+    responses.add(responses.GET, f'{url}/admin/api/account_plans.json',
+                  json={'plans': [{'account_plan': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/accounts.json',
+                  json={'accounts': [{'account': {'id': 1}}]})
+    responses.add(responses.GET, f'{url}/admin/api/services.json',
+                  json={'services': list(services)}, status=status)
+
+
+def tenant(api, tenant_id, url):
+    entity = {'signup': {'account': {'id': tenant_id, 'admin_base_url': url},
+                         'access_token': {'value': 'tenant-token'}}}
+    return resources.Tenant(client=api.tenants, entity=entity)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_tenant_single_page_checks(api, url):
+    add_ready(url)
+
+    assert api.wait_for_tenant(timeout=1)
+    assert len(responses.calls) == 3
+    for call in responses.calls:
+        assert 'per_page=1' in call.request.url
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_tenant_retries_until_ready(api, url):
+    responses.add(responses.GET, f'{url}/admin/api/services.json', status=503)
+    add_ready(url)
+
+    assert api.wait_for_tenant(timeout=5, max_interval=0.01)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_for_tenant_gives_up(api, url):
+    add_ready(url, services=())
+
+    assert not api.wait_for_tenant(timeout=0.1, max_interval=0.01)
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_wait_many(api, url):
+    ready_url, empty_url = 'http://ready', 'http://empty'
+    add_ready(ready_url)
+    add_ready(empty_url, services=())
+
+    result = api.tenants.wait_many(
+        [tenant(api, 1, ready_url), tenant(api, 2, empty_url)], timeout=0.1)
+    assert result == {1: True, 2: False}
+
+
+@pytest.mark.smoke
+@responses.activate
+def test_admin_api_after_ready_verifies_ssl(api):
+    tenant_url = 'http://tenant'
+    add_ready(tenant_url)
+    registry = ClientRegistry()
+    probed = tenant(api, 1, tenant_url)
+
+    assert probed.wait_tenant_ready(timeout=1, registry=registry)
+    admin = probed.admin_api(ssl_verify=True, registry=registry)
+    assert admin.rest._ssl_verify is True
+    assert probed.admin_api(registry=registry) is admin
+    assert probed.admin_api(ssl_verify=False, registry=registry).rest._ssl_verify is False
+
+
+@pytest.mark.smoke
+def test_admin_api_uses_registry_defaults(api):
+    registry = ClientRegistry(ssl_verify=False)
+    admin = tenant(api, 1, 'http://tenant').admin_api(registry=registry)
+    assert admin.rest._ssl_verify is False
+    assert tenant(api, 1, 'http://tenant').admin_api().rest._ssl_verify is True
@@ -1,2 +1,25 @@
 # flake8: noqa
-from .client import ThreeScaleClient
+"""3scale REST API client
+Submodules are imported lazily on first access to keep the import cheap
+for short-lived processes.
+"""
+import importlib
+
+__all__ = ['ThreeScaleClient']
+
+_SUBMODULES = frozenset((
+    'analytics', 'auth', 'breaker', 'cache', 'client', 'cms', 'defaults', 'errors', 'export',
+    'log_config', 'proxy_diff', 'registry', 'resources', 'scheduler', 'snapshot', 'utils'))
+
+
+def __getattr__(name):
+    if name == 'ThreeScaleClient':
+        from .client import ThreeScaleClient
+        return ThreeScaleClient
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
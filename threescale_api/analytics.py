@@ -0,0 +1,225 @@
+"""Compact columnar representation of 3scale analytics (stats) data"""
+
+import bisect
+import heapq
+from array import array
+from datetime import datetime, timedelta, timezone, tzinfo as tzinfo_type
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+GRANULARITIES = ('hour', 'day', 'month', 'year')
+
+# granularity of single bucket series covering the whole period; a week is not a
+# granularity, its bucket starting on the first day of the week is resampled as a day
+PERIOD_GRANULARITIES = {'day': 'day', 'week': 'day', 'month': 'month', 'year': 'year'}
+
+_FIXED_STEPS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+
+def parse_time(value: str) -> datetime:
+    """Parse timestamp as returned by 3scale (ISO 8601, possibly with Z suffix)"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def to_datetime(value: Union[str, datetime], tzinfo: tzinfo_type = timezone.utc) -> datetime:
+    """Parse the value if needed; naive times are considered to be in tzinfo"""
+    moment = parse_time(value) if isinstance(value, str) else value
+    return moment if moment.tzinfo else moment.replace(tzinfo=tzinfo)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate the time to the beginning of its bucket of given granularity"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'month':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'year':
+        return moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity '{granularity}'")
+
+
+def next_bucket(moment: datetime, granularity: str) -> datetime:
+    """Beginning of the bucket following the bucket starting at moment"""
+    if granularity in _FIXED_STEPS:
+        return moment + _FIXED_STEPS[granularity]
+    if granularity == 'month':
+        return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+    if granularity == 'year':
+        return moment.replace(year=moment.year + 1)
+    raise ValueError(f"Unknown granularity '{granularity}'")
+
+
+class UsageSeries:
+    """Time series of one metric of one resource
+    Timestamps (bucket starts, epoch seconds) and values are kept in `array.array`
+    columns, which is far more compact than the nested response dicts.
+    """
+    __slots__ = ('resource_type', 'resource_id', 'metric', 'granularity', 'utc_offset',
+                 'timestamps', 'values')
+
+    def __init__(self, resource_type: str, resource_id, metric: str, granularity: str,
+                 timestamps: Iterable[float] = (), values: Iterable[float] = (),
+                 utc_offset: float = 0.0):
+        """Creates instance of the series
+        Args:
+            resource_type(str): applications, services, backend_apis
+            resource_id: Resource id
+            metric(str): Metric system name
+            granularity(str): hour, day, month or year
+            timestamps: Bucket starts as epoch seconds
+            values: Values of the buckets
+            utc_offset(float): Offset of the series timezone in seconds (for bucketing)
+        """
+        self.resource_type = resource_type
+        self.resource_id = resource_id
+        self.metric = metric
+        self.granularity = granularity
+        self.utc_offset = utc_offset
+        self.timestamps = array('d', timestamps)
+        self.values = array('d', values)
+        if len(self.timestamps) != len(self.values):
+            raise ValueError("Timestamps and values differ in length")
+
+    @classmethod
+    def from_response(cls, data: dict, resource_type: str, resource_id,
+                      metric: str = None) -> 'UsageSeries':
+        """Create series from the stats usage response
+        Args:
+            data(dict): Response of the stats usage endpoint
+            resource_type(str): applications, services, backend_apis
+            resource_id: Resource id
+            metric(str): Metric system name, taken from response if missing
+        Returns(UsageSeries): Series instance
+        """
+        period = data['period']
+        granularity = period['granularity']
+        moment = parse_time(period['since'])
+        timestamps = array('d')
+        for _ in data['values']:
+            timestamps.append(moment.timestamp())
+            moment = next_bucket(moment, granularity)
+        metric = metric or data.get('metric', {}).get('system_name')
+        offset = moment.utcoffset()
+        return cls(resource_type, resource_id, metric, granularity, timestamps, data['values'],
+                   utc_offset=offset.total_seconds() if offset else 0.0)
+
+    @property
+    def key(self) -> Tuple:
+        return self.resource_id, self.metric
+
+    @property
+    def tzinfo(self) -> timezone:
+        return timezone(timedelta(seconds=self.utc_offset))
+
+    def total(self) -> float:
+        return sum(self.values)
+
+    def datetimes(self) -> List[datetime]:
+        """Returns(List[datetime]): Bucket starts as timezone aware datetimes"""
+        return [datetime.fromtimestamp(ts, self.tzinfo) for ts in self.timestamps]
+
+    def to_numpy(self):
+        """Convert to NumPy arrays (requires numpy)
+        Returns(Tuple[numpy.ndarray, numpy.ndarray]): timestamps as datetime64[s], values
+        """
+        try:
+            import numpy  # pylint: disable=import-outside-toplevel
+        except ImportError as err:
+            raise ImportError("numpy is required for UsageSeries.to_numpy()") from err
+        timestamps = numpy.frombuffer(self.timestamps, dtype=numpy.float64)
+        return timestamps.astype('datetime64[s]'), numpy.frombuffer(self.values, numpy.float64)
+
+    def resample(self, granularity: str) -> 'UsageSeries':
+        """Sum values into buckets of coarser granularity
+        Args:
+            granularity(str): Target granularity, must not be finer than current one
+        Returns(UsageSeries): New series
+        """
+        if GRANULARITIES.index(granularity) < GRANULARITIES.index(self.granularity):
+            raise ValueError(f"Cannot resample {self.granularity} to finer {granularity}")
+        buckets: Dict[float, float] = {}
+        for moment, value in zip(self.datetimes(), self.values):
+            start = bucket_start(moment, granularity).timestamp()
+            buckets[start] = buckets.get(start, 0.0) + value
+        return UsageSeries(self.resource_type, self.resource_id, self.metric, granularity,
+                           buckets.keys(), buckets.values(), utc_offset=self.utc_offset)
+
+    def end(self) -> Optional[float]:
+        """Returns(float): Start of the bucket following the last one, None if empty"""
+        if not self:
+            return None
+        last = datetime.fromtimestamp(self.timestamps[-1], self.tzinfo)
+        return next_bucket(last, self.granularity).timestamp()
+
+    def slice(self, start: float = None, end: float = None) -> 'UsageSeries':
+        """Buckets starting within [start, end) as new series (epoch seconds, None == open)"""
+        first = 0 if start is None else bisect.bisect_left(self.timestamps, start)
+        last = len(self) if end is None else bisect.bisect_left(self.timestamps, end)
+        return UsageSeries(self.resource_type, self.resource_id, self.metric, self.granularity,
+                           self.timestamps[first:last], self.values[first:last],
+                           utc_offset=self.utc_offset)
+
+    def extend(self, other: 'UsageSeries') -> int:
+        """Merge newer data in place; own buckets from the first bucket of other are replaced
+        Args:
+            other(UsageSeries): Series of the same granularity starting no later than
+                right after the end of this one
+        Returns(int): Number of buckets appended beyond the original end
+        """
+        if other.granularity != self.granularity:
+            raise ValueError("Cannot extend series by series of different granularity")
+        if not other:
+            return 0
+        cut = bisect.bisect_left(self.timestamps, other.timestamps[0])
+        if cut == len(self) and self and other.timestamps[0] > self.end():
+            raise ValueError("Cannot extend series by series leaving a gap")
+        original = len(self)
+        del self.timestamps[cut:]
+        del self.values[cut:]
+        self.timestamps.extend(other.timestamps)
+        self.values.extend(other.values)
+        return max(len(self) - original, 0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.timestamps, self.values)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UsageSeries) and self.key == other.key \
+            and self.granularity == other.granularity \
+            and self.timestamps == other.timestamps and self.values == other.values
+
+    def __repr__(self) -> str:
+        return (f"UsageSeries({self.resource_type}/{self.resource_id} {self.metric} "
+                f"{self.granularity} x{len(self)} total={self.total()})")
+
+
+def sum_series(series: Iterable[UsageSeries], metric: Optional[str] = None) -> UsageSeries:
+    """Sum multiple series bucket by bucket (e.g. usage of all applications)
+    Args:
+        series: Series of the same granularity
+        metric(str): Metric of the result, defaults to metric of the first series
+    Returns(UsageSeries): Series of sums with resource_id None
+    """
+    buckets: Dict[float, float] = {}
+    granularity = offset = None
+    for item in series:
+        if granularity not in (None, item.granularity):
+            raise ValueError("Cannot sum series of different granularity")
+        granularity, offset = item.granularity, item.utc_offset
+        metric = metric or item.metric
+        for timestamp, value in item:
+            buckets[timestamp] = buckets.get(timestamp, 0.0) + value
+    ordered = sorted(buckets.items())
+    return UsageSeries('', None, metric, granularity, [ts for ts, _ in ordered],
+                       [value for _, value in ordered], utc_offset=offset or 0.0)
+
+
+def top_n(series: Iterable[UsageSeries], n: int = 10) -> List[UsageSeries]:
+    """Returns(List[UsageSeries]): n series with the highest total, highest first"""
+    return heapq.nlargest(n, series, key=UsageSeries.total)
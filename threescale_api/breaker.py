@@ -0,0 +1,159 @@
+"""Circuit breaker failing fast requests to admin API hosts that are down"""
+
+import logging
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from threescale_api import errors
+
+log = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+class Circuit:
+    """State of one circuit"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """Circuit breaker keyed by host and optionally by endpoint
+
+    Circuit opens after `failure_threshold` consecutive failures (connection errors,
+    timeouts or one of `failure_statuses`) and then all requests fail fast with
+    `errors.CircuitOpenError`. After `recovery_timeout` seconds one probe request is let
+    through (half-open); its success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 per_endpoint: bool = False, failure_statuses: Iterable = (502, 503, 504)):
+        """Creates instance of the circuit breaker
+        Args:
+            failure_threshold(int): Consecutive failures opening the circuit
+            recovery_timeout(float): Seconds before a probe request is allowed
+            per_endpoint(bool): Whether to key circuits by endpoint, not just by host;
+                numeric path segments (ids) are ignored
+            failure_statuses: Response status codes counted as failures
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.per_endpoint = per_endpoint
+        self.failure_statuses = frozenset(failure_statuses)
+        self._circuits: Dict[str, Circuit] = {}
+        self._lock = threading.Lock()
+
+    def key(self, url: str) -> str:
+        """Circuit key for the url
+        Args:
+            url(str): Request url
+        Returns(str): host or host + endpoint
+        """
+        parts = urlsplit(url)
+        if not self.per_endpoint:
+            return parts.netloc
+        return parts.netloc + _ID_SEGMENT.sub('/:id', parts.path)
+
+    def before(self, key: str):
+        """Check whether request may proceed
+        Args:
+            key(str): Circuit key
+        Raises(errors.CircuitOpenError): when the circuit is open
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == CLOSED:
+                return
+            elapsed = time.monotonic() - circuit.opened_at
+            if circuit.state == OPEN and elapsed >= self.recovery_timeout:
+                log.info("[BREAKER] Circuit %s half-open, probing", key)
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return
+            raise errors.CircuitOpenError(key, max(self.recovery_timeout - elapsed, 0))
+
+    def record(self, key: str, status_code: int = None):
+        """Record result of the request
+        Args:
+            key(str): Circuit key
+            status_code(int): Response status code, None when no response was received
+        """
+        if status_code is None or status_code in self.failure_statuses:
+            self.record_failure(key)
+        else:
+            self.record_success(key)
+
+    def cancel(self, key: str):
+        """Request finished without a verdict about the host health (e.g. deadline)
+        Args:
+            key(str): Circuit key
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None:
+                circuit.probing = False
+
+    def record_success(self, key: str):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return
+            if circuit.state != CLOSED:
+                log.info("[BREAKER] Circuit %s closed", key)
+            del self._circuits[key]
+
+    def record_failure(self, key: str):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, Circuit())
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                if circuit.state != OPEN:
+                    log.warning("[BREAKER] Circuit %s open after %s failures", key,
+                                circuit.failures)
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+
+    def state(self, key: str) -> str:
+        """Get state of the circuit
+        Args:
+            key(str): Circuit key (see `key()`)
+        Returns(str): closed, open or half-open
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN \
+                    and time.monotonic() - circuit.opened_at >= self.recovery_timeout:
+                return HALF_OPEN
+            return circuit.state
+
+    def states(self) -> Dict[str, str]:
+        """Returns(dict): Key -> state of all circuits which are not healthy"""
+        with self._lock:
+            keys = list(self._circuits)
+        return {key: self.state(key) for key in keys}
+
+    def reset(self, key: str = None):
+        """Close the circuit or all circuits
+        Args:
+            key(str): Circuit key, None == all circuits
+        """
+        with self._lock:
+            if key is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(key, None)
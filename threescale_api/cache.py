@@ -0,0 +1,220 @@
+"""Caches of 3scale data which does not change once created"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from threescale_api.analytics import UsageSeries
+
+log = logging.getLogger(__name__)
+
+
+class AnalyticsCache:
+    """In-memory cache of closed analytics buckets
+    Buckets of past periods never change, so they are kept permanently; only the
+    open (current) bucket and buckets not seen yet are fetched again.
+    Entries are keyed by resource type, resource id, metric, granularity and
+    remaining query params (e.g. timezone); every entry keeps one contiguous run
+    of closed buckets.
+    Usage:
+        cache = AnalyticsCache()
+        api.analytics.series(app, 'applications', since='2024-01-01T00:00:00Z',
+                             granularity='day', cache=cache)
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple, UsageSeries] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(resource_type: str, resource_id, metric: str, granularity: str,
+            **params) -> Tuple:
+        """Returns(tuple): Cache key of the series with given params"""
+        return (resource_type, str(resource_id), metric, granularity,
+                tuple(sorted((name, str(value)) for name, value in params.items())))
+
+    def get(self, key: Tuple) -> Optional[UsageSeries]:
+        """Get closed buckets cached under the key
+        Args:
+            key(tuple): Cache key
+        Returns(UsageSeries): Copy of the cached series, None if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.slice()
+
+    def store(self, key: Tuple, series: UsageSeries, closed_before: float):
+        """Store closed buckets of the series
+        Buckets adjacent to or overlapping the cached run are merged into it,
+        otherwise the cached run is replaced.
+        Args:
+            key(tuple): Cache key
+            series(UsageSeries): Fetched series
+            closed_before(float): Start of the open bucket (epoch seconds)
+        """
+        closed = series.slice(end=closed_before)
+        if not closed:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.timestamps[0] <= closed.timestamps[0]:
+                if closed.timestamps[-1] <= entry.timestamps[-1]:
+                    return
+                try:
+                    entry.extend(closed)
+                    return
+                except ValueError:
+                    log.debug("[CACHE] Replacing analytics run of %s", key)
+            elif entry is not None and closed.timestamps[-1] >= entry.timestamps[0]:
+                # fetched run starts earlier and reaches into the cached one
+                closed.extend(entry.slice(start=closed.timestamps[-1] + 1))
+            self._entries[key] = closed
+
+    def invalidate(self, resource_type: str = None, resource_id=None):
+        """Drop cached entries, optionally only of the resource type / resource
+        Args:
+            resource_type(str): applications, services or backend_apis
+            resource_id: Resource id
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if resource_type not in (None, key[0]):
+                    continue
+                if resource_id is not None and str(resource_id) != key[1]:
+                    continue
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ProxyConfigCache:
+    """Permanent on-disk cache of proxy config versions
+    A version of proxy config in an environment never changes once created, so it is
+    fetched only once. Contents are stored gzipped under their SHA-256 (the same
+    content promoted to multiple environments is stored once); small reference files
+    keyed by tenant host, service, environment and version point to them.
+    Files are replaced atomically, so the directory may be shared by processes.
+    Usage:
+        cache = ProxyConfigCache('~/.cache/3scale/proxy_configs')
+        service.proxy.list().configs.version(12, env='production', cache=cache)
+    """
+
+    def __init__(self, directory: str):
+        """Creates instance of the cache
+        Args:
+            directory(str): Cache directory, created if missing
+        """
+        self.directory = os.path.expanduser(directory)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, service_id, env: str, version: int) -> Tuple:
+        """Returns(tuple): Cache key of the version
+        Args:
+            url(str): Tenant url (only the host is used)
+            service_id: Service id
+            env(str): sandbox or production
+            version(int): Proxy config version
+        """
+        return urlsplit(url).netloc or url, str(service_id), env, int(version)
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        """Get cached proxy config
+        Args:
+            key(tuple): Cache key
+        Returns(dict): Proxy config entity, None if it is not cached
+        """
+        ref_path, object_path = self._ref_path(key), None
+        try:
+            with open(ref_path, encoding='utf-8') as file:
+                ref = json.load(file)
+            object_path = self._object_path(ref['content'])
+            with gzip.open(object_path, 'rb') as file:
+                content = json.loads(file.read())
+            entity = dict(ref['entity'], content=content)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, KeyError, TypeError, zlib.error) as err:
+            # truncated or corrupted file (e.g. written by an older version or a full disk)
+            log.warning("[CACHE] Dropping unreadable proxy config %s: %s", key, err)
+            self._remove(ref_path, object_path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entity
+
+    def store(self, key: Tuple, entity: dict):
+        """Store proxy config
+        Args:
+            key(tuple): Cache key
+            entity(dict): Proxy config entity (with `content`)
+        """
+        data = json.dumps(entity.get('content'), sort_keys=True, separators=(',', ':')).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write(object_path, gzip.compress(data))
+        ref = {'entity': {name: value for name, value in entity.items() if name != 'content'},
+               'content': digest}
+        self._write(self._ref_path(key), json.dumps(ref).encode())
+        log.debug("[CACHE] Stored proxy config %s as %s", key, digest)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return os.path.exists(self._ref_path(key))
+
+    def __len__(self) -> int:
+        refs = os.path.join(self.directory, 'refs')
+        return sum(len(files) for _, _, files in os.walk(refs))
+
+    def _ref_path(self, key: Tuple) -> str:
+        host, service_id, env, version = key
+        return os.path.join(self.directory, 'refs', *(quote(part, safe='') for part in
+                                                      (host, service_id, env)),
+                            f'{version}.json')
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', digest[:2], f'{digest}.json.gz')
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f'{name}.', suffix='.tmp',
+                                         delete=False) as file:
+            try:
+                file.write(data)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, path)
+
+    @staticmethod
+    def _remove(*paths: Optional[str]):
+        for path in paths:
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
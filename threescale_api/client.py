@@ -1,18 +1,32 @@
+import contextlib
+import contextvars
 import logging
+import threading
 import time
+from functools import cached_property
+from typing import Any, Callable, Iterator, Optional, TYPE_CHECKING
 from urllib.parse import urljoin
 
-import backoff
 import requests
 
-from threescale_api import errors, resources
+from threescale_api import errors, resources, utils
+from threescale_api.defaults import BatchLoader, DefaultClient
+from threescale_api.scheduler import RequestScheduler
+
+if TYPE_CHECKING:
+    from threescale_api.breaker import CircuitBreaker
+    from threescale_api.cms import Cms
+    from threescale_api.snapshot import SnapshotReport
 
 log = logging.getLogger(__name__)
 
+# 3scale client -> (loaders, options) of the batch_loads context the caller runs in
+_batches: contextvars.ContextVar = contextvars.ContextVar('threescale_batches', default=None)
+
 
 class ThreeScaleClient:
     def __init__(self, url: str, token: str,
-                 throws: bool = True, ssl_verify: bool = True, wait: int = -1):
+                 throws: bool = True, ssl_verify: bool = True, wait: int = -1, **kwargs):
         """Creates instance of the 3scale client
         Args:
             url: 3scale instance url
@@ -21,45 +35,11 @@ class ThreeScaleClient:
             ssl_verify: Whether to verify ssl
             wait: Whether to wait for 3scale availability, negative number == no waiting
                 positive number == wait another extra seconds
+            **kwargs: Optional args passed to the RestApiClient (e.g. scheduler)
         """
-        self._rest = RestApiClient(url=url, token=token, throws=throws, ssl_verify=ssl_verify)
-        self._services = resources.Services(self, instance_klass=resources.Service)
-        self._accounts = resources.Accounts(self, instance_klass=resources.Account)
-        self._provider_accounts = \
-            resources.ProviderAccounts(self, instance_klass=resources.ProviderAccount)
-        self._provider_account_users = \
-            resources.ProviderAccountUsers(self, instance_klass=resources.ProviderAccountUser)
-        self._methods = resources.Methods(self, instance_klass=resources.Method)
-        self._metrics = resources.Metrics(self, instance_klass=resources.Metric)
-        self._analytics = resources.Analytics(self)
-        self._tenants = resources.Tenants(self, instance_klass=resources.Tenant)
-        self._providers = resources.Providers(self, instance_klass=resources.Provider)
-        self._access_tokens = \
-            resources.AccessTokens(self, instance_klass=resources.AccessToken)
-        self._active_docs = resources.ActiveDocs(self, instance_klass=resources.ActiveDoc)
-        self._application_plans = \
-            resources.ApplicationPlans(self, instance_klass=resources.ApplicationPlan)
-        self._account_plans = resources.AccountPlans(self, instance_klass=resources.AccountPlan)
-        self._settings = resources.SettingsClient(self)
-        self._admin_portal_auth_providers = resources.AdminPortalAuthProviders(
-            self, instance_klass=resources.AdminPortalAuthProvider)
-        self._dev_portal_auth_providers = resources.DevPortalAuthProviders(
-            self, instance_klass=resources.DevPortalAuthProvider)
-        self._policy_registry = resources.PoliciesRegistry(self,
-                                                           instance_klass=resources.PolicyRegistry)
-        self._backends = resources.Backends(self, instance_klass=resources.Backend)
-        self._webhooks = resources.Webhooks(self)
-        self._invoices = resources.Invoices(self, instance_klass=resources.Invoice)
-        self._fields_definitions =\
-            resources.FieldsDefinitions(self, instance_klass=resources.FieldsDefinition)
-        self._cms_files = resources.CmsFiles(self, instance_klass=resources.CmsFile)
-        self._cms_sections = resources.CmsSections(self, instance_klass=resources.CmsSection)
-        self._cms_pages = resources.CmsPages(self, instance_klass=resources.CmsPage)
-        self._cms_builtin_pages = resources.CmsBuiltinPages(self, instance_klass=resources.CmsPage)
-        self._cms_layouts = resources.CmsLayouts(self, instance_klass=resources.CmsLayout)
-        self._cms_builtin_partials =\
-            resources.CmsBuiltinPartials(self, instance_klass=resources.CmsPartial)
-        self._cms_partials = resources.CmsPartials(self, instance_klass=resources.CmsPartial)
+        self._rest = RestApiClient(url=url, token=token, throws=throws, ssl_verify=ssl_verify,
+                                   **kwargs)
+        self._loaders_lock = threading.Lock()
 
         if wait >= 0:
             self.wait_for_tenant()
@@ -68,23 +48,34 @@ class ThreeScaleClient:
             # here to mitigate the problem. This requires proper fix in checks
             time.sleep(wait)
 
-    @backoff.on_predicate(
-            backoff.constant, lambda ready: not ready, interval=6, max_tries=90, jitter=None)
-    def wait_for_tenant(self) -> bool:
+    def wait_for_tenant(self, timeout: float = 540, max_interval: float = 15) -> bool:
         """
         When True is returned, there is some chance the tenant is actually ready.
+        Readiness is polled with exponential backoff (with jitter) capped to max_interval.
+        Args:
+            timeout(float): Seconds to wait at most
+            max_interval(float): Maximal interval between polls in seconds
         """
-        # TODO: checks below were collected from various sources to craft
-        # ultimate readiness check. There might be duplicates though, so
-        # worth to review it one day
+        # backoff is needed only here and it is expensive to import
+        import backoff  # pylint: disable=import-outside-toplevel
+        wait = backoff.on_predicate(
+            backoff.expo, lambda ready: not ready, max_value=max_interval, max_time=timeout)
+        return wait(self._tenant_ready)()
+
+    def _tenant_ready(self) -> bool:
+        # All the endpoints below have to be ready; first page with single item
+        # is enough to tell, checks run concurrently
+        def check(collection) -> bool:
+            return len(collection.list(params={"page": 1, "per_page": 1}, throws=True)) >= 1
+
         try:
-            return self.account_plans.exists(throws=True) \
-                and len(self.account_plans.fetch()["plans"]) >= 1 \
-                and len(self.account_plans.list()) >= 1 \
-                and self.accounts.exists(throws=True) \
-                and len(self.accounts.list()) >= 1 \
-                and self.services.exists(throws=True) \
-                and len(self.services.list()) >= 1
+            for _, ready, error in utils.run_parallel(
+                    check, (self.account_plans, self.accounts, self.services), max_workers=3):
+                if error is not None:
+                    raise error
+                if not ready:
+                    return False
+            return True
         except errors.ApiClientError as err:
             if err.code in (404, 409, 503):
                 log.info("wait_for_tenant failed: %s", err)
@@ -94,6 +85,61 @@ class ThreeScaleClient:
             log.info("wait_for_tenant failed: %s", err)
             return False
 
+    @contextlib.contextmanager
+    def batch_loads(self, max_workers: int = 8, listing_threshold: int = 20) -> Iterator[None]:
+        """Batch lazy loads of resources read within the context
+        Resources obtained by `read()` (e.g. `Application.service`, `BackendUsage.backend`)
+        are not fetched individually; all pending reads of one collection are resolved
+        together on first access and cached until the context exits. Batching applies
+        to the calling context only (and to workers of utils.run_parallel started in it),
+        other threads using the same client are not affected.
+        Usage:
+            with client.batch_loads():
+                services = [app.service for app in account.applications.list()]
+        Args:
+            max_workers(int): Number of concurrent fetches per collection
+            listing_threshold(int): Minimal number of pending reads resolved by one listing
+        """
+        batches = _batches.get() or {}
+        if self in batches:
+            yield
+            return
+        options = dict(max_workers=max_workers, listing_threshold=listing_threshold)
+        token = _batches.set({**batches, self: ({}, options)})
+        try:
+            yield
+        finally:
+            _batches.reset(token)
+
+    def loader(self, client: DefaultClient, create: bool = True) -> Optional[BatchLoader]:
+        """Get batch loader for the client when batching is active
+        Args:
+            client(DefaultClient): Resource client
+            create(bool): Whether to create the loader if the collection has none yet
+        Returns(Optional[BatchLoader]): Loader shared by all clients of the same collection
+        """
+        batch = (_batches.get() or {}).get(self)
+        if batch is None:
+            return None
+        loaders, options = batch
+        key = (client.url, client._instance_klass)
+        with self._loaders_lock:
+            if key not in loaders:
+                if not create:
+                    return None
+                loaders[key] = BatchLoader(client, **options)
+            return loaders[key]
+
+    def deadline(self, seconds: float):
+        """Context manager limiting all requests issued within it to finish in given time
+        Usage:
+            with client.deadline(30):
+                client.services.list()
+        Args:
+            seconds(float): Time budget of the operation
+        """
+        return self._rest.deadline(seconds)
+
     @property
     def rest(self) -> 'RestApiClient':
         """Get REST api client instance
@@ -144,176 +190,220 @@ class ThreeScaleClient:
         """
         return self.url + "/master/api"
 
-    @property
+    @cached_property
     def application_plans(self) -> resources.ApplicationPlans:
         """Get applications_plan client
         Returns(resources.ApplicationPlans): ApplicationPlans client
         """
-        return self._application_plans
+        return resources.ApplicationPlans(self, instance_klass=resources.ApplicationPlan)
 
-    @property
+    @cached_property
     def services(self) -> resources.Services:
         """Gets services client
         Returns(resources.Services): Services client
         """
-        return self._services
+        return resources.Services(self, instance_klass=resources.Service)
 
-    @property
+    @cached_property
     def accounts(self) -> resources.Accounts:
         """Gets accounts client
         Returns(resources.Accounts): Accounts client
         """
-        return self._accounts
+        return resources.Accounts(self, instance_klass=resources.Account)
 
-    @property
+    @cached_property
     def provider_accounts(self) -> resources.ProviderAccounts:
         """Gets provider accounts client
         Returns(resources.ProviderAccouts): Provider Accounts client"""
-        return self._provider_accounts
+        return resources.ProviderAccounts(self, instance_klass=resources.ProviderAccount)
 
-    @property
+    @cached_property
     def provider_account_users(self) -> resources.ProviderAccountUsers:
         """Gets provider account users client
         Returns(resources.ProviderAccountUsers): Provider Accounts User client
         """
-        return self._provider_account_users
+        return resources.ProviderAccountUsers(self, instance_klass=resources.ProviderAccountUser)
 
-    @property
+    @cached_property
     def account_plans(self) -> resources.AccountPlans:
         """Gets accounts client
         Returns(resources.AccountPlans): Account plans client
         """
-        return self._account_plans
+        return resources.AccountPlans(self, instance_klass=resources.AccountPlan)
 
-    @property
+    @cached_property
     def methods(self) -> resources.Methods:
         """Gets methods client
         Returns(resources.Methods): Methods client
         """
-        return self._methods
+        return resources.Methods(self, instance_klass=resources.Method)
 
-    @property
+    @cached_property
     def metrics(self) -> resources.Metrics:
         """Gets metrics client
         Returns(resources.Metrics): Metrics client
         """
-        return self._metrics
+        return resources.Metrics(self, instance_klass=resources.Metric)
 
-    @property
+    @cached_property
     def analytics(self):
         """Gets analytics data client
         Returns(resources.Analytics): Analytics client
         """
-        return self._analytics
+        return resources.Analytics(self)
 
-    @property
+    @cached_property
     def providers(self) -> resources.Providers:
         """Gets providers client
         Returns(resources.Providers): Providers client
         """
-        return self._providers
+        return resources.Providers(self, instance_klass=resources.Provider)
 
-    @property
+    @cached_property
     def access_tokens(self) -> resources.AccessTokens:
         """Gets AccessTokens client
         Returns(resources.AccessToken): AccessTokens client
         """
-        return self._access_tokens
+        return resources.AccessTokens(self, instance_klass=resources.AccessToken)
 
-    @property
+    @cached_property
     def tenants(self) -> resources.Tenants:
         """Gets tenants client
         Returns(resources.Tenants): Tenants client
         """
-        return self._tenants
+        return resources.Tenants(self, instance_klass=resources.Tenant)
 
-    @property
+    @cached_property
     def active_docs(self) -> resources.ActiveDocs:
         """Gets active docs client
         Returns(resources.ActiveDocs): Active docs client
         """
-        return self._active_docs
+        return resources.ActiveDocs(self, instance_klass=resources.ActiveDoc)
 
-    @property
+    @cached_property
     def settings(self) -> resources.SettingsClient:
         """Gets settings client
         Returns(resources.SettingsClient): Active docs client
         """
-        return self._settings
+        return resources.SettingsClient(self)
 
-    @property
+    @cached_property
     def backends(self) -> resources.Backends:
         """Gets backends client
         Returns(resources.Backends): Backends client
         """
-        return self._backends
+        return resources.Backends(self, instance_klass=resources.Backend)
 
-    @property
+    @cached_property
     def dev_portal_auth_providers(self) -> resources.DevPortalAuthProviders:
-        return self._dev_portal_auth_providers
+        return resources.DevPortalAuthProviders(
+            self, instance_klass=resources.DevPortalAuthProvider)
 
-    @property
+    @cached_property
     def admin_portal_auth_providers(self) -> resources.AdminPortalAuthProviders:
-        return self._admin_portal_auth_providers
+        return resources.AdminPortalAuthProviders(
+            self, instance_klass=resources.AdminPortalAuthProvider)
 
-    @property
+    @cached_property
     def policy_registry(self) -> resources.PoliciesRegistry:
-        return self._policy_registry
+        return resources.PoliciesRegistry(self, instance_klass=resources.PolicyRegistry)
 
-    @property
+    @cached_property
     def webhooks(self) -> resources.Webhooks:
-        return self._webhooks
+        return resources.Webhooks(self)
 
-    @property
+    @cached_property
     def invoices(self) -> resources.Invoices:
-        return self._invoices
+        return resources.Invoices(self, instance_klass=resources.Invoice)
 
-    @property
+    @cached_property
     def fields_definitions(self) -> resources.FieldsDefinitions:
-        return self._fields_definitions
+        return resources.FieldsDefinitions(self, instance_klass=resources.FieldsDefinition)
 
-    @property
+    @cached_property
     def cms_files(self) -> resources.CmsFiles:
-        return self._cms_files
+        return resources.CmsFiles(self, instance_klass=resources.CmsFile)
 
-    @property
+    @cached_property
     def cms_sections(self) -> resources.CmsSections:
-        return self._cms_sections
+        return resources.CmsSections(self, instance_klass=resources.CmsSection)
 
-    @property
+    @cached_property
     def cms_pages(self) -> resources.CmsPages:
-        return self._cms_pages
+        return resources.CmsPages(self, instance_klass=resources.CmsPage)
 
-    @property
+    @cached_property
     def cms_builtin_pages(self) -> resources.CmsBuiltinPages:
-        return self._cms_builtin_pages
+        return resources.CmsBuiltinPages(self, instance_klass=resources.CmsPage)
 
-    @property
+    @cached_property
     def cms_layouts(self) -> resources.CmsLayouts:
-        return self._cms_layouts
+        return resources.CmsLayouts(self, instance_klass=resources.CmsLayout)
 
-    @property
+    @cached_property
     def cms_partials(self) -> resources.CmsPartials:
-        return self._cms_partials
+        return resources.CmsPartials(self, instance_klass=resources.CmsPartial)
 
-    @property
+    @cached_property
     def cms_builtin_partials(self) -> resources.CmsBuiltinPartials:
-        return self._cms_builtin_partials
+        return resources.CmsBuiltinPartials(self, instance_klass=resources.CmsPartial)
+
+    @cached_property
+    def cms(self) -> 'Cms':
+        """Gets developer portal operations spanning all CMS clients (e.g. sync)
+        Returns(Cms): Cms facade
+        """
+        from threescale_api.cms import Cms  # pylint: disable=import-outside-toplevel
+        return Cms(self)
+
+    def export(self, path: str, max_workers: int = 8, page_workers: int = 1,
+               compress: bool = False, resume: bool = True) -> 'SnapshotReport':
+        """Export configuration of the tenant (services, backends, accounts and their
+        metrics, methods, mapping rules, plans, limits, pricing rules, policies ...)
+        into JSON lines files, one per entity type
+        Usage:
+            report = client.export('backup/', max_workers=16)
+        Args:
+            path(str): Output directory
+            max_workers(int): Number of listings running concurrently
+            page_workers(int): Number of pages of one listing fetched concurrently
+            compress(bool): Whether to gzip the files
+            resume(bool): Whether to continue an interrupted export, otherwise start over
+        Returns(SnapshotReport): Report of the export
+        """
+        from threescale_api.snapshot import Snapshot  # pylint: disable=import-outside-toplevel
+        return Snapshot(self, path, max_workers=max_workers, page_workers=page_workers,
+                        compress=compress).run(resume=resume)
 
 
 class RestApiClient:
-    def __init__(self, url: str, token: str, throws: bool = True, ssl_verify: bool = True):
+    def __init__(self, url: str, token: str, throws: bool = True, ssl_verify: bool = True,
+                 scheduler: RequestScheduler = None, breaker: 'CircuitBreaker' = None,
+                 timeout=utils.DEFAULT_TIMEOUT, session: requests.Session = None):
         """Creates instance of the Rest API client
         Args:
             url(str): Tenant url
             token(str): Tenant provider token
             throws(bool): Whether to throw exception
             ssl_verify(bool): Whether to verify the ssl certificate
+            scheduler(RequestScheduler): Scheduler admitting requests by lanes,
+                None == no scheduling
+            breaker(CircuitBreaker): Circuit breaker failing fast while the host is down,
+                may be shared by multiple clients; None == no circuit breaking
+            timeout: Default (connect, read) timeout of requests in seconds,
+                None == wait forever
+            session(requests.Session): Session (connection pool) to use,
+                may be shared by clients of the same host; new one is created if None
         """
         self._url = url
         self._token = token
         self._throws = throws
         self._ssl_verify = ssl_verify
+        self._scheduler = scheduler
+        self._breaker = breaker
+        self._timeout = timeout
+        self._session = session if session is not None else utils.create_session()
+        self._stats = RequestStats()
         log.debug("[REST] New instance: %s token=%s throws=%s ssl=%s", url, token, throws,
                   ssl_verify)
 
@@ -321,8 +411,65 @@ class RestApiClient:
     def url(self) -> str:
         return self._url
 
+    @property
+    def ssl_verify(self) -> bool:
+        return self._ssl_verify
+
+    @property
+    def scheduler(self) -> Optional[RequestScheduler]:
+        return self._scheduler
+
+    @property
+    def breaker(self) -> Optional['CircuitBreaker']:
+        return self._breaker
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session
+
+    @property
+    def stats(self) -> 'RequestStats':
+        """Counters of requests sent by this client"""
+        return self._stats
+
+    @staticmethod
+    def deadline(seconds: float):
+        """Context manager limiting all requests issued within it to finish in given time
+        It applies to multi-request operations (pagination etc.) as a whole,
+        once exceeded, errors.DeadlineExceeded is raised.
+        Usage:
+            with client.rest.deadline(30):
+                client.accounts.list()
+        Args:
+            seconds(float): Time budget of the operation
+        """
+        return utils.deadline(seconds)
+
+    def lane(self, name: str, override: bool = True):
+        """Context manager running the requests issued within it in given scheduler lane
+        Usage:
+            with client.rest.lane('bulk'):
+                client.services.list()
+        Args:
+            name(str): Lane name
+            override(bool): Whether to replace lane set by an outer context
+        """
+        return RequestScheduler.lane(name, override=override)
+
+    def bulk_lane(self):
+        """Context manager running the requests issued within it in the bulk lane of the
+        scheduler, unless an outer context set the lane already
+        """
+        if not self._scheduler:
+            return contextlib.nullcontext()
+        return RequestScheduler.lane(self._scheduler.bulk_lane, override=False)
+
     def request(self, method='GET', url=None, path='', params: dict = None,
-                headers: dict = None, throws=None, **kwargs):
+                headers: dict = None, throws=None, lane: str = None, **kwargs):
         """Create new request
         Args:
             method(str): method to be used to create an request
@@ -331,6 +478,7 @@ class RestApiClient:
             params(dict): Query parameters
             headers(dict): Headers parameters
             throws(bool): Whether to throw
+            lane(str): Scheduler lane, defaults to lane of the current context
             **kwargs: Optional args added to request
 
         Returns:
@@ -347,11 +495,79 @@ class RestApiClient:
         params.update(access_token=self._token)
         log.debug("[%s] (%s) params={%s} headers={%s} %s", method, full_url, params, headers,
                   kwargs if kwargs else '')
-        response = requests.request(method=method, url=full_url, headers=headers,
-                                    params=params, verify=self._ssl_verify, **kwargs)
+        response = self._send(method, full_url, lane=lane, headers=headers, params=params,
+                              **kwargs)
         process_response = self._process_response(response, throws=throws)
         return process_response
 
+    def upload(self, method='POST', url=None, path='', fields: dict = None, files: dict = None,
+               progress: Callable[[int, int], Any] = None, chunk_size: int = 64 * 1024,
+               headers: dict = None, **kwargs):
+        """Send multipart/form-data request streaming the files from disk in chunks
+        Args:
+            method(str): method to be used to create an request
+            url(str): url to be used to create new request
+            path(str): path to be accessed - if url is not provided
+            fields(dict): Plain form fields
+            files(dict): Field name -> path, binary file object or
+                (filename, path or file object[, content type]) tuple
+            progress: Callable receiving (bytes sent, total bytes) while uploading
+            chunk_size(int): Size of chunks read from the files
+            headers(dict): Headers parameters
+            **kwargs: Optional args of the request
+
+        Returns(requests.Response): Response
+        """
+        with utils.MultipartStream(fields=fields, files=files, chunk_size=chunk_size,
+                                   progress=progress) as body:
+            log.debug("[UPLOAD] %s %s%s: %s bytes", method, url or '', path, len(body))
+            headers = {**(headers or {}), 'Content-Type': body.content_type}
+            return self.request(method, url=url, path=path, headers=headers, data=body,
+                                **kwargs)
+
+    def _send(self, method, url, lane=None, **kwargs) -> requests.Response:
+        """Send the request through circuit breaker, scheduler and deadline checks
+        Only responses and failures of the transport count for the circuit of the host,
+        local errors (deadline, unknown lane, interrupt ...) leave it as it was.
+        """
+        utils.request_timeout(None)  # fail early if the deadline already passed
+        circuit = self._breaker.key(url) if self._breaker else None
+        if circuit:
+            self._breaker.before(circuit)
+        status_code = None
+        host_failed = False
+        try:
+            with self._slot(lane):
+                timeout, shortened = utils.request_timeout(kwargs.pop('timeout', self._timeout))
+                started = time.monotonic()
+                try:
+                    response = self._session.request(method=method, url=url, timeout=timeout,
+                                                     verify=self._ssl_verify, **kwargs)
+                except requests.exceptions.RequestException as err:
+                    self._stats.record(time.monotonic() - started, ok=False)
+                    if shortened and isinstance(err, requests.exceptions.Timeout):
+                        # host is not to blame for the deadline
+                        raise errors.DeadlineExceeded(
+                            f"Operation deadline exceeded during {method} {url}") from err
+                    host_failed = True
+                    raise
+                self._stats.record(time.monotonic() - started, ok=response.ok)
+            status_code = response.status_code
+        finally:
+            if circuit and (status_code is not None or host_failed):
+                self._breaker.record(circuit, status_code)
+            elif circuit:
+                self._breaker.cancel(circuit)
+        return response
+
+    def _slot(self, lane: str = None):
+        """Scheduler slot for the request, waiting for it at most until the deadline"""
+        if not self._scheduler:
+            return contextlib.nullcontext()
+        remaining = utils.remaining_time()
+        return self._scheduler.slot(lane, timeout=None if remaining is None
+                                    else max(remaining, 0))
+
     def get(self, *args, **kwargs):
         return self.request('GET', *args, **kwargs)
 
@@ -379,3 +595,37 @@ class RestApiClient:
                 raise errors.ApiClientError(response.status_code, response.reason, response.content)
 
         return response
+
+
+class RequestStats:
+    """Counters of requests sent by the RestApiClient"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.time_total = 0.0
+        self.last_request: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, ok: bool = True):
+        """Record finished request
+        Args:
+            elapsed(float): Duration of the request in seconds
+            ok(bool): Whether the request succeeded
+        """
+        with self._lock:
+            self.requests += 1
+            self.errors += 0 if ok else 1
+            self.time_total += elapsed
+            self.last_request = time.time()
+
+    def as_dict(self) -> dict:
+        """Returns(dict): Snapshot of the counters"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'time_total': self.time_total,
+                'time_avg': self.time_total / self.requests if self.requests else 0.0,
+                'last_request': self.last_request,
+            }
@@ -0,0 +1,585 @@
+"""Developer portal (CMS) operations spanning sections, files and templates"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, \
+    Tuple, TYPE_CHECKING, Union
+
+from threescale_api import utils
+from threescale_api.resources import CmsFiles, CmsSections
+
+if TYPE_CHECKING:
+    from threescale_api.client import ThreeScaleClient
+    from threescale_api.resources import CmsFile, CmsSection, CmsTemplate, CmsTemplates
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIX = '.liquid'
+LAYOUTS_DIR = '_layouts'
+PARTIALS_DIR = '_partials'
+MANIFEST = '.cms-sync.json'
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    """Returns(str): SHA-256 hex digest of the content (str is UTF-8 encoded)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """Returns(str): SHA-256 hex digest of the file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalPortal(NamedTuple):
+    """Content of the local portal directory
+    Layout of the directory:
+        _layouts/<system_name>.html.liquid   -> layouts
+        _partials/<system_name>.html.liquid  -> partials
+        <dir>/<name>.html.liquid             -> page /<dir>/<name> (index -> /<dir>)
+        <dir>/<any other file>               -> file /<dir>/<file>
+    Every directory (except the special ones) is a section with partial path /<dir>.
+    """
+    sections: List[str]
+    files: Dict[str, str]
+    layouts: Dict[str, str]
+    partials: Dict[str, str]
+    pages: Dict[str, str]
+
+    @classmethod
+    def scan(cls, local_dir: str, exclude: Iterable[str] = ()) -> 'LocalPortal':
+        """Scan the directory
+        Args:
+            local_dir(str): Portal directory
+            exclude: Paths of files which are not part of the portal (e.g. sync manifest)
+        Returns(LocalPortal): Cms paths mapped to local file paths
+        """
+        excluded = {os.path.abspath(path) for path in exclude}
+        portal = cls([], {}, {}, {}, {})
+        for special, templates in ((LAYOUTS_DIR, portal.layouts),
+                                   (PARTIALS_DIR, portal.partials)):
+            special_dir = os.path.join(local_dir, special)
+            if os.path.isdir(special_dir):
+                for name in sorted(os.listdir(special_dir)):
+                    if name.endswith(TEMPLATE_SUFFIX):
+                        templates[_template_name(name)] = os.path.join(special_dir, name)
+        for root, dirs, names in os.walk(local_dir):
+            dirs[:] = sorted(name for name in dirs if not _ignored(name))
+            rel_dir = os.path.relpath(root, local_dir).replace(os.sep, '/')
+            cms_dir = '/' if rel_dir == '.' else '/' + rel_dir
+            if cms_dir != '/':
+                portal.sections.append(cms_dir)
+            for name in sorted(names):
+                if _ignored(name) or os.path.abspath(os.path.join(root, name)) in excluded:
+                    continue
+                if name.endswith(TEMPLATE_SUFFIX):
+                    portal.pages[_page_path(cms_dir, name)] = os.path.join(root, name)
+                else:
+                    portal.files[posixpath.join(cms_dir, name)] = os.path.join(root, name)
+        return portal
+
+
+def _ignored(name: str) -> bool:
+    return name.startswith('.') or name in (LAYOUTS_DIR, PARTIALS_DIR)
+
+
+def _template_name(name: str) -> str:
+    return name[:-len(TEMPLATE_SUFFIX)].split('.')[0]
+
+
+def _page_path(cms_dir: str, name: str) -> str:
+    stem = _template_name(name)
+    return cms_dir if stem == 'index' else posixpath.join(cms_dir, stem)
+
+
+class SyncReport:
+    """Result of Cms.sync; items are identified as '<kind>:<path or system name>'"""
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.created: List[str] = []
+        self.updated: List[str] = []
+        self.published: List[str] = []
+        self.unchanged: List[str] = []
+        self.failed: Dict[str, Exception] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def as_dict(self) -> dict:
+        """Returns(dict): Number of items by result"""
+        return {'created': len(self.created), 'updated': len(self.updated),
+                'published': len(self.published), 'unchanged': len(self.unchanged),
+                'failed': len(self.failed)}
+
+
+class _Task(NamedTuple):
+    key: str
+    action: str
+    run: Callable
+    template: Optional['CmsTemplates'] = None
+    digest: Optional[str] = None
+
+
+class Cms:
+    """Operations over the whole developer portal
+    Usage:
+        report = api.cms.sync('portal/')
+    """
+
+    def __init__(self, threescale_client: 'ThreeScaleClient'):
+        self.threescale_client = threescale_client
+        self._tree: Optional[CmsTree] = None
+
+    def sync(self, local_dir: str, max_workers: int = 8, publish: bool = True,
+             dry_run: bool = False, manifest: str = None, **page_params) -> SyncReport:
+        """Upload the local portal directory, skipping everything that did not change
+        Missing sections are created first (parents before children). The manifest
+        keeps hash and remote version (id, updated_at) of every item after its last
+        sync, items whose hash and remote version both match are skipped without
+        fetching their content. Content of the remaining templates is fetched and
+        compared with the remote draft (or published content when there is no draft).
+        Changed items are uploaded concurrently and changed templates published
+        afterwards. Nothing is deleted remotely.
+        Args:
+            local_dir(str): Portal directory, see LocalPortal for its layout
+            max_workers(int): Number of concurrent requests
+            publish(bool): Whether to publish created and updated templates
+            dry_run(bool): Only report what would be done
+            manifest(str): Path of the sync manifest, defaults to <local_dir>/.cms-sync.json;
+                it is never uploaded, even when placed inside the portal directory
+            **page_params: Attributes of newly created pages (e.g. layout_id)
+        Returns(SyncReport): What was created, updated, published or left unchanged
+        """
+        manifest = manifest or os.path.join(local_dir, MANIFEST)
+        portal = LocalPortal.scan(local_dir, exclude=[manifest, f'{manifest}.tmp'])
+        tree = self.tree(reload=True, max_workers=max_workers)
+        report = SyncReport(dry_run)
+        synced = _load_manifest(manifest)
+        sections = self._sync_sections(portal.sections, tree, report, max_workers)
+        tasks = self._template_tasks(portal, tree, sections, synced, report, page_params,
+                                     publish, max_workers)
+        tasks += self._file_tasks(portal.files, tree, sections, synced, report)
+        changed = self._run(tasks, report, max_workers)
+        published = self._publish(changed, report, max_workers) if publish else {}
+        if not dry_run:
+            for key, (task, result) in changed.items():
+                if key.startswith('file:'):
+                    synced[key[len('file:'):]] = result
+                else:
+                    synced[key] = _template_state(published.get(key, result), task.digest,
+                                                  key in published)
+            _save_manifest(manifest, synced)
+        log.info("[CMS] Sync of %s finished: %s", local_dir, report.as_dict())
+        return report
+
+    def tree(self, content: bool = False, reload: bool = False,
+             max_workers: int = 8) -> 'CmsTree':
+        """Get in-memory index of all sections, files and templates
+        Everything is loaded by concurrent listings on the first call, the index is
+        then kept up to date by writes (create, update, delete, publish) issued through
+        the CMS clients of this 3scale client.
+        Args:
+            content(bool): Whether to list content of templates as well
+            reload(bool): Whether to load everything again
+            max_workers(int): Number of concurrent listings
+        Returns(CmsTree): Index of the portal
+        """
+        if self._tree is None or reload or (content and not self._tree.content):
+            self._tree = self._load_tree(content, max_workers)
+        return self._tree
+
+    def written(self, client, resource=None, deleted_id: int = None):
+        """Apply write made through the CMS client to the loaded tree (if any)
+        Args:
+            client: CMS client which made the write
+            resource: Created or updated resource
+            deleted_id(int): Id of the deleted resource
+        """
+        tree = self._tree
+        if tree is None:
+            return
+        kind = _tree_kind(client)
+        if deleted_id is not None:
+            tree.discard(kind, deleted_id)
+        elif resource is not None:
+            tree.upsert(kind, resource)
+
+    def _load_tree(self, content: bool, max_workers: int) -> 'CmsTree':
+        client = self.threescale_client
+        listings = {
+            'sections': lambda: client.cms_sections.list(),
+            'files': lambda: client.cms_files.list(),
+            'layout': lambda: client.cms_layouts.list(content=content),
+            'partial': lambda: client.cms_partials.list(content=content),
+            'page': lambda: client.cms_pages.list(content=content),
+            'builtin_page': lambda: client.cms_builtin_pages.list(content=content),
+            'builtin_partial': lambda: client.cms_builtin_partials.list(content=content),
+        }
+        loaded = {}
+        for name, items, error in utils.run_parallel(lambda name: listings[name](), listings,
+                                                     max_workers=max_workers):
+            if error is not None:
+                raise error
+            loaded[name] = items
+        templates = [item for name in listings if name not in ('sections', 'files')
+                     for item in loaded[name]]
+        log.info("[CMS] Loaded %s sections, %s files and %s templates",
+                 len(loaded['sections']), len(loaded['files']), len(templates))
+        return CmsTree(loaded['sections'], loaded['files'], templates, content=content)
+
+    def _sync_sections(self, paths: List[str], tree: 'CmsTree', report: SyncReport,
+                       max_workers: int) -> Dict[str, int]:
+        ids = {section['partial_path']: section.entity_id
+               for section in tree.sections.values()}
+        ids['/'] = tree.root.entity_id
+        for depth in sorted({path.count('/') for path in paths}):
+            missing = [path for path in paths if path.count('/') == depth and path not in ids]
+            report.unchanged += [f'section:{path}' for path in paths
+                                 if path.count('/') == depth and path in ids]
+            if report.dry_run:
+                report.created += [f'section:{path}' for path in missing]
+                ids.update((path, None) for path in missing)
+                continue
+            for path, section, error in utils.run_parallel(
+                    lambda path: self._create_section(path, ids), missing,
+                    max_workers=max_workers):
+                if error is not None:
+                    raise error
+                ids[path] = section['id']
+                report.created.append(f'section:{path}')
+        return ids
+
+    def _create_section(self, path: str, ids: Dict[str, int]):
+        log.info("[CMS] Create section %s", path)
+        return self.threescale_client.cms_sections.create(dict(
+            title=posixpath.basename(path), public=True, partial_path=path,
+            parent_id=ids[posixpath.dirname(path)]))
+
+    def _template_tasks(self, portal: LocalPortal, tree: 'CmsTree',
+                        sections: Dict[str, int], synced: Dict[str, dict],
+                        report: SyncReport, page_params: dict, publish: bool,
+                        max_workers: int) -> List[_Task]:
+        client = self.threescale_client
+        local_templates = {}
+        kinds = (('layout', portal.layouts, client.cms_layouts, 'system_name'),
+                 ('partial', portal.partials, client.cms_partials, 'system_name'),
+                 ('page', portal.pages, client.cms_pages, 'path'))
+        for kind, local, templates, key_field in kinds:
+            existing = {item[key_field]: item for item in tree.templates.values()
+                        if item['type'] == kind}
+            for name, local_path in local.items():
+                with open(local_path, encoding='utf-8') as file:
+                    content = file.read()
+                if kind == 'page':
+                    params = _page_params(name, local_path, sections, page_params)
+                else:
+                    params = dict(system_name=name, title=name)
+                local_templates[f'{kind}:{name}'] = (templates, existing.get(name), content,
+                                                     params)
+        # content is fetched only for templates changed since their last sync
+        stale = [key for key, (_, item, content, _) in local_templates.items()
+                 if item is not None
+                 and not _template_synced(synced.get(key), item, content_hash(content), publish)]
+        for key, fetched, error in utils.run_parallel(
+                lambda key: local_templates[key][0].fetch(local_templates[key][1]['id']),
+                stale, max_workers=max_workers):
+            if error is not None:
+                raise error
+            templates, _, content, params = local_templates[key]
+            local_templates[key] = (templates, fetched, content, params)
+        tasks = []
+        for key, (templates, item, content, params) in local_templates.items():
+            task = None
+            if item is None or key in stale:
+                task = _template_task(key, templates, item, content, params)
+            if task is not None:
+                tasks.append(task)
+                continue
+            report.unchanged.append(key)
+            if key in stale and not report.dry_run:
+                synced[key] = _template_state(item, content_hash(content),
+                                              item.get('published') == content)
+        return tasks
+
+    def _file_tasks(self, files: Dict[str, str], tree: 'CmsTree', sections: Dict[str, int],
+                    uploaded: Dict[str, dict], report: SyncReport) -> List[_Task]:
+        cms_files = self.threescale_client.cms_files
+        existing = {item['path']: item for item in tree.files.values()}
+        tasks = []
+        for path, local_path in files.items():
+            digest = file_hash(local_path)
+            item = existing.get(path)
+            known = uploaded.get(path)
+            if item is not None and known == _file_state(item, digest):
+                report.unchanged.append(f'file:{path}')
+                continue
+            section_id = sections[posixpath.dirname(path)]
+
+            def upload(path=path, local_path=local_path, section_id=section_id, item=item,
+                       digest=digest):
+                result = cms_files.upload(path, local_path, section_id=section_id,
+                                          entity_id=None if item is None else item['id'])
+                return _file_state(result, digest)
+            tasks.append(_Task(f'file:{path}', 'created' if item is None else 'updated', upload))
+        return tasks
+
+    @staticmethod
+    def _run(tasks: List[_Task], report: SyncReport, max_workers: int) -> Dict[str, tuple]:
+        """Run upload tasks, returns key -> (task, result) of the successful ones"""
+        if report.dry_run:
+            for task in tasks:
+                if task.action != 'published':
+                    getattr(report, task.action).append(task.key)
+            return {task.key: (task, None) for task in tasks}
+        results = {}
+        for task, result, error in utils.run_parallel(lambda task: task.run(), tasks,
+                                                      max_workers=max_workers):
+            if error is not None:
+                log.warning("[CMS] Sync of %s failed: %s", task.key, error)
+                report.failed[task.key] = error
+                continue
+            if task.action != 'published':
+                getattr(report, task.action).append(task.key)
+            results[task.key] = (task, result)
+        return results
+
+    @staticmethod
+    def _publish(changed: Dict[str, tuple], report: SyncReport,
+                 max_workers: int) -> Dict[str, 'CmsTemplate']:
+        """Publish changed templates, returns key -> published template"""
+        templates = {key: value for key, value in changed.items()
+                     if value[0].template is not None}
+        if report.dry_run:
+            report.published += list(templates)
+            return {}
+
+        def publish(key):
+            task, template = templates[key]
+            return task.template.publish(template['id'])
+
+        published = {}
+        for key, template, error in utils.run_parallel(publish, templates,
+                                                       max_workers=max_workers):
+            if error is not None:
+                log.warning("[CMS] Publishing of %s failed: %s", key, error)
+                report.failed[key] = error
+            else:
+                report.published.append(key)
+                published[key] = template
+        return published
+
+
+class CmsTree:
+    """In-memory index of developer portal sections, files and templates
+    Sections are indexed by partial path, files and pages by path, all items by id
+    and by the section they belong to.
+    Usage:
+        tree = api.cms.tree()
+        tree.lookup('/docs/guide')
+        for section, subsections, files, templates in tree.walk('/docs'):
+            ...
+    """
+    KINDS = ('sections', 'files', 'templates')
+
+    def __init__(self, sections: Iterable = (), files: Iterable = (), templates: Iterable = (),
+                 content: bool = False):
+        """Creates instance of the tree
+        Args:
+            sections: Section resources
+            files: File resources
+            templates: Template resources
+            content(bool): Whether templates were loaded with content
+        """
+        self.content = content
+        self.sections: Dict[int, 'CmsSection'] = {}
+        self.files: Dict[int, 'CmsFile'] = {}
+        self.templates: Dict[int, 'CmsTemplate'] = {}
+        self._paths: Dict[str, Dict[str, int]] = {kind: {} for kind in self.KINDS}
+        self._children: Dict[Optional[int], Dict[str, Set[int]]] = {}
+        self._lock = threading.RLock()
+        for kind, items in zip(self.KINDS, (sections, files, templates)):
+            for item in items:
+                self.upsert(kind, item)
+
+    @property
+    def root(self) -> 'CmsSection':
+        """Returns(CmsSection): Root section"""
+        return next(section for section in self.sections.values()
+                    if section['parent_id'] is None)
+
+    def section(self, selector: Union[str, int]) -> Optional['CmsSection']:
+        """Get section by its partial path or id"""
+        if isinstance(selector, str):
+            selector = self._paths['sections'].get(selector)
+        return self.sections.get(selector)
+
+    def file(self, path: str) -> Optional['CmsFile']:
+        return self.files.get(self._paths['files'].get(path))
+
+    def page(self, path: str) -> Optional['CmsTemplate']:
+        return self.templates.get(self._paths['templates'].get(path))
+
+    def lookup(self, path: str):
+        """Get page, file or section (in this order) with the path
+        Returns: Resource or None
+        """
+        return self.page(path) or self.file(path) or self.section(path)
+
+    def children(self, section: Union['CmsSection', str, int]) -> List['CmsSection']:
+        """Returns(List[CmsSection]): Direct subsections ordered by path"""
+        return sorted(self._members(section, 'sections'), key=lambda item: item['partial_path'])
+
+    def contents(self, section: Union['CmsSection', str, int]) -> Tuple[list, list]:
+        """Returns(Tuple[list, list]): Files and templates in the section"""
+        return self._members(section, 'files'), self._members(section, 'templates')
+
+    def walk(self, section: Union['CmsSection', str, int] = None) -> Iterator[tuple]:
+        """Walk the subtree depth first (like os.walk)
+        Args:
+            section: Top section (resource, partial path or id), root if missing
+        Returns(Iterator): (section, subsections, files, templates) tuples
+        """
+        stack = [self.root if section is None else self._resolve(section)]
+        while stack:
+            current = stack.pop()
+            subsections = self.children(current)
+            files, templates = self.contents(current)
+            yield current, subsections, files, templates
+            stack.extend(reversed(subsections))
+
+    def upsert(self, kind: str, item):
+        """Add or replace the item in the index
+        Args:
+            kind(str): sections, files or templates
+            item: Resource
+        """
+        with self._lock:
+            self.discard(kind, item.entity_id)
+            getattr(self, kind)[item.entity_id] = item
+            path = _tree_path(kind, item)
+            if path:
+                self._paths[kind][path] = item.entity_id
+            self._children.setdefault(_tree_parent(kind, item), {
+                name: set() for name in self.KINDS})[kind].add(item.entity_id)
+
+    def discard(self, kind: str, entity_id: int):
+        """Remove the item from the index
+        Args:
+            kind(str): sections, files or templates
+            entity_id(int): Id of the item
+        """
+        with self._lock:
+            item = getattr(self, kind).pop(entity_id, None)
+            if item is None:
+                return
+            path = _tree_path(kind, item)
+            if path and self._paths[kind].get(path) == entity_id:
+                del self._paths[kind][path]
+            members = self._children.get(_tree_parent(kind, item))
+            if members:
+                members[kind].discard(entity_id)
+
+    def __len__(self) -> int:
+        return len(self.sections) + len(self.files) + len(self.templates)
+
+    def _resolve(self, section) -> 'CmsSection':
+        if not isinstance(section, (str, int)):
+            return section
+        found = self.section(section)
+        if found is None:
+            raise KeyError(f"Unknown CMS section {section}")
+        return found
+
+    def _members(self, section, kind: str) -> list:
+        section_id = self._resolve(section).entity_id
+        with self._lock:
+            ids = list(self._children.get(section_id, {}).get(kind, ()))
+        items = getattr(self, kind)
+        return [items[entity_id] for entity_id in ids if entity_id in items]
+
+
+def _tree_kind(client) -> str:
+    if isinstance(client, CmsSections):
+        return 'sections'
+    if isinstance(client, CmsFiles):
+        return 'files'
+    return 'templates'
+
+
+def _tree_path(kind: str, item) -> Optional[str]:
+    if kind == 'sections':
+        return item['partial_path']
+    return item['path']
+
+
+def _tree_parent(kind: str, item) -> Optional[int]:
+    return item['parent_id'] if kind == 'sections' else item['section_id']
+
+
+def _template_task(key: str, templates: 'CmsTemplates', existing: Optional[dict],
+                   content: str, params: dict) -> Optional[_Task]:
+    digest = content_hash(content)
+    if existing is None:
+        return _Task(key, 'created', lambda: templates.create(dict(params, draft=content)),
+                     templates, digest)
+    current = existing['draft'] if existing.get('draft') is not None \
+        else existing.get('published')
+    if current != content:
+        return _Task(key, 'updated',
+                     lambda: templates.update(existing['id'], params=dict(draft=content)),
+                     templates, digest)
+    if existing.get('published') != content:
+        # draft is up to date, it only needs publishing
+        return _Task(key, 'published', lambda: existing, templates, digest)
+    return None
+
+
+def _page_params(path: str, local_path: str, sections: Dict[str, int],
+                 page_params: dict) -> dict:
+    # index page belongs to the section of its directory
+    index = _template_name(os.path.basename(local_path)) == 'index'
+    section = path if index else posixpath.dirname(path)
+    return dict(page_params, path=path, title=posixpath.basename(path) or 'index',
+                section_id=sections[section],
+                system_name=path.strip('/').replace('/', '_') or 'index')
+
+
+def _file_state(item, digest: str) -> dict:
+    return {'id': item['id'], 'updated_at': item.get('updated_at'), 'sha256': digest}
+
+
+def _template_state(item, digest: str, published: bool) -> dict:
+    return dict(_file_state(item, digest), published=published)
+
+
+def _template_synced(known: Optional[dict], item, digest: str, publish: bool) -> bool:
+    """Whether the template did not change locally nor remotely since its last sync"""
+    if known is None or (publish and not known.get('published')):
+        return False
+    return known == _template_state(item, digest, known.get('published'))
+
+
+def _load_manifest(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(path: str, uploaded: Dict[str, dict]):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(uploaded, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -1,5 +1,7 @@
+import copy
 import logging
-from typing import Dict, List, Optional, TYPE_CHECKING, Union, Any, Iterator
+import threading
+from typing import Dict, List, Optional, TYPE_CHECKING, Tuple, Union, Any, Iterator
 
 import collections.abc
 
@@ -76,6 +78,7 @@ class DefaultClient(collections.abc.Mapping):
         url = self._entity_url()
         response = self.rest.post(url=url, json=params, **kwargs)
         instance = self._create_instance(response=response)
+        self._evict(getattr(instance, 'entity_id', None))
         return instance
 
     def delete(self, entity_id: int = None, **kwargs) -> bool:
@@ -89,6 +92,7 @@ class DefaultClient(collections.abc.Mapping):
         log.info(self._log_message("[DELETE] Delete ", entity_id=entity_id, args=kwargs))
         url = self._entity_url(entity_id=entity_id)
         response = self.rest.delete(url=url, **kwargs)
+        self._evict(entity_id)
         return response.ok
 
     def exists(self, entity_id=None, throws=False, **kwargs) -> bool:
@@ -117,6 +121,7 @@ class DefaultClient(collections.abc.Mapping):
                                    entity_id=entity_id, args=kwargs))
         url = self._entity_url(entity_id=entity_id)
         response = self.rest.put(url=url, json=params, **kwargs)
+        self._evict(entity_id)
         instance = self._create_instance(response=response)
         return instance
 
@@ -156,8 +161,28 @@ class DefaultClient(collections.abc.Mapping):
         Returns(DefaultResource): Default resource
         """
         log.debug(self._log_message("[READ] Read ", entity_id=entity_id))
+        loader = self.threescale_client.loader(self) if entity_id is not None else None
+        if loader is not None:
+            return loader.load(entity_id)
         return self._instance_klass(client=self, entity_id=entity_id)
 
+    def from_entity(self, entity: dict) -> 'DefaultResource':
+        """Create resource of the entity without fetching anything
+        Useful to reach subresources of known ids, e.g. stored by an export.
+        Args:
+            entity(dict): Entity, at least its id
+        Returns(DefaultResource): Resource instance
+        """
+        return self._instance_klass(client=self, entity=entity)
+
+    def _evict(self, entity_id):
+        """Drop the entity from the batch loader so later reads see the change"""
+        if entity_id is None:
+            return
+        loader = self.threescale_client.loader(self, create=False)
+        if loader is not None:
+            loader.evict(entity_id)
+
     def read_by_name(self, name: str, **kwargs) -> 'DefaultResource':
         """Read resource by name
         Args:
@@ -273,6 +298,7 @@ class DefaultResource(collections.abc.MutableMapping):
         self._entity = entity
         self._client = client
         self._entity_name = entity_name
+        self._loader = None
 
     @property
     def threescale_client(self) -> 'ThreeScaleClient':
@@ -346,6 +372,8 @@ class DefaultResource(collections.abc.MutableMapping):
         self.entity[item] = value
 
     def _lazy_load(self, **kwargs) -> 'DefaultResource':
+        if self._entity is None and self._loader is not None and not kwargs:
+            self._entity = self._loader.get(self.entity_id)
         if self._entity is None:
             # Lazy load the entity
             fetched = self.fetch(**kwargs)
@@ -384,6 +412,130 @@ class DefaultResource(collections.abc.MutableMapping):
 
     def _invalidate(self):
         self._entity = None
+        self._loader = None
+
+
+class BatchLoader:
+    """Batches lazy loads of resources of one client (DataLoader pattern)
+
+    Resources read through the loader are not fetched one by one. Their ids are
+    collected and the first access to any of them resolves all the pending ids
+    together, either by one collection listing (when there is at least
+    `listing_threshold` of them) or by concurrent fetches of distinct ids.
+    Resolved entities are cached for the lifetime of the loader, so repeated
+    reads of the same id cost nothing; create, update and delete through the client
+    evict the entity. Requests are sent without holding the lock, readers of ids
+    being resolved by another thread wait for that resolution.
+    """
+    def __init__(self, client: DefaultClient, max_workers: int = 8,
+                 listing_threshold: int = 20):
+        """Creates instance of the batch loader
+        Args:
+            client(DefaultClient): Client used to list/fetch the entities
+            max_workers(int): Number of concurrent fetches
+            listing_threshold(int): Minimal number of pending ids to use one listing
+                instead of individual fetches; None disables listing
+        """
+        self._client = client
+        self._max_workers = max_workers
+        self._listing_threshold = listing_threshold
+        self._pending: Dict = {}
+        self._cache: Dict = {}
+        self._errors: Dict = {}
+        # id -> event set when the resolution running in another thread is done
+        self._resolving: Dict = {}
+        self._stale: set = set()
+        self._lock = threading.RLock()
+
+    def load(self, entity_id) -> 'DefaultResource':
+        """Register entity for batched load
+        Args:
+            entity_id: Entity id
+        Returns(DefaultResource): Resource which is resolved on first access
+        """
+        with self._lock:
+            if entity_id not in self._cache and entity_id not in self._resolving:
+                self._pending[entity_id] = None
+        resource = self._client._instance_klass(client=self._client, entity_id=entity_id)
+        resource._loader = self
+        return resource
+
+    def get(self, entity_id) -> dict:
+        """Get the entity dictionary, resolves all pending loads if needed
+        Args:
+            entity_id: Entity id
+        Returns(dict): Copy of the entity dictionary
+        """
+        while True:
+            with self._lock:
+                if entity_id in self._cache:
+                    return copy.deepcopy(self._cache[entity_id])
+                if entity_id in self._errors:
+                    raise self._errors.pop(entity_id)
+                done = self._resolving.get(entity_id)
+                if done is None:
+                    self._pending[entity_id] = None
+                    entity_ids = list(self._pending)
+                    self._pending.clear()
+                    done = threading.Event()
+                    self._resolving.update(dict.fromkeys(entity_ids, done))
+                    resolve = True
+                else:
+                    resolve = False
+            if resolve:
+                self._resolve(entity_ids, done)
+            else:
+                done.wait()
+
+    def evict(self, entity_id):
+        """Forget the entity, next access fetches it again
+        Args:
+            entity_id: Entity id
+        """
+        with self._lock:
+            self._cache.pop(entity_id, None)
+            self._errors.pop(entity_id, None)
+            if entity_id in self._resolving:
+                self._stale.add(entity_id)
+
+    def clear(self):
+        """Forget all cached entities"""
+        with self._lock:
+            self._cache.clear()
+            self._errors.clear()
+            self._stale.update(self._resolving)
+
+    def _resolve(self, entity_ids: list, done: threading.Event):
+        """Fetch the entities without holding the lock and publish them"""
+        log.debug("[BATCH] Resolve %s %s entities", len(entity_ids),
+                  self._client._instance_klass.__name__)
+        entities, errors = {}, {}
+        try:
+            if self._listing_threshold is not None \
+                    and len(entity_ids) >= self._listing_threshold:
+                wanted = set(entity_ids)
+                for item in self._client.list():
+                    if item.entity_id in wanted:
+                        entities[item.entity_id] = item.entity
+            missing = [entity_id for entity_id in entity_ids if entity_id not in entities]
+            for entity_id, entity, error in utils.run_parallel(
+                    self._client.fetch, missing, max_workers=self._max_workers):
+                if error is not None:
+                    errors[entity_id] = error
+                else:
+                    entities[entity_id] = entity
+        finally:
+            with self._lock:
+                for entity_id in entity_ids:
+                    self._resolving.pop(entity_id, None)
+                    if entity_id in self._stale:
+                        # changed while being fetched, next access fetches it again
+                        self._stale.discard(entity_id)
+                    elif entity_id in entities:
+                        self._cache[entity_id] = entities[entity_id]
+                    elif entity_id in errors:
+                        self._errors[entity_id] = errors[entity_id]
+            done.set()
 
 
 class DefaultPaginationClient(DefaultClient):
@@ -397,7 +549,7 @@ class DefaultPaginationClient(DefaultClient):
         - backend metric 500
         - backend 500
         - service 500
-        invoice list by account 20 - not implemented by standard "list" method
+        - invoice list by account 20 - not implemented by standard "list" method
         - invoice list 20
         - all cms 100
     """
@@ -411,22 +563,48 @@ class DefaultPaginationClient(DefaultClient):
         kwargs.setdefault("params", {})
         if "page" in kwargs["params"] or self.per_page is None:
             return super()._list(**kwargs)
-        pagenum = 1
-
-        kwargs["params"]["page"] = pagenum
-        kwargs["params"]["per_page"] = self.per_page
-
-        page = super()._list(**kwargs)
-        ret_list = page
-
-        while len(page):
-            pagenum += 1
-            kwargs["params"]["page"] = pagenum
-            page = super()._list(**kwargs)
+        ret_list = []
+        for _, page in self.pages(**kwargs):
             ret_list += page
-
         return ret_list
 
+    def pages(self, url: str = None, start: int = 1, max_workers: int = 1,
+              **kwargs) -> Iterator[Tuple[int, List['DefaultResource']]]:
+        """Iterate over pages of the listing until the first empty one
+        Args:
+            url(str): Listing url, defaults to url of the collection
+            start(int): Number of the first page
+            max_workers(int): Number of pages fetched concurrently
+            **kwargs: Optional args of the request
+        Returns(Iterator): (page number, resources) tuples in order of pages
+        """
+        url = url or self._entity_url()
+        params = kwargs.pop('params', None) or {}
+
+        def fetch(pagenum):
+            page_params = dict(params, page=pagenum, per_page=self.per_page)
+            # pagination is bulk work unless caller decided otherwise
+            with self.rest.bulk_lane():
+                response = self.rest.get(url=url, params=page_params, **kwargs)
+            return self._create_instance(response=response, collection=True)
+
+        pagenum = start
+        while True:
+            numbers = range(pagenum, pagenum + max_workers)
+            if max_workers == 1:
+                fetched = {pagenum: (fetch(pagenum), None)}
+            else:
+                fetched = {number: (page, error) for number, page, error
+                           in utils.run_parallel(fetch, numbers, max_workers=max_workers)}
+            for number in numbers:
+                page, error = fetched[number]
+                if error is not None:
+                    raise error
+                if not page:
+                    return
+                yield number, page
+            pagenum += max_workers
+
     def __iter__(self):
         return self._list()
 
@@ -14,3 +14,20 @@ class ApiClientError(ThreeScaleApiError):
         if message:
             msg += f"; {message}"
         super().__init__(msg)
+
+
+class CircuitOpenError(ThreeScaleApiError):
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Circuit for {key} is open, retry after {retry_after:.1f}s")
+
+
+class DeadlineExceeded(ThreeScaleApiError):
+    def __init__(self, message: str = "Operation deadline exceeded"):
+        super().__init__(message)
+
+
+class WaitTimeout(ThreeScaleApiError):
+    def __init__(self, message: str = "Condition not met in time"):
+        super().__init__(message)
@@ -0,0 +1,154 @@
+"""Streaming export of 3scale entities to JSON lines / CSV files with resumable checkpoints"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+FORMATS = ('jsonl', 'csv')
+
+
+def detect_format(path: str) -> tuple:
+    """Guess format and compression from the file name (e.g. invoices.csv.gz)
+    Returns(tuple): (format, compress)
+    """
+    name = os.fspath(path)
+    compress = name.endswith('.gz')
+    if compress:
+        name = name[:-3]
+    return ('csv' if name.endswith('.csv') else 'jsonl'), compress
+
+
+class RecordWriter:
+    """Writes records (dicts) one by one as JSON lines or CSV rows, optionally gzipped
+    Written data is made durable by `commit`, which returns offset the file can be
+    truncated to when the export is resumed; gzip members are finished on every
+    commit, so truncated file stays a valid (multi-member) gzip file.
+    """
+
+    def __init__(self, path: str, fmt: str = None, compress: bool = None,
+                 fieldnames: List[str] = None, offset: int = None):
+        """Creates instance of the writer
+        Args:
+            path(str): Output file path
+            fmt(str): jsonl or csv, detected from path if missing
+            compress(bool): Whether to gzip the output, detected from path if missing
+            fieldnames(List[str]): CSV columns, taken from the first record if missing
+            offset(int): Resume writing at the committed offset instead of truncating the file
+        """
+        detected_fmt, detected_compress = detect_format(path)
+        self.fmt = fmt or detected_fmt
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{self.fmt}'")
+        self.compress = detected_compress if compress is None else compress
+        self.fieldnames = fieldnames
+        self.count = 0
+        resume = bool(offset) and os.path.exists(path)
+        if resume:
+            self._raw = open(path, 'r+b')  # pylint: disable=consider-using-with
+            self._raw.truncate(offset)
+            self._raw.seek(offset)
+        else:
+            self._raw = open(path, 'wb')  # pylint: disable=consider-using-with
+        self._header = not resume
+        self._stream = None
+        self._text = None
+        self._csv = None
+
+    def write(self, record: dict):
+        """Write one record"""
+        if self._text is None:
+            self._open()
+        if self.fmt == 'jsonl':
+            self._text.write(json.dumps(record, default=str))
+            self._text.write('\n')
+        else:
+            self._write_row(record)
+        self.count += 1
+
+    def write_many(self, records: Iterable[dict]):
+        for record in records:
+            self.write(record)
+
+    def commit(self) -> int:
+        """Flush written records to the disk
+        Returns(int): Offset of the committed data
+        """
+        if self._text is not None:
+            self._text.flush()
+            self._text.detach()
+            if self.compress:
+                self._stream.close()
+            self._text = self._stream = self._csv = None
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        return self._raw.tell()
+
+    def close(self):
+        self.commit()
+        self._raw.close()
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb') if self.compress else self._raw
+        self._text = io.TextIOWrapper(self._stream, encoding='utf-8', newline='')
+
+    def _write_row(self, record: dict):
+        if self.fieldnames is None:
+            self.fieldnames = list(record)
+        if self._csv is None:
+            self._csv = csv.DictWriter(self._text, fieldnames=self.fieldnames,
+                                       extrasaction='ignore')
+        if self._header:
+            self._csv.writeheader()
+            self._header = False
+        self._csv.writerow({name: _cell(value) for name, value in record.items()})
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+class Checkpoint:
+    """Progress of an export persisted in a JSON file
+    The file is replaced atomically, so it always holds the last saved state.
+    """
+
+    def __init__(self, path: str):
+        """Creates instance of the checkpoint
+        Args:
+            path(str): Checkpoint file path
+        """
+        self.path = path
+
+    def load(self) -> Optional[dict]:
+        """Returns(dict): Saved state, None if there is none"""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: dict):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
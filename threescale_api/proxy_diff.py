@@ -0,0 +1,223 @@
+"""Structural diff of proxy config versions (policy chain, mapping rules, backend routes)"""
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+SECTIONS = ('policies', 'mapping_rules', 'backend_routes')
+
+# fields differing between versions without any change of behavior
+IGNORED_FIELDS = frozenset(('created_at', 'updated_at', 'links', 'lock_version'))
+# ids of compared items (nested ids, e.g. of backend, are compared)
+IGNORED_IDS = frozenset(('id', 'proxy_id', 'service_id'))
+
+_LISTS = {'policies': 'policy_chain', 'mapping_rules': 'proxy_rules',
+          'backend_routes': 'backend_api_configs'}
+
+
+class Change(NamedTuple):
+    """Added, removed or changed item of a section"""
+    key: tuple
+    old: Optional[dict] = None
+    new: Optional[dict] = None
+    fields: Dict[str, Tuple[Any, Any]] = {}
+
+
+class SectionDiff(NamedTuple):
+    """Differences of one section; items are matched by key, not by position"""
+    added: List[Change]
+    removed: List[Change]
+    changed: List[Change]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def counts(self) -> Dict[str, int]:
+        return {'added': len(self.added), 'removed': len(self.removed),
+                'changed': len(self.changed)}
+
+
+class ConfigDiff:
+    """Differences between two proxy configs
+    Sections:
+        policies: policy chain items keyed by (name, n-th occurrence of the name)
+        mapping_rules: rules keyed by (owner type, owner id, HTTP method, pattern)
+        backend_routes: backend usages keyed by path
+        settings: other proxy fields as dotted path -> (old, new)
+    In summary mode only keys of changed items are collected, not the changed fields.
+    """
+
+    def __init__(self, old_version=None, new_version=None, policies: SectionDiff = None,
+                 policy_order_changed: bool = False, mapping_rules: SectionDiff = None,
+                 backend_routes: SectionDiff = None,
+                 settings: Dict[str, Tuple[Any, Any]] = None):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.policies = policies or SectionDiff([], [], [])
+        self.policy_order_changed = policy_order_changed
+        self.mapping_rules = mapping_rules or SectionDiff([], [], [])
+        self.backend_routes = backend_routes or SectionDiff([], [], [])
+        self.settings = settings or {}
+
+    def __bool__(self) -> bool:
+        return bool(self.policies or self.policy_order_changed or self.mapping_rules
+                    or self.backend_routes or self.settings)
+
+    def summary(self) -> dict:
+        """Returns(dict): Numbers of differences per section"""
+        return {
+            'old_version': self.old_version,
+            'new_version': self.new_version,
+            'changed': bool(self),
+            **{name: getattr(self, name).counts() for name in SECTIONS},
+            'policy_order_changed': self.policy_order_changed,
+            'settings': len(self.settings),
+        }
+
+    def lines(self) -> List[str]:
+        """Returns(List[str]): Human readable differences, one per line"""
+        lines = []
+        for name in SECTIONS:
+            section = getattr(self, name)
+            lines += [f'+ {name} {_key_str(change.key)}' for change in section.added]
+            lines += [f'- {name} {_key_str(change.key)}' for change in section.removed]
+            for change in section.changed:
+                lines.append(f'~ {name} {_key_str(change.key)}')
+                lines += [f'    {path}: {old!r} -> {new!r}'
+                          for path, (old, new) in change.fields.items()]
+            if name == 'policies' and self.policy_order_changed:
+                lines.append('~ policies order')
+        lines += [f'~ settings {path}: {old!r} -> {new!r}'
+                  for path, (old, new) in self.settings.items()]
+        return lines
+
+    def __str__(self) -> str:
+        return '\n'.join(self.lines())
+
+    def __repr__(self) -> str:
+        counts = ' '.join(f'{name}={sum(getattr(self, name).counts().values())}'
+                          for name in SECTIONS)
+        return (f"ConfigDiff({self.old_version} -> {self.new_version} {counts} "
+                f"settings={len(self.settings)})")
+
+
+def proxy_of(config) -> dict:
+    """Get proxy part of the config
+    Args:
+        config: ProxyConfig resource, its entity or its content
+    Returns(dict): Proxy settings with policy chain, rules and backend usages
+    """
+    entity = getattr(config, 'entity', config)
+    content = entity.get('content', entity)
+    return content.get('proxy', content)
+
+
+def diff(old, new, summary: bool = False) -> ConfigDiff:
+    """Compute structural diff of two proxy configs
+    Sections equal as a whole are not inspected item by item, items are matched
+    by key in linear time.
+    Args:
+        old: Old ProxyConfig (resource, entity or content)
+        new: New ProxyConfig (resource, entity or content)
+        summary(bool): Whether to skip field level differences of changed items
+    Returns(ConfigDiff): Differences
+    """
+    old_proxy, new_proxy = proxy_of(old), proxy_of(new)
+    result = ConfigDiff(_version(old), _version(new))
+    if old_proxy == new_proxy:
+        return result
+    for name, list_name in _LISTS.items():
+        old_items, new_items = old_proxy.get(list_name) or [], new_proxy.get(list_name) or []
+        if old_items != new_items:
+            setattr(result, name, _diff_items(old_items, new_items, _KEYS[name], summary))
+    old_names = [item.get('name') for item in old_proxy.get('policy_chain') or []]
+    new_names = [item.get('name') for item in new_proxy.get('policy_chain') or []]
+    common = set(old_names) & set(new_names)
+    result.policy_order_changed = \
+        [name for name in old_names if name in common] != \
+        [name for name in new_names if name in common]
+    result.settings = _changed_fields(
+        {name: value for name, value in old_proxy.items() if name not in _LISTS.values()},
+        {name: value for name, value in new_proxy.items() if name not in _LISTS.values()})
+    return result
+
+
+def _diff_items(old_items: List[dict], new_items: List[dict], key: Callable[[Iterable], list],
+                summary: bool) -> SectionDiff:
+    old_by_key = dict(zip(key(old_items), old_items))
+    new_by_key = dict(zip(key(new_items), new_items))
+    section = SectionDiff([], [], [])
+    for item_key, item in new_by_key.items():
+        old_item = old_by_key.get(item_key)
+        if old_item is None:
+            section.added.append(Change(item_key, new=item))
+        elif old_item != item:
+            if summary:
+                if _significant(old_item) != _significant(item):
+                    section.changed.append(Change(item_key, old_item, item))
+                continue
+            fields = _changed_fields(old_item, item)
+            if fields:
+                section.changed.append(Change(item_key, old_item, item, fields))
+    section.removed.extend(Change(item_key, old=item) for item_key, item in old_by_key.items()
+                           if item_key not in new_by_key)
+    return section
+
+
+def _changed_fields(old: dict, new: dict, prefix: str = '') -> Dict[str, Tuple[Any, Any]]:
+    """Returns(dict): Dotted path -> (old, new) of differing leaf values"""
+    changes = {}
+    for name in sorted(set(old) | set(new), key=str):
+        if name in IGNORED_FIELDS or (not prefix and name in IGNORED_IDS):
+            continue
+        old_value, new_value = old.get(name), new.get(name)
+        if old_value == new_value:
+            continue
+        path = f'{prefix}{name}'
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changes.update(_changed_fields(old_value, new_value, f'{path}.'))
+        else:
+            changes[path] = (old_value, new_value)
+    return changes
+
+
+def _significant(item: dict) -> dict:
+    return {name: value for name, value in item.items()
+            if name not in IGNORED_FIELDS and name not in IGNORED_IDS}
+
+
+def _policy_keys(items: Iterable[dict]) -> list:
+    seen: Dict[str, int] = {}
+    keys = []
+    for item in items:
+        name = item.get('name')
+        seen[name] = seen.get(name, 0) + 1
+        keys.append((name, seen[name]))
+    return keys
+
+
+def _rule_keys(items: Iterable[dict]) -> list:
+    # rules may share method and pattern (e.g. different metrics), repeated ones
+    # are told apart by their occurrence
+    seen: Dict[tuple, int] = {}
+    keys = []
+    for item in items:
+        key = (item.get('owner_type'), item.get('owner_id'), item.get('http_method'),
+               item.get('pattern'))
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else key + (seen[key],))
+    return keys
+
+
+def _route_keys(items: Iterable[dict]) -> list:
+    return [(item.get('path'),) for item in items]
+
+
+_KEYS = {'policies': _policy_keys, 'mapping_rules': _rule_keys, 'backend_routes': _route_keys}
+
+
+def _version(config):
+    entity = getattr(config, 'entity', config)
+    return entity.get('version') if isinstance(entity, dict) else None
+
+
+def _key_str(key: tuple) -> str:
+    return ' '.join(str(part) for part in key if part is not None)
@@ -0,0 +1,165 @@
+"""Registry of tenant admin API clients sharing connection pools"""
+
+import collections
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from threescale_api import utils
+from threescale_api.client import ThreeScaleClient
+
+log = logging.getLogger(__name__)
+
+
+Key = Tuple[str, str, bool]
+
+
+class ClientRegistry:
+    """Cache of ThreeScaleClient instances keyed by admin url, token and ssl_verify
+
+    Clients of the same host share one session (connection pool). Least recently
+    used clients are evicted once there is more than `max_clients` of them, or when
+    they were not used for `idle_timeout` seconds; session of the host is closed
+    together with its last client.
+    Usage:
+        registry = ClientRegistry(max_clients=500, idle_timeout=600)
+        api = registry.get(tenant.admin_base_url, tenant.admin_token)
+        # or
+        api = tenant.admin_api(registry=registry)
+    """
+
+    def __init__(self, max_clients: int = 1000, idle_timeout: float = None,
+                 pool_maxsize: int = 10, **client_kwargs):
+        """Creates instance of the registry
+        Args:
+            max_clients(int): Maximal number of cached clients
+            idle_timeout(float): Seconds after which unused client is evicted, None == never
+            pool_maxsize(int): Number of connections kept per host
+            **client_kwargs: Optional args passed to every ThreeScaleClient
+                (e.g. ssl_verify, scheduler, breaker, timeout)
+        """
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.pool_maxsize = pool_maxsize
+        self._client_kwargs = client_kwargs
+        self._clients: collections.OrderedDict = collections.OrderedDict()
+        self._last_used: Dict[Key, float] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.RLock()
+
+    def get(self, url: str, token: str, **kwargs) -> ThreeScaleClient:
+        """Get cached client for the tenant or create a new one
+        Clients verifying and not verifying ssl are cached separately. Other args
+        are used only when the client is created, a cached client keeps its own.
+        The client is created (and waited for, see `wait`) without blocking other callers.
+        Args:
+            url(str): Tenant admin url
+            token(str): Tenant access token
+            **kwargs: Optional args of ThreeScaleClient overriding the registry ones
+        Returns(ThreeScaleClient): Client instance
+        """
+        params = {**self._client_kwargs, **kwargs}
+        key = self.key(url, token, ssl_verify=params.get('ssl_verify', True))
+        with self._lock:
+            self._evict_idle()
+            client = self._clients.get(key)
+            if client is not None:
+                return self._use(key, client)
+            shared = 'session' not in params
+            if shared:
+                params['session'] = self._session(url)
+        client = ThreeScaleClient(url, token, **params)
+        with self._lock:
+            cached = self._clients.get(key)
+            if cached is not None:
+                # created concurrently by another caller
+                return self._use(key, cached)
+            if shared:
+                # session may have been closed by an eviction meanwhile, it stays usable
+                self._sessions.setdefault(_host(url), client.rest.session)
+            self._clients[key] = client
+            log.debug("[REGISTRY] New client for %s", url)
+            return self._use(key, client)
+
+    @staticmethod
+    def key(url: str, token: str, ssl_verify: bool = True) -> Key:
+        """Cache key of the client
+        Args:
+            url(str): Tenant admin url
+            token(str): Tenant access token
+            ssl_verify(bool): Whether the client verifies ssl
+        Returns(tuple): Key
+        """
+        return url, token, bool(ssl_verify)
+
+    def evict(self, url: str, token: str, ssl_verify: bool = None):
+        """Remove client of the tenant from the registry
+        Args:
+            url(str): Tenant admin url
+            token(str): Tenant access token
+            ssl_verify(bool): Remove only the client with this ssl_verify, None == any
+        """
+        with self._lock:
+            for key in [key for key in self._clients if key[:2] == (url, token)
+                        and (ssl_verify is None or key[2] == bool(ssl_verify))]:
+                self._evict(key)
+
+    def clear(self):
+        """Remove all clients and close all sessions"""
+        with self._lock:
+            for key in list(self._clients):
+                self._evict(key)
+
+    def metrics(self) -> Dict[Key, dict]:
+        """Returns(dict): (url, token, ssl_verify) -> request counters of the client"""
+        with self._lock:
+            return {key: client.rest.stats.as_dict() for key, client in self._clients.items()}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, key: tuple) -> bool:
+        """Whether a client is cached; (url, token) matches any ssl_verify"""
+        if len(key) == 2:
+            return any(cached[:2] == key for cached in self._clients)
+        return key in self._clients
+
+    def _use(self, key: Key, client: ThreeScaleClient) -> ThreeScaleClient:
+        self._clients.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+        while len(self._clients) > self.max_clients:
+            self._evict(next(iter(self._clients)))
+        return client
+
+    def _session(self, url: str) -> requests.Session:
+        host = _host(url)
+        if host not in self._sessions:
+            self._sessions[host] = utils.create_session(pool_maxsize=self.pool_maxsize)
+        return self._sessions[host]
+
+    def _evict(self, key: Key):
+        log.debug("[REGISTRY] Evict client for %s", key[0])
+        client = self._clients.pop(key)
+        self._last_used.pop(key, None)
+        host = _host(key[0])
+        session: Optional[requests.Session] = self._sessions.get(host)
+        if session is client.rest.session \
+                and not any(_host(url) == host for url, *_ in self._clients):
+            del self._sessions[host]
+            session.close()
+
+    def _evict_idle(self):
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        for key in [key for key, used in self._last_used.items()
+                    if now - used > self.idle_timeout]:
+            self._evict(key)
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc or url
@@ -1,7 +1,17 @@
+import contextlib
+import functools
+import itertools
 import logging
+import os
+import posixpath
+import time
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Dict, Union, List, Iterable
-from urllib.parse import quote_plus
+from typing import Any, Callable, Dict, Union, List, Iterable, Iterator, NamedTuple, \
+    Optional, Tuple, TYPE_CHECKING
+from urllib.parse import quote_plus, urljoin
+
+import requests
 
 from threescale_api import auth
 from threescale_api import utils
@@ -11,9 +21,32 @@ from threescale_api.defaults import DefaultClient, DefaultPlanClient, DefaultPla
     DefaultPaginationClient
 from threescale_api import client
 
+if TYPE_CHECKING:
+    from threescale_api import analytics, proxy_diff
+    from threescale_api.cache import AnalyticsCache, ProxyConfigCache
+    from threescale_api.registry import ClientRegistry
+
 log = logging.getLogger(__name__)
 
 
+class ProxyRollout(NamedTuple):
+    """Result of deploying or promoting proxy of one service
+    timings hold duration of the stages (resolve, promote, wait) in seconds, None when
+    the result was not produced by a rollout.
+    """
+    service: 'Service'
+    config: Optional['ProxyConfig'] = None
+    elapsed: float = 0.0
+    error: Optional[Exception] = None
+    version: Optional[int] = None
+    skipped: bool = False
+    timings: Optional[Dict[str, float]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class Services(DefaultPaginationClient):
     def __init__(self, *args, entity_name='service', entity_collection='services',
                  per_page=500, **kwargs):
@@ -24,6 +57,103 @@ class Services(DefaultPaginationClient):
     def url(self) -> str:
         return self.threescale_client.admin_api_url + '/services'
 
+    def deploy_many(self, services: Iterable['Service'] = None, wait: bool = True,
+                    max_workers: int = 8, **kwargs) -> Iterator[ProxyRollout]:
+        """Deploy proxies of many services to staging concurrently
+        Args:
+            services: Services to deploy, all services if missing
+            wait(bool): Whether to wait for the new sandbox configs (Proxies.deploy_and_wait)
+            max_workers(int): Number of services deployed concurrently
+            **kwargs: Optional args of Proxies.deploy_and_wait (timeout, probe ...)
+        Returns(Iterator[ProxyRollout]): Results in order of completion
+        """
+        def deploy(service, timings):
+            proxy = service.proxy
+            with _timed(timings, 'deploy'):
+                return dict(config=proxy.deploy_and_wait(**kwargs) if wait else proxy.deploy())
+        return self._rollout(deploy, services, max_workers)
+
+    def promote_many(self, services: Iterable['Service'] = None, from_env: str = 'sandbox',
+                     to_env: str = 'production', wait: bool = True, max_workers: int = 8,
+                     rate: float = None, skip_promoted: bool = True,
+                     **kwargs) -> Iterator[ProxyRollout]:
+        """Promote latest configs of many services concurrently
+        Latest configs are resolved concurrently, only promotions themselves are
+        limited by the rate.
+        Usage:
+            results = list(api.services.promote_many(rate=5))
+            failed = [result for result in results if not result.ok]
+        Args:
+            services: Services to promote, all services if missing
+            from_env(str): Source environment
+            to_env(str): Target environment
+            wait(bool): Whether to wait until the promoted configs are the latest ones
+            max_workers(int): Number of services processed concurrently
+            rate(float): Maximal number of promotions per second, None == unlimited
+            skip_promoted(bool): Whether to skip services whose latest target config
+                has the same content as the latest source config
+            **kwargs: Optional args of ProxyConfigs.wait_for_promoted (timeout, probe ...)
+        Returns(Iterator[ProxyRollout]): Results in order of completion
+        """
+        limiter = utils.RateLimiter(rate) if rate else None
+
+        def promote(service, timings):
+            configs = service.proxy.configs
+            with _timed(timings, 'resolve'):
+                source = configs.latest(env=from_env)
+                target = configs.latest_if_changed(to_env)[0] if skip_promoted else None
+            if target is not None and target['content'] == source['content']:
+                return dict(config=target, version=source['version'], skipped=True)
+            with _timed(timings, 'promote'):
+                if limiter:
+                    limiter.acquire()
+                promoted = configs.promote(version=source['version'], from_env=from_env,
+                                           to_env=to_env)
+            if wait:
+                with _timed(timings, 'wait'):
+                    promoted = configs.wait_for_promoted(promoted['version'], env=to_env,
+                                                         **kwargs)
+            return dict(config=promoted, version=source['version'])
+
+        return self._rollout(promote, services, max_workers)
+
+    def _rollout(self, func, services, max_workers: int) -> Iterator[ProxyRollout]:
+        if services is None:
+            services = (service for _, page in self.pages() for service in page)
+        started = time.monotonic()
+        counts = {'ok': 0, 'skipped': 0, 'failed': 0}
+
+        def run(service):
+            timings = {}
+            begin = time.monotonic()
+            try:
+                fields = func(service, timings)
+                return ProxyRollout(service, elapsed=time.monotonic() - begin, timings=timings,
+                                    **fields)
+            except (errors.ApiClientError, errors.WaitTimeout, requests.RequestException) as err:
+                return ProxyRollout(service, elapsed=time.monotonic() - begin, error=err,
+                                    timings=timings)
+
+        for service, result, error in utils.run_parallel(run, services,
+                                                         max_workers=max_workers):
+            if error is not None:
+                raise error
+            if not result.ok:
+                log.warning("[ROLLOUT] %s failed: %s", service, result.error)
+            counts['failed' if not result.ok else 'skipped' if result.skipped else 'ok'] += 1
+            yield result
+        log.info("[ROLLOUT] %s done, %s skipped, %s failed in %.1fs", counts['ok'],
+                 counts['skipped'], counts['failed'], time.monotonic() - started)
+
+
+@contextlib.contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[stage] = time.monotonic() - started
+
 
 class MappingRules(DefaultPaginationClient):
     def __init__(self, *args, entity_name='mapping_rule', entity_collection='mapping_rules',
@@ -465,9 +595,7 @@ class Analytics(DefaultClient):
             period=period,
             **kwargs
         )
-        url = self.threescale_client.url + f"/stats/{resource_type}/{resource_id}/usage"
-        response = self.rest.get(url, json=params)
-        return utils.extract_response(response=response)
+        return self._stats(resource_type, resource_id, 'usage', params)
 
     def list_by_application(self, application: Union['Application', int], **kwargs):
         app_id = _extract_entity_id(application)
@@ -482,6 +610,314 @@ class Analytics(DefaultClient):
         return self._list_by_resource(
             resource_id=backend_id, resource_type='backend_apis', **kwargs)
 
+    def series(self, resource: Union['DefaultResource', int], resource_type: str,
+               metric_name: str = 'hits', cache: 'AnalyticsCache' = None,
+               **kwargs) -> 'analytics.UsageSeries':
+        """Get usage of the resource as compact time series
+        With cache, query needs explicit `since` and `granularity`; `until` defaults
+        to now and `period` is ignored. Cached closed buckets are not fetched again.
+        Args:
+            resource: Resource or its id
+            resource_type(str): applications, services or backend_apis
+            metric_name(str): Metric system name
+            cache(AnalyticsCache): Cache of closed buckets
+            **kwargs: Optional query params (since, period, until, granularity ...)
+        Returns(analytics.UsageSeries): Usage series
+        """
+        resource_id = _extract_entity_id(resource)
+        if cache is not None and kwargs.get('since') and kwargs.get('granularity'):
+            return self._cached_series(cache, resource_id, resource_type, metric_name, **kwargs)
+        return self._series(resource_id, resource_type, metric_name, **kwargs)
+
+    def refresh(self, series: 'analytics.UsageSeries', cache: 'AnalyticsCache' = None,
+                **kwargs) -> int:
+        """Incrementally update the series in place with data since the last fetch
+        The last (possibly open at the time) bucket is fetched again together with
+        all newer buckets.
+        Args:
+            series(analytics.UsageSeries): Series to be updated, must not be empty
+            cache(AnalyticsCache): Cache of closed buckets
+            **kwargs: Optional query params (e.g. timezone)
+        Returns(int): Number of appended buckets
+        """
+        if not series:
+            raise ValueError("Cannot refresh empty series, fetch it first")
+        tzinfo = series.tzinfo
+        update = self.series(series.resource_id, series.resource_type,
+                             metric_name=series.metric, cache=cache,
+                             since=datetime.fromtimestamp(series.timestamps[-1],
+                                                          tzinfo).isoformat(),
+                             until=datetime.now(tzinfo).isoformat(),
+                             granularity=series.granularity, period=None, **kwargs)
+        return series.extend(update)
+
+    def _series(self, resource_id, resource_type: str, metric_name: str,
+                **kwargs) -> 'analytics.UsageSeries':
+        from threescale_api import analytics  # pylint: disable=import-outside-toplevel
+        data = self._list_by_resource(resource_id=resource_id, resource_type=resource_type,
+                                      metric_name=metric_name, **kwargs)
+        return analytics.UsageSeries.from_response(data, resource_type, resource_id,
+                                                   metric=metric_name)
+
+    def _cached_series(self, cache: 'AnalyticsCache', resource_id, resource_type: str,
+                       metric_name: str, since, granularity: str, until=None,
+                       **kwargs) -> 'analytics.UsageSeries':
+        from threescale_api import analytics  # pylint: disable=import-outside-toplevel
+        kwargs.pop('period', None)
+        key = cache.key(resource_type, resource_id, metric_name, granularity, **kwargs)
+        cached = cache.get(key)
+        # offset of the series timezone is known from its data only, naive times of
+        # a first fetch are sent as they are and interpreted by 3scale in `timezone`
+        tzinfo = cached.tzinfo if cached else timezone.utc
+        since_ts = analytics.bucket_start(
+            analytics.to_datetime(since, tzinfo), granularity).timestamp()
+        until_ts = None
+        if until:
+            # until is inclusive, the bucket containing it is part of the result
+            until_ts = analytics.next_bucket(analytics.bucket_start(
+                analytics.to_datetime(until, tzinfo), granularity), granularity).timestamp()
+        result = None
+        fetch_from = since if isinstance(since, str) else since.isoformat()
+        if cached:
+            fetch_from = datetime.fromtimestamp(since_ts, tzinfo).isoformat()
+        if cached and cached.timestamps[0] <= since_ts:
+            result = cached.slice(since_ts, until_ts)
+            end = cached.end()
+            if until_ts is not None and until_ts <= end:
+                log.debug("Analytics of %s (%s) %s served from cache", resource_type,
+                          resource_id, metric_name)
+                return result
+            fetch_from = datetime.fromtimestamp(max(end, since_ts), tzinfo).isoformat()
+        fetched = self._series(resource_id, resource_type, metric_name, since=fetch_from,
+                               until=until or datetime.now(tzinfo).isoformat(),
+                               granularity=granularity, period=None, **kwargs)
+        open_bucket = analytics.bucket_start(datetime.now(fetched.tzinfo), granularity)
+        cache.store(key, fetched, closed_before=open_bucket.timestamp())
+        if result is None:
+            return fetched
+        result.extend(fetched)
+        return result
+
+    def series_by_application(self, application: Union['Application', int],
+                              **kwargs) -> 'analytics.UsageSeries':
+        return self.series(application, resource_type='applications', **kwargs)
+
+    def series_by_service(self, service: Union['Service', int],
+                          **kwargs) -> 'analytics.UsageSeries':
+        return self.series(service, resource_type='services', **kwargs)
+
+    def series_by_backend(self, backend: Union['Backend', int],
+                          **kwargs) -> 'analytics.UsageSeries':
+        return self.series(backend, resource_type='backend_apis', **kwargs)
+
+    def series_many(self, resources: Iterable[Union['DefaultResource', int]], resource_type: str,
+                    metric_names: Iterable[str] = ('hits',), max_workers: int = 8,
+                    ignore_errors: bool = False, **kwargs) -> Dict[tuple, 'analytics.UsageSeries']:
+        """Fetch usage of many resources and/or metrics concurrently
+        Usage:
+            usage = api.analytics.series_many(apps, 'applications', period='month')
+            analytics.top_n(usage.values(), 10)
+        Args:
+            resources: Resources or their ids (all of resource_type)
+            resource_type(str): applications, services or backend_apis
+            metric_names: Metric system names fetched for every resource
+            max_workers(int): Number of concurrent requests
+            ignore_errors(bool): Whether to skip failed fetches (logged) instead of raising
+            **kwargs: Optional query params (since, period, until, granularity ...)
+        Returns(Dict[tuple, analytics.UsageSeries]): (resource id, metric) -> series
+        """
+        pairs = [(_extract_entity_id(resource), metric)
+                 for resource in resources for metric in metric_names]
+        return self._fetch_many(
+            lambda pair: self.series(pair[0], resource_type, metric_name=pair[1], **kwargs),
+            pairs, resource_type, max_workers=max_workers, ignore_errors=ignore_errors)
+
+    def response_codes(self, resource: Union['DefaultResource', int],
+                       resource_type: str = 'services', response_code: str = '2XX',
+                       since=None, period: str = 'year',
+                       **kwargs) -> 'analytics.UsageSeries':
+        """Get number of responses with the response code as time series
+        Args:
+            resource: Resource or its id
+            resource_type(str): applications, services or backend_apis
+            response_code(str): Response code (e.g. 404) or group (2XX, 4XX, 5XX)
+            since: Start of the period
+            period(str): year, month, week or day
+            **kwargs: Optional query params (until, granularity, timezone ...)
+        Returns(analytics.UsageSeries): Series with the response code as metric
+        """
+        resource_id = _extract_entity_id(resource)
+        log.info("List response codes (%s) by %s (%s)", response_code, resource_type,
+                 resource_id)
+        from threescale_api import analytics  # pylint: disable=import-outside-toplevel
+        data = self._stats(resource_type, resource_id, 'usage_response_code',
+                           dict(response_code=response_code, since=since, period=period,
+                                **kwargs))
+        return analytics.UsageSeries.from_response(data, resource_type, resource_id,
+                                                   metric=str(response_code))
+
+    def response_codes_many(self, resources: Iterable[Union['DefaultResource', int]],
+                            resource_type: str = 'services',
+                            response_codes: Iterable[str] = ('2XX', '4XX', '5XX'),
+                            max_workers: int = 8, ignore_errors: bool = False,
+                            **kwargs) -> Dict[tuple, 'analytics.UsageSeries']:
+        """Fetch response codes of many resources concurrently
+        Args:
+            resources: Resources or their ids (all of resource_type)
+            resource_type(str): applications, services or backend_apis
+            response_codes: Response codes fetched for every resource
+            max_workers(int): Number of concurrent requests
+            ignore_errors(bool): Whether to skip failed fetches (logged) instead of raising
+            **kwargs: Optional query params (since, period, until, granularity ...)
+        Returns(Dict[tuple, analytics.UsageSeries]): (resource id, response code) -> series
+        """
+        pairs = [(_extract_entity_id(resource), str(code))
+                 for resource in resources for code in response_codes]
+        return self._fetch_many(
+            lambda pair: self.response_codes(pair[0], resource_type, response_code=pair[1],
+                                             **kwargs),
+            pairs, resource_type, max_workers=max_workers, ignore_errors=ignore_errors)
+
+    def top_applications(self, service: Union['Service', int], metric_name: str = 'hits',
+                         since=None, period: str = 'month',
+                         **kwargs) -> List['analytics.UsageSeries']:
+        """Get the most active applications of the service
+        Every application is returned as single bucket series (see
+        analytics.PERIOD_GRANULARITIES for its granularity), so the result can be summed,
+        resampled or ranked together with other series.
+        Args:
+            service: Service or its id
+            metric_name(str): Metric system name
+            since: Start of the period (required by 3scale)
+            period(str): year, month, week or day
+            **kwargs: Optional query params
+        Returns(List[analytics.UsageSeries]): Application series, most active first
+        """
+        service_id = _extract_entity_id(service)
+        log.info("List top applications of service (%s) for metric (#%s)", service_id,
+                 metric_name)
+        from threescale_api import analytics  # pylint: disable=import-outside-toplevel
+        if period not in analytics.PERIOD_GRANULARITIES:
+            raise ValueError(f"Unknown period '{period}'")
+        data = self._stats('services', service_id, 'top_applications',
+                           dict(metric_name=metric_name, since=since, period=period, **kwargs))
+        start = analytics.to_datetime(data['period']['since'])
+        offset = start.utcoffset()
+        return [analytics.UsageSeries('applications', app['id'], metric_name,
+                                      analytics.PERIOD_GRANULARITIES[period],
+                                      (start.timestamp(),), (app['value'],),
+                                      utc_offset=offset.total_seconds() if offset else 0.0)
+                for app in data.get('applications', [])]
+
+    def top_applications_many(self, services: Iterable[Union['Service', int]],
+                              max_workers: int = 8, ignore_errors: bool = False,
+                              **kwargs) -> Dict[int, List['analytics.UsageSeries']]:
+        """Fetch top applications of many services concurrently
+        Args:
+            services: Services or their ids
+            max_workers(int): Number of concurrent requests
+            ignore_errors(bool): Whether to skip failed fetches (logged) instead of raising
+            **kwargs: Optional args of `top_applications`
+        Returns(Dict[int, List[analytics.UsageSeries]]): Service id -> top applications
+        """
+        return self._fetch_many(
+            lambda service_id: self.top_applications(service_id, **kwargs),
+            [_extract_entity_id(service) for service in services], 'services',
+            max_workers=max_workers, ignore_errors=ignore_errors)
+
+    def _stats(self, resource_type: str, resource_id, endpoint: str, params: dict):
+        url = self.threescale_client.url + f"/stats/{resource_type}/{resource_id}/{endpoint}"
+        params = {name: value for name, value in params.items() if value is not None}
+        response = self.rest.get(url, json=params)
+        return utils.extract_response(response=response)
+
+    @staticmethod
+    def _fetch_many(func, keys: list, resource_type: str, max_workers: int,
+                    ignore_errors: bool) -> dict:
+        result = {}
+        failed = []
+        for key, value, error in utils.run_parallel(func, keys, max_workers=max_workers):
+            if error is not None:
+                log.warning("Analytics of %s %s failed: %s", resource_type, key, error)
+                failed.append(error)
+            else:
+                result[key] = value
+        if failed and not ignore_errors:
+            raise failed[0]
+        return result
+
+
+class ProvisionedTenant(NamedTuple):
+    """Result of provisioning one tenant by Tenants.create_many"""
+    spec: dict
+    tenant: Optional['Tenant'] = None
+    client: Optional['client.ThreeScaleClient'] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class TenantResult(NamedTuple):
+    """Result of a query on one tenant returned by Tenants.fan_out"""
+    tenant: Union['Tenant', 'client.ThreeScaleClient']
+    value: object = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BillingReport:
+    """Progress of batch billing started by Tenants.trigger_billing_many/_accounts
+    Keys of `triggered` and `failed` are ids of billed accounts or tenants (see `scope`);
+    `invoices` (account id -> new or changed invoice ids) is filled by
+    Invoices.wait_for_billing. `before` (account id -> invoice id -> (state, updated_at))
+    keeps invoices of the month which existed before the billing was triggered.
+    """
+    ACCOUNTS = 'accounts'
+    TENANTS = 'tenants'
+
+    def __init__(self, date: str, scope: str = ACCOUNTS):
+        self.date = date
+        self.scope = scope
+        self.triggered: List[int] = []
+        self.failed: Dict[int, Exception] = {}
+        self.invoices: Dict[int, List[int]] = {}
+        self.before: Optional[Dict[int, Dict[int, tuple]]] = None
+        self.started = time.monotonic()
+        self.trigger_seconds: Optional[float] = None
+        self.completion_seconds: Optional[float] = None
+
+    @property
+    def month(self) -> str:
+        return self.date[:7]
+
+    @property
+    def pending(self) -> List[int]:
+        """Returns(List[int]): Triggered ids without invoice yet"""
+        return [entity_id for entity_id in self.triggered if entity_id not in self.invoices]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.pending
+
+    def as_dict(self) -> dict:
+        """Returns(dict): Counters, durations and throughput of the billing"""
+        return {
+            'date': self.date,
+            'triggered': len(self.triggered),
+            'failed': len(self.failed),
+            'invoiced': len(self.invoices),
+            'pending': len(self.pending),
+            'trigger_seconds': self.trigger_seconds,
+            'triggers_per_second': (len(self.triggered) / self.trigger_seconds
+                                    if self.trigger_seconds else None),
+            'completion_seconds': self.completion_seconds,
+        }
+
 
 class Tenants(DefaultClient):
     def __init__(self, *args, entity_name='tenant', entity_collection='tenants', **kwargs):
@@ -499,6 +935,121 @@ class Tenants(DefaultClient):
     def url(self) -> str:
         return self.threescale_client.master_api_url + '/providers'
 
+    def create_many(self, specs: Iterable[dict], concurrency: int = 5,
+                    wait_concurrency: int = 50, timeout: float = 540, ssl_verify: bool = None,
+                    registry: 'ClientRegistry' = None) -> Iterator[ProvisionedTenant]:
+        """Create many tenants in parallel and stream them as they become ready
+        Creation runs with `concurrency` workers, readiness of created tenants is
+        awaited separately with up to `wait_concurrency` tenants at once, so the
+        waits overlap with further creations. Failure of one tenant does not stop
+        the others, it is reported in its result.
+        Usage:
+            for result in master.tenants.create_many(specs, concurrency=10):
+                if result.ok:
+                    result.client.services.create(...)
+        Args:
+            specs: Parameters of the tenants (as for `create`)
+            concurrency(int): Number of tenants created at once
+            wait_concurrency(int): Number of tenants awaited at once
+            timeout(float): Seconds to wait for readiness of each tenant at most
+            ssl_verify(bool): Whether the returned admin api clients verify ssl,
+                None == registry or client default; readiness is probed by separate clients
+                not verifying ssl
+            registry(ClientRegistry): Registry to take the admin api clients from
+        Returns(Iterator[ProvisionedTenant]): Results in order of completion
+        """
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        def wait_ready(tenant: 'Tenant'):
+            if not tenant.wait_tenant_ready(timeout=timeout, registry=registry):
+                raise errors.ThreeScaleApiError(
+                    f"Tenant {tenant.entity_id} not ready within {timeout}s")
+            return tenant.admin_api(ssl_verify=ssl_verify, registry=registry)
+
+        specs = iter(specs)
+        with ThreadPoolExecutor(max_workers=concurrency) as creator, \
+                ThreadPoolExecutor(max_workers=wait_concurrency) as waiter:
+            creating = {utils.submit(creator, self.create, params=spec): spec
+                        for spec in itertools.islice(specs, concurrency)}
+            waiting = {}
+            while creating or waiting:
+                done, _ = wait([*creating, *waiting], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in creating:
+                        spec = creating.pop(future)
+                        for new_spec in itertools.islice(specs, 1):
+                            creating[utils.submit(creator, self.create, params=new_spec)] = \
+                                new_spec
+                        if future.exception() is not None:
+                            yield ProvisionedTenant(spec, error=future.exception())
+                        else:
+                            tenant = future.result()
+                            waiting[utils.submit(waiter, wait_ready, tenant)] = (spec, tenant)
+                        continue
+                    spec, tenant = waiting.pop(future)
+                    if future.exception() is not None:
+                        yield ProvisionedTenant(spec, tenant, error=future.exception())
+                    else:
+                        yield ProvisionedTenant(spec, tenant, future.result())
+
+    def fan_out(self, query, tenants: Iterable[Union['Tenant', 'client.ThreeScaleClient']],
+                max_workers: int = 10, timeout: float = None, ssl_verify: bool = None,
+                registry: 'ClientRegistry' = None, flatten: bool = True) -> Iterator[TenantResult]:
+        """Run the same query on admin api of many tenants concurrently
+        Results are streamed as tenants finish, tagged by the tenant. Failure (or
+        timeout) of one tenant is reported in its result and does not affect the others.
+        Usage:
+            for result in master.tenants.fan_out(lambda api: api.services.list(), tenants):
+                print(result.tenant.entity_id, result.value or result.error)
+        Args:
+            query: Callable taking the tenant ThreeScaleClient
+            tenants: Tenants (with admin access token) or their admin api clients
+            max_workers(int): Number of tenants queried at once
+            timeout(float): Deadline in seconds of the query per tenant, None == no deadline
+            ssl_verify(bool): Whether the admin api clients verify ssl,
+                None == registry or client default
+            registry(ClientRegistry): Registry to take the admin api clients from
+            flatten(bool): Yield one result per item when query returns a list
+        Returns(Iterator[TenantResult]): Results in order of completion
+        """
+        def run(tenant):
+            api = tenant if isinstance(tenant, client.ThreeScaleClient) \
+                else tenant.admin_api(ssl_verify=ssl_verify, registry=registry)
+            if timeout is None:
+                return query(api)
+            with api.deadline(timeout):
+                return query(api)
+
+        for tenant, value, error in utils.run_parallel(run, tenants, max_workers=max_workers):
+            if error is not None:
+                log.info("Query on tenant %s failed: %s", _tenant_label(tenant), error)
+                yield TenantResult(tenant, error=error)
+            elif flatten and isinstance(value, list):
+                for item in value:
+                    yield TenantResult(tenant, item)
+            else:
+                yield TenantResult(tenant, value)
+
+    def wait_many(self, tenants: Iterable['Tenant'], max_workers: int = 50,
+                  timeout: float = 540, registry: 'ClientRegistry' = None) -> Dict[int, bool]:
+        """Wait for many tenants to become ready concurrently
+        Args:
+            tenants: Tenants to wait for
+            max_workers(int): Number of tenants waited for at once
+            timeout(float): Seconds to wait for each tenant at most
+            registry(ClientRegistry): Registry to take the admin api clients from
+        Returns(Dict[int, bool]): Tenant id -> whether the tenant is ready
+        """
+        result = {}
+        for tenant, ready, error in utils.run_parallel(
+                lambda tenant: tenant.wait_tenant_ready(timeout=timeout, registry=registry),
+                tenants, max_workers=max_workers):
+            if error is not None:
+                log.warning("Waiting for tenant %s failed: %s", tenant.entity_id, error)
+            result[tenant.entity_id] = bool(ready)
+        return result
+
     def trigger_billing(self, tenant: Union['Tenant', int], date: str):
         """Trigger billing for whole tenant
         Args:
@@ -530,6 +1081,75 @@ class Tenants(DefaultClient):
         response = self.rest.post(url=url, json=params)
         return response.ok
 
+    def trigger_billing_many(self, tenants: Iterable[Union['Tenant', int]], date: str,
+                             max_workers: int = 8, rate: float = None) -> BillingReport:
+        """Trigger billing for many tenants concurrently
+        Completion of tenant billing can not be awaited by Invoices.wait_for_billing,
+        which tracks billed accounts; trigger_billing_accounts per tenant can.
+        Args:
+            tenants: Tenant ids or tenant resources
+            date: Date for billing
+            max_workers(int): Number of concurrent requests
+            rate(float): Maximal number of triggered jobs per second, None == unlimited
+        Returns(BillingReport): Triggered and failed tenant ids (scope tenants)
+        """
+        return self._trigger_many(lambda tenant: self.trigger_billing(tenant, date),
+                                  tenants, BillingReport(date, scope=BillingReport.TENANTS),
+                                  max_workers, rate)
+
+    def trigger_billing_accounts(self, tenant: Union['Tenant', int],
+                                 accounts: Iterable[Union['Account', int]], date: str,
+                                 max_workers: int = 8, rate: float = None,
+                                 invoices: 'Invoices' = None) -> BillingReport:
+        """Trigger billing for many accounts of the tenant concurrently
+        Usage:
+            tenant_invoices = tenant.admin_api().invoices
+            report = api.tenants.trigger_billing_accounts(tenant, accounts, '2024-01-31',
+                                                          rate=20, invoices=tenant_invoices)
+            tenant_invoices.wait_for_billing(report)
+            report.as_dict()
+        Args:
+            tenant: Tenant id or tenant resource
+            accounts: Account ids or account resources
+            date: Date for billing
+            max_workers(int): Number of concurrent requests
+            rate(float): Maximal number of triggered jobs per second, None == unlimited
+            invoices(Invoices): Invoices client of the tenant; when given, invoices of the
+                month existing before the billing are recorded, so that wait_for_billing
+                waits for new or changed ones
+        Returns(BillingReport): Triggered and failed account ids
+        """
+        report = BillingReport(date)
+        if invoices is not None:
+            report.before = invoices.billing_state(report.month)
+        return self._trigger_many(
+            lambda account: self.trigger_billing_account(tenant, account, date),
+            accounts, report, max_workers, rate)
+
+    @staticmethod
+    def _trigger_many(trigger, entities, report: BillingReport, max_workers: int,
+                      rate: Optional[float]) -> BillingReport:
+        limiter = utils.RateLimiter(rate) if rate else None
+        report.started = time.monotonic()
+
+        def run(entity):
+            if limiter:
+                limiter.acquire()
+            if not trigger(entity):
+                raise errors.ThreeScaleApiError("Billing job was not accepted")
+
+        for entity, _, error in utils.run_parallel(run, entities, max_workers=max_workers):
+            entity_id = _extract_entity_id(entity)
+            if error is None:
+                report.triggered.append(entity_id)
+            else:
+                log.warning("[BILLING] Billing of (%s) failed: %s", entity_id, error)
+                report.failed[entity_id] = error
+        report.trigger_seconds = time.monotonic() - report.started
+        log.info("[BILLING] Triggered %s jobs (%s failed) in %.1fs", len(report.triggered),
+                 len(report.failed), report.trigger_seconds)
+        return report
+
 
 class Proxies(DefaultClient):
     def __init__(self, *args, entity_name='proxy', **kwargs):
@@ -539,6 +1159,14 @@ class Proxies(DefaultClient):
     def url(self) -> str:
         return self.parent.url + '/proxy'
 
+    @property
+    def service(self) -> 'Service':
+        return self.parent
+
+    @property
+    def configs(self) -> 'ProxyConfigs':
+        return ProxyConfigs(parent=self, instance_klass=ProxyConfig)
+
     def deploy(self) -> 'Proxy':
         log.info("[DEPLOY] %s to Staging", self._entity_name)
         url = f'{self.url}/deploy'
@@ -546,6 +1174,46 @@ class Proxies(DefaultClient):
         instance = self._create_instance(response=response)
         return instance
 
+    def deploy_and_wait(self, timeout: float = 300, interval: float = 0.5,
+                        max_interval: float = 10, probe=None, probe_path: str = '/',
+                        probe_check: Callable[[requests.Response], bool] = None) \
+            -> 'ProxyConfig':
+        """Deploy to staging and wait for the new sandbox config version
+        The deploy creates the new sandbox config version right away, it is checked by
+        a conditional request (If-None-Match) right after the deploy. Deploy without any
+        change of the proxy creates no new version, the current latest config is
+        returned then. Only the very first config of the service is awaited by polling.
+        Args:
+            timeout(float): Maximal time to wait in seconds (including probing)
+            interval(float): Initial pause between polls in seconds
+            max_interval(float): Maximal pause between polls in seconds
+            probe: utils.HttpClient of the staging gateway or callable returning True
+                once the new version serves traffic, None == no probing
+            probe_path(str): Path requested by the HttpClient probe
+            probe_check: Callable telling whether the probe response comes from the new
+                version, defaults to successful response
+        Returns(ProxyConfig): The new sandbox config, the latest one when nothing changed
+        Raises:
+            errors.WaitTimeout: The first version did not appear (or serve) in time
+        """
+        give_up = time.monotonic() + timeout
+        configs = self.configs
+        before, etag = configs.latest_if_changed('sandbox')
+        self.deploy()
+        config, etag = configs.latest_if_changed('sandbox', etag)
+        if config is None and before is not None:
+            log.info("[DEPLOY] %s unchanged, sandbox config stays at version %s",
+                     self._entity_name, before['version'])
+            config = before
+        elif config is None:
+            config = configs.wait_for_version(
+                1, env='sandbox', etag=etag, timeout=give_up - time.monotonic(),
+                interval=interval, max_interval=max_interval)
+        if probe is not None:
+            _wait_for_probe(probe, probe_path, probe_check, give_up - time.monotonic(),
+                            interval, max_interval)
+        return config
+
     @property
     def oidc(self) -> 'OIDCConfigs':
         return OIDCConfigs(self)
@@ -564,8 +1232,11 @@ class ProxyConfigs(DefaultClient):
 
     @property
     def url(self) -> str:
+        return self._env_url(self._env)
+
+    def _env_url(self, env: str = None) -> str:
         base = self.parent.url + '/configs'
-        return base if not self._env else f"{base}/{self._env}"
+        return base if not env else f"{base}/{env}"
 
     @property
     def proxy(self) -> 'Proxy':
@@ -589,7 +1260,7 @@ class ProxyConfigs(DefaultClient):
                 **kwargs) -> 'Proxy':
         log.info("[PROMOTE] %s version %s from %s to %s", self.service, version, from_env,
                  to_env)
-        url = f'{self.url}/{from_env}/{version}/promote'
+        url = f'{self._env_url()}/{from_env}/{version}/promote'
         params = dict(to=to_env)
         kwargs.update()
         response = self.rest.post(url, json=params, **kwargs)
@@ -599,19 +1270,228 @@ class ProxyConfigs(DefaultClient):
     def latest(self, env: str = "sandbox") -> 'ProxyConfig':
         log.info("[LATEST] Get latest proxy configuration of %s", env)
         self._env = env
-        url = self.url + '/latest'
+        url = self._env_url(env) + '/latest'
         response = self.rest.get(url=url)
         instance = self._create_instance(response=response)
         return instance
 
-    def version(self, version: int = 1, env: str = "sandbox") -> 'ProxyConfig':
+    def latest_if_changed(self, env: str = "sandbox", etag: str = None) \
+            -> Tuple[Optional['ProxyConfig'], Optional[str]]:
+        """Get latest proxy configuration unless it matches the ETag (conditional request)
+        Args:
+            env(str): sandbox or production
+            etag(str): ETag of the previously seen latest config
+        Returns(tuple): (config, ETag); config is None when not modified since etag
+            or when there is no config in the environment yet
+        """
+        headers = {'If-None-Match': etag} if etag else None
+        response = self.rest.get(url=self._env_url(env) + '/latest', headers=headers,
+                                 throws=False)
+        if response.status_code == 304:
+            return None, etag
+        if response.status_code == 404:
+            return None, None
+        if not response.ok:
+            raise errors.ApiClientError(response.status_code, response.reason, response.content)
+        return self._create_instance(response=response), response.headers.get('ETag')
+
+    def wait_for_version(self, version: int, env: str = "sandbox", etag: str = None,
+                         timeout: float = 300, interval: float = 0.5,
+                         max_interval: float = 10) -> 'ProxyConfig':
+        """Poll latest config of the environment until it reaches the version
+        Polls are conditional requests (If-None-Match) backing off exponentially.
+        Args:
+            version(int): Awaited version
+            env(str): sandbox or production
+            etag(str): ETag of the latest config seen before
+            timeout(float): Maximal time to wait in seconds
+            interval(float): Initial pause between polls in seconds
+            max_interval(float): Maximal pause between polls in seconds
+        Returns(ProxyConfig): Latest config of at least the version
+        Raises:
+            errors.WaitTimeout: The version did not appear in time
+        """
+        seen = {'etag': etag}
+
+        def check():
+            config, seen['etag'] = self.latest_if_changed(env, seen['etag'])
+            if config is not None and config['version'] >= version:
+                return config
+            return None
+
+        log.info("[WAIT] %s %s version %s", self.service, env, version)
+        return utils.poll(check, timeout=timeout, interval=interval, max_interval=max_interval,
+                          what=f"{env} proxy config version {version}")
+
+    def promote_and_wait(self, version: int = None, from_env: str = 'sandbox',
+                         to_env: str = 'production', timeout: float = 300,
+                         interval: float = 0.5, max_interval: float = 10, probe=None,
+                         probe_path: str = '/',
+                         probe_check: Callable[[requests.Response], bool] = None) \
+            -> 'ProxyConfig':
+        """Promote config and wait until it is the latest config of the target environment
+        Args:
+            version(int): Version to promote, the latest one of from_env if None
+            from_env(str): Source environment
+            to_env(str): Target environment
+            timeout(float): Maximal time to wait in seconds (including probing)
+            interval(float): Initial pause between polls in seconds
+            max_interval(float): Maximal pause between polls in seconds
+            probe: utils.HttpClient of the target gateway or callable returning True
+                once the new version serves traffic, None == no probing
+            probe_path(str): Path requested by the HttpClient probe
+            probe_check: Callable telling whether the probe response comes from the new
+                version, defaults to successful response
+        Returns(ProxyConfig): The promoted config in the target environment
+        Raises:
+            errors.WaitTimeout: The promoted version did not appear (or serve) in time
+        """
+        give_up = time.monotonic() + timeout
+        if version is None:
+            version = self.latest(env=from_env)['version']
+        promoted = self.promote(version=version, from_env=from_env, to_env=to_env)
+        return self.wait_for_promoted(promoted['version'], env=to_env,
+                                      timeout=give_up - time.monotonic(), interval=interval,
+                                      max_interval=max_interval, probe=probe,
+                                      probe_path=probe_path, probe_check=probe_check)
+
+    def wait_for_promoted(self, version: int, env: str = 'production', timeout: float = 300,
+                          interval: float = 0.5, max_interval: float = 10, probe=None,
+                          probe_path: str = '/',
+                          probe_check: Callable[[requests.Response], bool] = None) \
+            -> 'ProxyConfig':
+        """Wait until the promoted version is the latest config and (optionally) serves
+        Args:
+            version(int): Promoted version in the target environment
+            env(str): Target environment
+            timeout(float): Maximal time to wait in seconds (including probing)
+            interval(float): Initial pause between polls in seconds
+            max_interval(float): Maximal pause between polls in seconds
+            probe: utils.HttpClient of the target gateway or callable returning True
+                once the new version serves traffic, None == no probing
+            probe_path(str): Path requested by the HttpClient probe
+            probe_check: Callable telling whether the probe response comes from the new
+                version, defaults to successful response
+        Returns(ProxyConfig): The promoted config in the target environment
+        Raises:
+            errors.WaitTimeout: The promoted version did not appear (or serve) in time
+        """
+        give_up = time.monotonic() + timeout
+        config = self.wait_for_version(version, env=env, timeout=timeout, interval=interval,
+                                       max_interval=max_interval)
+        if probe is not None:
+            _wait_for_probe(probe, probe_path, probe_check, give_up - time.monotonic(),
+                            interval, max_interval)
+        return config
+
+    def version(self, version: int = 1, env: str = "sandbox",
+                cache: 'ProxyConfigCache' = None) -> 'ProxyConfig':
+        """Get proxy configuration of given version
+        Args:
+            version(int): Proxy config version
+            env(str): sandbox or production
+            cache(ProxyConfigCache): Cache of versions, cached ones are not fetched again
+        Returns(ProxyConfig): Proxy config
+        """
         log.info("[VERSION] Get proxy configuration of %s of version %s", env, version)
         self._env = env
-        url = f'{self.url}/{version}'
+        key = None
+        if cache is not None:
+            key = cache.key(self.threescale_client.url, self.service.entity_id, env, version)
+            entity = cache.get(key)
+            if entity is not None:
+                return self._instantiate(extracted=entity, klass=self._instance_klass)
+        url = f'{self._env_url(env)}/{version}'
         response = self.rest.get(url=url)
         instance = self._create_instance(response=response)
+        if key is not None:
+            cache.store(key, instance.entity)
         return instance
 
+    def versions(self, start: int = 1, end: int = None, env: str = "sandbox",
+                 cache: 'ProxyConfigCache' = None, max_workers: int = 8) -> List['ProxyConfig']:
+        """Get range of proxy config versions concurrently
+        Args:
+            start(int): First version
+            end(int): Last version (inclusive), the latest one if None
+            env(str): sandbox or production
+            cache(ProxyConfigCache): Cache of versions, cached ones are not fetched again
+            max_workers(int): Number of concurrent fetches
+        Returns(List[ProxyConfig]): Proxy configs ordered by version
+        """
+        if end is None:
+            end = self.latest(env=env)['version']
+        configs = {}
+        for version, config, error in utils.run_parallel(
+                lambda number: self.version(number, env=env, cache=cache),
+                range(start, end + 1), max_workers=max_workers):
+            if error is not None:
+                raise error
+            configs[version] = config
+        return [configs[version] for version in sorted(configs)]
+
+    def diff(self, old: Union[int, str, 'ProxyConfig'], new: Union[int, str, 'ProxyConfig'],
+             env: str = "sandbox", new_env: str = None, summary: bool = False,
+             cache: 'ProxyConfigCache' = None) -> 'proxy_diff.ConfigDiff':
+        """Structural diff of two proxy config versions
+        Usage:
+            configs.diff(3, 'latest').lines()
+            configs.diff('latest', 'latest', env='production', new_env='sandbox',
+                         summary=True).summary()
+        Args:
+            old: Old version number, 'latest' or ProxyConfig
+            new: New version number, 'latest' or ProxyConfig
+            env(str): Environment of the old (and new) version
+            new_env(str): Environment of the new version, defaults to env
+            summary(bool): Whether to skip field level differences of changed items
+            cache(ProxyConfigCache): Cache of versions
+        Returns(proxy_diff.ConfigDiff): Differences
+        """
+        requested = {'old': (old, env), 'new': (new, new_env or env)}
+
+        def get(name):
+            version, version_env = requested[name]
+            if isinstance(version, ProxyConfig):
+                return version
+            if version == 'latest':
+                return self.latest(env=version_env)
+            return self.version(version, env=version_env, cache=cache)
+
+        configs = {}
+        for name, config, error in utils.run_parallel(get, requested, max_workers=2):
+            if error is not None:
+                raise error
+            configs[name] = config
+        from threescale_api import proxy_diff  # pylint: disable=import-outside-toplevel
+        return proxy_diff.diff(configs['old'], configs['new'], summary=summary)
+
+
+def _wait_for_probe(probe, path: str, check: Callable[[requests.Response], bool],
+                    timeout: float, interval: float, max_interval: float):
+    """Wait until the gateway probe succeeds
+    Unreachable gateway (e.g. still starting) is not ready yet. HttpClient probe requests
+    are not retried by the client and are limited by the time left.
+    """
+    check = check or (lambda response: response.ok)
+    client = probe.without_retries() if isinstance(probe, utils.HttpClient) else None
+    give_up = time.monotonic() + timeout
+
+    def request():
+        try:
+            with utils.deadline(give_up - time.monotonic()):
+                return check(client.get(path))
+        except (requests.RequestException, errors.DeadlineExceeded) as err:
+            log.debug("[WAIT] Gateway not ready: %s", err)
+            return False
+
+    log.info("[WAIT] Probing gateway")
+    try:
+        utils.poll(probe if client is None else request, timeout=max(timeout, 0),
+                   interval=interval, max_interval=max_interval, what="gateway probe")
+    finally:
+        if client is not None:
+            client.close()
+
 
 class SettingsClient(DefaultClient):
     def __init__(self, *args, entity_name='settings', **kwargs):
@@ -916,8 +1796,24 @@ class InvoiceState(Enum):
     OPEN = "open"
 
 
+class PdfDownload(NamedTuple):
+    """Result of downloading PDF of one invoice by Invoices.download_pdfs"""
+    invoice: 'Invoice'
+    path: Optional[str] = None
+    downloaded: bool = False
+    size: int = 0
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class Invoices(DefaultPaginationClient):
-    """Default client for Invoices"""
+    """Default client for Invoices
+    Invoice listings return at most 20 invoices per page whatever per_page is asked
+    for, hence the page size; pages are fetched concurrently by `export` instead.
+    """
     def __init__(self, *args, entity_name='invoice', entity_collection='invoices',
                  per_page=20, **kwargs):
         super().__init__(*args, entity_name=entity_name,
@@ -932,11 +1828,212 @@ class Invoices(DefaultPaginationClient):
         return LineItems(parent=self, instance_klass=LineItem)
 
     def list_by_account(self, account: Union['Account', int], **kwargs):
+        url = self._account_url(account)
+        if 'page' in (kwargs.get('params') or {}):
+            response = self.rest.get(url, **kwargs)
+            return self._create_instance(response=response, collection=True)
+        return [invoice for _, page in self.pages(url=url, **kwargs) for invoice in page]
+
+    def export(self, path: str, fmt: str = None, compress: bool = None,
+               account: Union['Account', int] = None, line_items: bool = True,
+               payment_transactions: bool = True, max_workers: int = 8, page_workers: int = 4,
+               checkpoint: str = None, **kwargs) -> int:
+        """Stream invoices into JSON lines or CSV file
+        Pages of invoices are fetched concurrently, line items and payment transactions
+        of every page by a bounded pool; records are written as soon as the page is
+        complete, so only a few pages are held in memory.
+        With checkpoint, progress is saved after every page and an interrupted export
+        continues from the last saved page; the checkpoint is removed when finished.
+        Usage:
+            api.invoices.export('invoices.csv.gz', checkpoint='invoices.checkpoint',
+                                params=dict(state='paid', month='2024-01'))
+        Args:
+            path(str): Output file, format/compression detected from name (.jsonl, .csv, .gz)
+            fmt(str): jsonl or csv
+            compress(bool): Whether to gzip the output
+            account: Export invoices of the account only
+            line_items(bool): Whether to include line items of every invoice
+            payment_transactions(bool): Whether to include payment transactions
+            max_workers(int): Number of concurrent line items/transactions requests
+            page_workers(int): Number of invoice pages fetched concurrently
+            checkpoint(str): Checkpoint file path
+            **kwargs: Optional args of the listing request (e.g. params)
+        Returns(int): Number of exported invoices
+        """
+        from threescale_api import export  # pylint: disable=import-outside-toplevel
+        progress = export.Checkpoint(checkpoint) if checkpoint else None
+        state = (progress.load() if progress else None) or {}
+        if state:
+            log.info("[Invoice] Resuming export to %s after page %s", path, state['page'])
+        url = self._account_url(account) if account is not None else None
+        count = state.get('count', 0)
+        writer = export.RecordWriter(path, fmt=fmt, compress=compress,
+                                     fieldnames=state.get('fieldnames'),
+                                     offset=state.get('offset'))
+        with writer, self.rest.bulk_lane():
+            for pagenum, page in self.pages(url=url, start=state.get('page', 0) + 1,
+                                            max_workers=page_workers, **kwargs):
+                records = self._export_records(page, line_items, payment_transactions,
+                                               max_workers)
+                writer.write_many(records)
+                count += len(records)
+                offset = writer.commit()
+                if progress:
+                    progress.save(dict(page=pagenum, offset=offset, count=count,
+                                       fieldnames=writer.fieldnames))
+        if progress:
+            progress.clear()
+        log.info("[Invoice] Exported %s invoices to %s", count, path)
+        return count
+
+    @staticmethod
+    def _export_records(invoices: List['Invoice'], line_items: bool,
+                        payment_transactions: bool, max_workers: int) -> List[dict]:
+        def record(invoice: 'Invoice') -> dict:
+            data = dict(invoice.entity)
+            if line_items:
+                data['line_items'] = [item.entity for item in invoice.line_items.list()]
+            if payment_transactions:
+                data['payment_transactions'] = [
+                    transaction.entity for transaction in invoice.payment_transactions.list()]
+            return data
+
+        if not (line_items or payment_transactions):
+            return [record(invoice) for invoice in invoices]
+        records = {}
+        for index, data, error in utils.run_parallel(
+                lambda index: record(invoices[index]), range(len(invoices)),
+                max_workers=max_workers):
+            if error is not None:
+                raise error
+            records[index] = data
+        return [records[index] for index in range(len(invoices))]
+
+    def download_pdf(self, invoice: 'Invoice', directory: str = '.', filename: str = None,
+                     checksum: bool = False, chunk_size: int = 64 * 1024) -> PdfDownload:
+        """Stream PDF of the invoice to disk, skip it when the same file is already there
+        Args:
+            invoice(Invoice): Invoice
+            directory(str): Target directory
+            filename(str): File name, defaults to <friendly_id>.pdf
+            checksum(bool): Whether to compare checksums (ETag), not only sizes
+            chunk_size(int): Size of chunks written to the disk
+        Returns(PdfDownload): Result of the download; error is set when the invoice
+            has no PDF or the download failed
+        """
+        path = os.path.join(directory, filename or f"{invoice['friendly_id']}.pdf")
+        pdf_url = invoice.entity.get('pdf_url')
+        if not pdf_url:
+            return PdfDownload(invoice, path, error=errors.ThreeScaleApiError(
+                f"Invoice {invoice.entity_id} has no PDF"))
+        try:
+            downloaded, size = utils.download(
+                self.rest.session, urljoin(self.threescale_client.url, pdf_url), path,
+                chunk_size=chunk_size, checksum=checksum, timeout=self.rest.timeout,
+                verify=self.rest.ssl_verify)
+        except (errors.ThreeScaleApiError, requests.RequestException, OSError) as err:
+            log.warning("[Invoice] PDF of invoice (%s) failed: %s", invoice.entity_id, err)
+            return PdfDownload(invoice, path, error=err)
+        log.debug("[Invoice] PDF of invoice (%s) %s", invoice.entity_id,
+                  "downloaded" if downloaded else "up to date")
+        return PdfDownload(invoice, path, downloaded, size)
+
+    def download_pdfs(self, invoices: Iterable['Invoice'] = None, directory: str = '.',
+                      max_workers: int = 8, checksum: bool = False,
+                      filename: Callable[['Invoice'], str] = None,
+                      **kwargs) -> Iterator[PdfDownload]:
+        """Download PDFs of many invoices concurrently
+        Usage:
+            for result in api.invoices.download_pdfs(directory='pdfs',
+                                                     params=dict(month='2024-01')):
+                if not result.ok:
+                    print(result.invoice['friendly_id'], result.error)
+        Args:
+            invoices: Invoices to download, all invoices are listed if missing
+            directory(str): Target directory, created if missing
+            max_workers(int): Number of concurrent downloads
+            checksum(bool): Whether to compare checksums (ETag), not only sizes
+            filename: Callable returning file name of the invoice
+            **kwargs: Optional args of the listing when invoices are missing
+        Returns(Iterator[PdfDownload]): Results in order of completion
+        """
+        os.makedirs(directory, exist_ok=True)
+        if invoices is None:
+            invoices = (invoice for _, page in self.pages(**kwargs) for invoice in page)
+
+        def download(invoice):
+            return self.download_pdf(invoice, directory, checksum=checksum,
+                                     filename=filename(invoice) if filename else None)
+
+        for invoice, result, error in utils.run_parallel(download, invoices,
+                                                         max_workers=max_workers):
+            yield result if error is None else PdfDownload(invoice, error=error)
+
+    def billing_state(self, month: str, page_workers: int = 4) -> Dict[int, Dict[int, tuple]]:
+        """Get invoices of the month by account, to tell later which ones billing changed
+        Args:
+            month(str): Month as YYYY-MM
+            page_workers(int): Number of invoice pages fetched concurrently
+        Returns(dict): Account id -> invoice id -> (state, updated_at)
+        """
+        state: Dict[int, Dict[int, tuple]] = {}
+        for _, page in self.pages(max_workers=page_workers, params=dict(month=month)):
+            for invoice in page:
+                state.setdefault(invoice['account_id'], {})[invoice.entity_id] = \
+                    (invoice['state'], invoice['updated_at'])
+        return state
+
+    def wait_for_billing(self, report: BillingReport, timeout: float = 600,
+                         interval: float = 10, page_workers: int = 4) -> BillingReport:
+        """Poll invoices of the billed month until all triggered accounts have one
+        Every round is a single (concurrently paged) listing of the month's invoices,
+        not a request per account. Must be called on the admin API of the billed tenant.
+        With `report.before` (see Tenants.trigger_billing_accounts) only invoices which
+        are new or changed (state, updated_at) since then count, otherwise any invoice
+        of the month does, including ones existing before the billing.
+        Args:
+            report(BillingReport): Report of Tenants.trigger_billing_accounts
+            timeout(float): Maximal time to wait in seconds
+            interval(float): Pause between polls in seconds
+            page_workers(int): Number of invoice pages fetched concurrently
+        Returns(BillingReport): The report with invoices filled in
+        Raises:
+            errors.WaitTimeout: Some accounts have no invoice in time, see `report.pending`
+            ValueError: The report is of tenants (Tenants.trigger_billing_many)
+        """
+        if report.scope != BillingReport.ACCOUNTS:
+            raise ValueError("Only billing of accounts can be awaited, "
+                             "use Tenants.trigger_billing_accounts per tenant")
+        before = report.before or {}
+
+        def invoiced() -> bool:
+            triggered = set(report.triggered)
+            invoices: Dict[int, List[int]] = {}
+            state = self.billing_state(report.month, page_workers=page_workers)
+            for account_id, account_invoices in state.items():
+                if account_id not in triggered:
+                    continue
+                old = before.get(account_id, {})
+                changed = [invoice_id for invoice_id, value in account_invoices.items()
+                           if old.get(invoice_id) != value]
+                if changed:
+                    invoices[account_id] = changed
+            report.invoices = invoices
+            log.info("[BILLING] %s of %s accounts invoiced", len(invoices), len(triggered))
+            return not report.pending
+
+        try:
+            utils.poll(invoiced, timeout, interval=interval, max_interval=interval, factor=1,
+                       what=f"invoices of {len(report.triggered)} accounts")
+        except errors.WaitTimeout:
+            log.warning("[BILLING] %s accounts still without invoice", len(report.pending))
+            raise
+        report.completion_seconds = time.monotonic() - report.started
+        return report
+
+    def _account_url(self, account: Union['Account', int]) -> str:
         account_id = _extract_entity_id(account)
-        url = self.threescale_client.url + f"/api/accounts/{account_id}/invoices"
-        response = self.rest.get(url, **kwargs)
-        instance = self._create_instance(response=response, collection=True)
-        return instance
+        return self.threescale_client.url + f"/api/accounts/{account_id}/invoices"
 
     def read_by_account(self, entity_id: int, account: Union['Account', int], **kwargs):
         account_id = _extract_entity_id(account)
@@ -1000,6 +2097,28 @@ class CmsClient(DefaultPaginationClient):
             extracted = extracted.get(self._entity_collection)
         return extracted
 
+    def create(self, params: dict = None, **kwargs) -> 'DefaultResource':
+        instance = super().create(params=params, **kwargs)
+        self._written(resource=instance)
+        return instance
+
+    def update(self, entity_id=None, params: dict = None, **kwargs) -> 'DefaultResource':
+        instance = super().update(entity_id=entity_id, params=params, **kwargs)
+        self._written(resource=instance)
+        return instance
+
+    def delete(self, entity_id: int = None, **kwargs) -> bool:
+        deleted = super().delete(entity_id=entity_id, **kwargs)
+        if deleted:
+            self._written(deleted_id=entity_id)
+        return deleted
+
+    def _written(self, **kwargs):
+        """Apply the write to the CMS tree, only when the Cms facade was already used"""
+        cms = vars(self.threescale_client).get('cms')
+        if cms is not None:
+            cms.written(self, **kwargs)
+
     def select_by(self, **params):
         """Select by params - logical "and" Usage example: select_by(role='admin')
         Filtering by some params can be done on the backend.
@@ -1016,6 +2135,9 @@ class CmsClient(DefaultPaginationClient):
             **params: params used for selection
         Returns: List of resources
         """
+        return self._select_by(params)
+
+    def _select_by(self, params: dict, **kwargs):
         log.debug("[SELECT] By params: %s", params)
 
         filters = {fil: params.pop(fil) for fil in self.FILTERS if fil in params}
@@ -1026,8 +2148,19 @@ class CmsClient(DefaultPaginationClient):
                     return False
             return True
         if filters:
-            return self.select(predicate=predicate, params=filters)
-        return self.select(predicate=predicate)
+            kwargs['params'] = filters
+        return self.select(predicate=predicate, **kwargs)
+
+
+class CmsFileUpload(NamedTuple):
+    """Result of uploading one file by CmsFiles.upload_many"""
+    path: str
+    file: Optional['CmsFile'] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class CmsFiles(CmsClient):
@@ -1042,6 +2175,67 @@ class CmsFiles(CmsClient):
     def url(self) -> str:
         return self.threescale_client.admin_api_url + '/cms/files'
 
+    def upload(self, path: str, file, section_id: int = None, entity_id: int = None,
+               progress: Callable[[int, int], Any] = None, chunk_size: int = 64 * 1024,
+               **fields) -> 'CmsFile':
+        """Create file (or replace the existing one) streaming the content in chunks
+        Unlike `create`, the content is never loaded into memory as a whole.
+        Usage:
+            api.cms_files.upload('/media/intro.mp4', 'build/intro.mp4', section_id=1,
+                                 progress=lambda sent, total: print(f'{sent}/{total}'))
+        Args:
+            path(str): CMS path of the file
+            file: Local file path or binary file object
+            section_id(int): Section of the file
+            entity_id(int): Id of the existing file to replace, new file is created if None
+            progress: Callable receiving (bytes sent, total bytes) while uploading
+            chunk_size(int): Size of chunks read from the file
+            **fields: Other form fields (e.g. tag_list, downloadable)
+        Returns(CmsFile): Uploaded file
+        """
+        log.info(self._log_message("[UPLOAD] Upload ", entity_id=entity_id,
+                                   args=dict(path=path, section_id=section_id)))
+        response = self.rest.upload(
+            'POST' if entity_id is None else 'PUT', url=self._entity_url(entity_id),
+            fields=dict(path=path, section_id=section_id, **fields),
+            files={'attachment': (posixpath.basename(path), file)},
+            progress=progress, chunk_size=chunk_size)
+        instance = self._create_instance(response=response)
+        self._written(resource=instance)
+        return instance
+
+    def upload_many(self, files: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+                    section_id: int = None, replace: bool = True, max_workers: int = 4,
+                    progress: Callable[[str, int, int], Any] = None,
+                    **fields) -> Iterator[CmsFileUpload]:
+        """Upload many files concurrently, streaming each of them in chunks
+        Usage:
+            for result in api.cms_files.upload_many({'/sdk/sdk.zip': 'dist/sdk.zip'}):
+                if not result.ok:
+                    print(result.path, result.error)
+        Args:
+            files: CMS path -> local file path or binary file object (dict or pairs)
+            section_id(int): Section of the files
+            replace(bool): Whether to replace files existing on the same paths,
+                otherwise creation of such file fails
+            max_workers(int): Number of concurrent uploads
+            progress: Callable receiving (CMS path, bytes sent, total bytes) while uploading
+            **fields: Other form fields of all the files
+        Returns(Iterator[CmsFileUpload]): Results in order of completion
+        """
+        existing = {item['path']: item['id'] for item in self.list()} if replace else {}
+
+        def upload(item):
+            path, file = item
+            return self.upload(path, file, section_id=section_id, entity_id=existing.get(path),
+                               progress=functools.partial(progress, path) if progress else None,
+                               **fields)
+
+        items = files.items() if isinstance(files, dict) else files
+        for (path, _), result, error in utils.run_parallel(upload, items,
+                                                           max_workers=max_workers):
+            yield CmsFileUpload(path, result, error)
+
 
 class CmsSections(CmsClient):
     FILTERS = ['section_id']
@@ -1073,32 +2267,49 @@ class CmsTemplates(CmsClient):
         url = self._entity_url(entity_id) + '/publish'
         response = self.rest.put(url=url, **kwargs)
         instance = self._create_instance(response=response)
+        self._written(resource=instance)
         return instance
 
-    def list(self, **kwargs) -> List['DefaultResource']:
+    def list(self, content: bool = True, **kwargs) -> List['DefaultResource']:
         """List all entities
         Args:
+            content(bool): Whether to list content (draft, published) as well;
+                without it content of a template is fetched on its first access
             **kwargs: Optional parameters
         Returns(List['DefaultResource]): List of resources
         """
         log.info(self._log_message("[LIST] List", args=kwargs))
-        kwargs.setdefault("params", {})
-        kwargs["params"].setdefault("content", "true")
-        kwargs["params"].setdefault("type", self._entity_name)
-        instance = self._list(**kwargs)
-        return instance
+        return self._list_templates(content, **kwargs)
 
-    def select(self, predicate, **kwargs) -> List['DefaultResource']:
+    def select(self, predicate, content: bool = True, **kwargs) -> List['DefaultResource']:
         """Select resource s based on the predicate
         Args:
             predicate: Predicate
+            content(bool): Whether to list content (draft, published) as well
             **kwargs: Optional args
         Returns: List of resources
         """
+        return [item for item in self._list_templates(content, **kwargs) if predicate(item)]
+
+    def select_by(self, content: bool = True, **params):
+        """Select by params - logical "and", see CmsClient.select_by
+        Args:
+            content(bool): Whether to list content (draft, published) as well
+            **params: params used for selection
+        Returns: List of resources
+        """
+        return self._select_by(params, content=content)
+
+    def _list_templates(self, content: bool, **kwargs) -> List['DefaultResource']:
         kwargs.setdefault("params", {})
-        kwargs["params"].setdefault("content", "true")
+        if content:
+            kwargs["params"].setdefault("content", "true")
         kwargs["params"].setdefault("type", self._entity_name)
-        return [item for item in self._list(**kwargs) if predicate(item)]
+        instances = self._list(**kwargs)
+        if kwargs["params"].get("content") != "true":
+            for instance in instances:
+                instance.content_pending = True
+        return instances
 
     def create(self, params: dict = None,
                *args, **kwargs) -> 'DefaultResource':
@@ -1280,6 +2491,9 @@ class Proxy(DefaultResource):
     def promote(self, **kwargs) -> 'Proxy':
         return self.configs.promote(**kwargs)
 
+    def promote_and_wait(self, **kwargs) -> 'ProxyConfig':
+        return self.configs.promote_and_wait(**kwargs)
+
     @property
     def policies_registry(self) -> PoliciesRegistry:
         return PoliciesRegistry(parent=self, instance_klass=PolicyRegistry)
@@ -1287,6 +2501,9 @@ class Proxy(DefaultResource):
     def deploy(self) -> 'Proxy':
         return self.client.deploy()
 
+    def deploy_and_wait(self, **kwargs) -> 'ProxyConfig':
+        return self.client.deploy_and_wait(**kwargs)
+
 
 class Service(DefaultResource):
     AUTH_USER_KEY = "1"
@@ -1369,21 +2586,35 @@ class Tenant(DefaultResource):
     def entity_id(self) -> int:
         return self.entity["signup"]["account"]["id"]
 
-    def wait_tenant_ready(self) -> bool:
+    def wait_tenant_ready(self, timeout: float = 540,
+                          registry: 'ClientRegistry' = None) -> bool:
         """
         When True is returned, there is some chance the tenant is actually ready.
+        Args:
+            timeout(float): Seconds to wait at most
+            registry(ClientRegistry): Registry to take the admin api client from
         """
         # Ignore ssl, this is about checking whether the initialization has
         # been finished.
-        return self.admin_api(ssl_verify=False).wait_for_tenant()
+        return self.admin_api(ssl_verify=False, registry=registry).wait_for_tenant(timeout=timeout)
 
-    def admin_api(self, ssl_verify=True, wait=-1) -> 'client.ThreeScaleClient':
+    def admin_api(self, ssl_verify: bool = None, wait: int = None,
+                  registry: 'ClientRegistry' = None) -> 'client.ThreeScaleClient':
         """
         Returns admin api client for tenant.
         Its strongly recommended to call this with wait=True
+        When registry is given, cached client (sharing connection pool) is returned,
+        args not given here are those of the registry.
+        Args:
+            ssl_verify(bool): Whether to verify ssl, None == registry or client default (True)
+            wait(int): See ThreeScaleClient, None == registry or client default (-1)
+            registry(ClientRegistry): Registry to take the client from
         """
-        return client.ThreeScaleClient(
-            self.admin_base_url, self.admin_token, ssl_verify=ssl_verify, wait=wait)
+        kwargs = {name: value for name, value in
+                  (('ssl_verify', ssl_verify), ('wait', wait)) if value is not None}
+        if registry is not None:
+            return registry.get(self.admin_base_url, self.admin_token, **kwargs)
+        return client.ThreeScaleClient(self.admin_base_url, self.admin_token, **kwargs)
 
     def trigger_billing(self, date: str):
         """Trigger billing for whole tenant
@@ -1404,6 +2635,28 @@ class Tenant(DefaultResource):
         """
         return self.threescale_client.tenants.trigger_billing_account(self, account, date)
 
+    def trigger_billing_accounts(self, accounts: Iterable[Union['Account', int]], date: str,
+                                 wait: bool = False, timeout: float = 600,
+                                 **kwargs) -> 'BillingReport':
+        """Trigger billing for many accounts of this tenant concurrently
+        Args:
+            accounts: Account ids or account resources
+            date: Date for billing
+            wait(bool): Whether to wait until all accounts have new or changed invoices
+            timeout(float): Maximal time to wait in seconds
+            **kwargs: Optional args of Tenants.trigger_billing_accounts (max_workers, rate)
+        Returns(BillingReport): Progress of the billing
+        Raises:
+            errors.WaitTimeout: With wait, some accounts have no invoice in time
+        """
+        if not wait:
+            return self.threescale_client.tenants.trigger_billing_accounts(
+                self, accounts, date, **kwargs)
+        invoices = self.admin_api().invoices
+        report = self.threescale_client.tenants.trigger_billing_accounts(
+            self, accounts, date, invoices=invoices, **kwargs)
+        return invoices.wait_for_billing(report, timeout=timeout)
+
     def plan_upgrade(self, plan_id):
         """Upgrade plan to given plan_id"""
         return self.client.rest.put(f"{self.url}/plan_upgrade", params={"plan_id": plan_id})
@@ -1630,9 +2883,13 @@ class BackendUsage(DefaultResource):
 
     @property
     def backend(self) -> 'Backend':
-        return Backend(
-            client=Backends(parent=self, instance_klass=Backend),
-            entity_id=self['backend_id'])
+        return self.threescale_client.backends.read(self['backend_id'])
+
+
+def _tenant_label(tenant: Union['Tenant', 'client.ThreeScaleClient']) -> str:
+    if isinstance(tenant, client.ThreeScaleClient):
+        return tenant.url
+    return str(tenant.entity_id)
 
 
 def _extract_entity_id(entity: Union['DefaultResource', int]):
@@ -1730,6 +2987,9 @@ class Invoice(DefaultResource):
     def payment_transactions(self) -> 'PaymentTransactions':
         return PaymentTransactions(parent=self, instance_klass=PaymentTransaction)
 
+    def download_pdf(self, directory: str = '.', **kwargs) -> PdfDownload:
+        return self.client.download_pdf(self, directory=directory, **kwargs)
+
 
 class PaymentTransaction(DefaultResource):
     def __init__(self, entity_name='name', **kwargs):
@@ -1764,9 +3024,31 @@ class CmsSection(DefaultResource):
 
 
 class CmsTemplate(DefaultResource):
-    """ Resource for templates """
+    """ Resource for templates
+    Templates listed with content=False carry metadata only (content_pending is set),
+    their content is fetched on first access to one of CONTENT_FIELDS.
+    """
+    CONTENT_FIELDS = ('draft', 'published')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.content_pending = False
+
+    def __getitem__(self, item: str):
+        self._load_content(item)
+        return super().__getitem__(item)
+
+    def get(self, item):
+        self._load_content(item)
+        return super().get(item)
+
+    def _load_content(self, item: str):
+        if item in self.CONTENT_FIELDS and self.content_pending:
+            log.debug("[CMS] Load content of template (%s)", self.entity_id)
+            fetched = self.fetch()
+            for field in self.CONTENT_FIELDS:
+                self.entity.setdefault(field, fetched.get(field))
+            self.content_pending = False
 
     def publish(self, **kwargs):
         """ Publish template resource """
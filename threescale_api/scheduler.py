@@ -0,0 +1,181 @@
+"""Scheduling of admin API requests in named lanes with concurrency caps and priorities"""
+
+import bisect
+import contextlib
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from threescale_api import errors
+
+log = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+_current_lane: contextvars.ContextVar = contextvars.ContextVar('threescale_lane', default=None)
+
+
+class Lane:
+    """Lane of the scheduler with its own concurrency cap and metrics"""
+
+    def __init__(self, name: str, max_concurrency: Optional[int] = None, priority: int = 0):
+        """Creates instance of the lane
+        Args:
+            name(str): Lane name
+            max_concurrency(int): Maximal number of requests in flight, None == unlimited
+            priority(int): Lower number is served first
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.priority = priority
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.requests = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def has_room(self) -> bool:
+        return self.max_concurrency is None or self.in_flight < self.max_concurrency
+
+    def metrics(self) -> dict:
+        """Returns(dict): Snapshot of lane metrics"""
+        return {
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'requests': self.requests,
+            'wait_time_total': self.wait_time_total,
+            'wait_time_max': self.wait_time_max,
+            'wait_time_avg': self.wait_time_total / self.requests if self.requests else 0.0,
+        }
+
+
+class RequestScheduler:
+    """Admits requests by lanes
+    Each lane has its own concurrency cap; when the global cap is reached, waiting
+    requests of the lane with the lowest priority number are admitted first.
+    By default there is an uncapped `interactive` lane and a `bulk` lane capped
+    to 2 concurrent requests which paginated listings use unless told otherwise.
+    """
+
+    def __init__(self, lanes: Dict[str, dict] = None, max_concurrency: Optional[int] = None,
+                 default_lane: str = INTERACTIVE, bulk_lane: str = None):
+        """Creates instance of the scheduler
+        Args:
+            lanes(dict): Lane name -> dict(max_concurrency=..., priority=...)
+            max_concurrency(int): Global cap of requests in flight, None == unlimited
+            default_lane(str): Lane used for requests without explicit lane
+            bulk_lane(str): Lane of bulk work (paginated listings, exports), defaults to
+                `bulk` when the scheduler has such lane, otherwise to the default lane
+        """
+        if lanes is None:
+            lanes = {INTERACTIVE: dict(priority=0), BULK: dict(max_concurrency=2, priority=10)}
+        self._lanes = {name: Lane(name, **params) for name, params in lanes.items()}
+        if default_lane not in self._lanes:
+            raise ValueError(f"Unknown default lane '{default_lane}'")
+        if bulk_lane is not None and bulk_lane not in self._lanes:
+            raise ValueError(f"Unknown bulk lane '{bulk_lane}'")
+        self.max_concurrency = max_concurrency
+        self.default_lane = default_lane
+        self.bulk_lane = bulk_lane or (BULK if BULK in self._lanes else default_lane)
+        self._in_flight = 0
+        self._waiters: list = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def lanes(self) -> Dict[str, Lane]:
+        return self._lanes
+
+    @staticmethod
+    @contextlib.contextmanager
+    def lane(name: str, override: bool = True) -> Iterator[None]:
+        """Run requests issued within the context in given lane
+        Args:
+            name(str): Lane name
+            override(bool): Whether to replace lane set by an outer context
+        """
+        if not override and _current_lane.get() is not None:
+            yield
+            return
+        token = _current_lane.set(name)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    def current_lane(self) -> str:
+        """Returns(str): Lane of the current context"""
+        return _current_lane.get() or self.default_lane
+
+    @contextlib.contextmanager
+    def slot(self, lane: str = None, timeout: Optional[float] = None) -> Iterator[None]:
+        """Wait for a free slot in the lane and hold it for the duration of the context
+        Args:
+            lane(str): Lane name, defaults to lane of the current context
+            timeout(float): Seconds to wait for the slot at most, None == no limit
+        Raises(errors.DeadlineExceeded): when no slot was free in time
+        """
+        name = lane or self.current_lane()
+        if name not in self._lanes:
+            raise ValueError(f"Unknown scheduler lane '{name}'")
+        obj = self._lanes[name]
+        waiter = (obj.priority, next(self._counter), obj)
+        started = time.monotonic()
+        with self._cond:
+            self._insort(waiter)
+            obj.queue_depth += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self._can_run(waiter), timeout=timeout)
+            finally:
+                self._waiters.remove(waiter)
+                obj.queue_depth -= 1
+            if not admitted:
+                # leaving the queue may unblock waiters behind this one
+                self._cond.notify_all()
+                raise errors.DeadlineExceeded(
+                    f"Operation deadline exceeded waiting for a slot in lane {name}")
+            waited = time.monotonic() - started
+            obj.in_flight += 1
+            obj.requests += 1
+            obj.wait_time_total += waited
+            obj.wait_time_max = max(obj.wait_time_max, waited)
+            self._in_flight += 1
+            # admitting this one may unblock other lanes
+            self._cond.notify_all()
+        if waited > 1:
+            log.debug("[SCHEDULER] Request waited %.2fs in lane %s", waited, name)
+        try:
+            yield
+        finally:
+            with self._cond:
+                obj.in_flight -= 1
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, dict]:
+        """Returns(dict): Lane name -> metrics snapshot"""
+        with self._cond:
+            return {name: lane.metrics() for name, lane in self._lanes.items()}
+
+    def _insort(self, waiter):
+        keys = [item[:2] for item in self._waiters]
+        self._waiters.insert(bisect.bisect(keys, waiter[:2]), waiter)
+
+    def _can_run(self, waiter) -> bool:
+        lane = waiter[2]
+        if not lane.has_room:
+            return False
+        if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+            return False
+        for other in self._waiters:
+            if other is waiter:
+                return True
+            # earlier waiter of the same lane or of a more important lane goes first
+            if other[2] is lane or other[2].has_room:
+                return False
+        return True
@@ -0,0 +1,225 @@
+"""Parallel export of the whole tenant configuration into JSON lines files"""
+
+import collections
+import gzip
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from threescale_api import utils
+from threescale_api.defaults import DefaultPaginationClient
+from threescale_api.export import Checkpoint, RecordWriter
+
+if TYPE_CHECKING:
+    from threescale_api.client import ThreeScaleClient
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT = '.checkpoint.json'
+
+# entity type -> entity types listed for every exported entity of the type
+GRAPH: Dict[str, Tuple[str, ...]] = {
+    'services': ('metrics', 'mapping_rules', 'app_plans', 'policies', 'backend_usages'),
+    'backends': ('metrics', 'mapping_rules'),
+    'metrics': ('methods',),
+    'app_plans': ('limits', 'pricing_rules'),
+    'accounts': (),
+}
+ROOTS = ('services', 'backends', 'accounts')
+
+# task is (entity type, ((parent type, parent id), ...)), e.g. ('methods',
+# (('services', 7), ('metrics', 12))) lists methods of metric 12 of service 7
+Task = Tuple[str, Tuple[Tuple[str, int], ...]]
+
+
+class SnapshotReport:
+    """Result of Snapshot.run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.counts: Dict[str, int] = collections.Counter()
+        self.failed: Dict[str, Exception] = {}
+        self.resumed = False
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def as_dict(self) -> dict:
+        """Returns(dict): Number of exported entities by type"""
+        return {'entities': dict(self.counts), 'failed': len(self.failed),
+                'resumed': self.resumed, 'seconds': self.seconds}
+
+
+class Snapshot:
+    """Export of services, backends and accounts with their metrics, methods, mapping
+    rules, application plans, limits, pricing rules, policies and backend usages
+    The resource graph is crawled by a bounded pool of workers; every entity is written,
+    as soon as its listing is done, into <path>/<entity type>.jsonl with ids of its
+    parents in `_parents`. Progress is checkpointed after every listing, an interrupted
+    export continues where it stopped; failed listings are retried by the next run.
+    Usage:
+        report = api.export('backup/')
+    """
+
+    def __init__(self, threescale_client: 'ThreeScaleClient', path: str,
+                 max_workers: int = 8, page_workers: int = 1, compress: bool = False):
+        """Creates instance of the snapshot
+        Args:
+            threescale_client(ThreeScaleClient): Client of the tenant
+            path(str): Output directory, created if missing
+            max_workers(int): Number of listings running concurrently
+            page_workers(int): Number of pages of one listing fetched concurrently
+            compress(bool): Whether to gzip the files (<entity type>.jsonl.gz)
+        """
+        self.threescale_client = threescale_client
+        self.path = path
+        self.max_workers = max_workers
+        self.page_workers = page_workers
+        self.compress = compress
+        self._checkpoint = Checkpoint(os.path.join(path, CHECKPOINT))
+        self._writers: Dict[str, RecordWriter] = {}
+        self._offsets: Dict[str, int] = {}
+
+    def run(self, resume: bool = True) -> SnapshotReport:
+        """Run (or continue) the export
+        Args:
+            resume(bool): Whether to continue an interrupted export, otherwise start over
+        Returns(SnapshotReport): Report of the export
+        """
+        os.makedirs(self.path, exist_ok=True)
+        report = SnapshotReport(self.path)
+        state = self._checkpoint.load() if resume else None
+        if state is not None and state.get('compress') != self.compress:
+            log.info("[SNAPSHOT] Compression differs from the interrupted export, starting over")
+            state = None
+        report.resumed = state is not None
+        if state is None:
+            state = {'offsets': {}, 'pending': {_key(task): task for task in
+                                                ((kind, ()) for kind in ROOTS)}}
+        pending = {key: _task(task) for key, task in state['pending'].items()}
+        self._offsets = dict(state['offsets'])
+        kinds = set(ROOTS).union(*GRAPH.values())
+        try:
+            for kind in kinds:
+                self._writers[kind] = self._writer(kind, self._offsets.get(kind))
+            self._crawl(pending, report)
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers = {}
+        if report.ok:
+            self._checkpoint.clear()
+        report.seconds = time.monotonic() - report.started
+        log.info("[SNAPSHOT] Exported %s entities (%s listings failed) in %.1fs",
+                 sum(report.counts.values()), len(report.failed), report.seconds)
+        return report
+
+    def _crawl(self, pending: Dict[str, Task], report: SnapshotReport):
+        queue = collections.deque(pending.values())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while queue or running:
+                while queue and len(running) < 2 * self.max_workers:
+                    task = queue.popleft()
+                    running[utils.submit(executor, self._list, task)] = task
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        log.warning("[SNAPSHOT] Listing of %s failed: %s", _key(task), error)
+                        report.failed[_key(task)] = error
+                        continue
+                    children = self._store(task, future.result(), report)
+                    del pending[_key(task)]
+                    pending.update((_key(child), child) for child in children)
+                    self._save(pending)
+                    queue.extend(children)
+
+    def _store(self, task: Task, entities: List[dict], report: SnapshotReport) -> List[Task]:
+        """Write listed entities, returns listings of their children"""
+        kind, parents = task
+        writer = self._writers[kind]
+        children = []
+        for entity in entities:
+            writer.write(dict(entity, _parents=dict(parents)))
+            for child in GRAPH.get(kind, ()):
+                if child == 'methods' and entity.get('system_name') != 'hits':
+                    continue  # methods belong to hits metric only
+                children.append((child, parents + ((kind, entity['id']),)))
+        self._offsets[kind] = writer.commit()
+        report.counts[kind] += len(entities)
+        return children
+
+    def _save(self, pending: Dict[str, Task]):
+        self._checkpoint.save({'offsets': self._offsets, 'pending': pending,
+                               'compress': self.compress})
+
+    def _writer(self, kind: str, offset: Optional[int]) -> RecordWriter:
+        path = os.path.join(self.path, f'{kind}.jsonl')
+        if self.compress:
+            path, stale = path + '.gz', path
+        else:
+            stale = path + '.gz'
+        if not offset and os.path.exists(stale):
+            os.remove(stale)  # left by previous export of the other format
+        return RecordWriter(path, fmt='jsonl', compress=self.compress, offset=offset or 0)
+
+    def _list(self, task: Task) -> List[dict]:
+        """List entities of the task"""
+        kind, parents = task
+        owner = self._owner(parents)
+        if kind == 'policies':
+            proxy = owner.proxy
+            response = proxy.rest.get(url=f'{proxy.url}/policies')
+            chain = response.json().get('policies_config', [])
+            return [dict(policy, position=position) for position, policy in enumerate(chain)]
+        if kind in ('limits', 'pricing_rules'):
+            response = owner.client.rest.get(url=f'{owner.plans_url}/{kind}')
+            return utils.extract_response(response, entity=kind[:-1], collection=kind)
+        client = getattr(owner, kind)
+        if isinstance(client, DefaultPaginationClient) and client.per_page:
+            return [item.entity for _, page in client.pages(max_workers=self.page_workers)
+                    for item in page]
+        return [item.entity for item in client.list()]
+
+    def _owner(self, parents):
+        """Resource owning the listing, built from ids of its ancestors without fetching them"""
+        owner = self.threescale_client
+        for parent_kind, parent_id in parents:
+            owner = getattr(owner, parent_kind).from_entity({'id': parent_id})
+        return owner
+
+
+def _key(task: Task) -> str:
+    kind, parents = task
+    return '/'.join([f'{parent_kind}/{parent_id}' for parent_kind, parent_id in parents]
+                    + [kind])
+
+
+def _task(value) -> Task:
+    """Task from its JSON form (lists instead of tuples)"""
+    kind, parents = value
+    return kind, tuple((parent_kind, parent_id) for parent_kind, parent_id in parents)
+
+
+def load(path: str, kind: str) -> List[dict]:
+    """Read exported entities of the type
+    Args:
+        path(str): Export directory
+        kind(str): Entity type, e.g. services
+    Returns(List[dict]): Entities
+    """
+    name = os.path.join(path, f'{kind}.jsonl')
+    if os.path.exists(name + '.gz'):
+        opener, name = gzip.open, name + '.gz'
+    else:
+        opener = open
+    with opener(name, 'rt', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -1,14 +1,34 @@
+import contextlib
+import contextvars
+import copy
+import hashlib
+import http.cookiejar
+import itertools
 import logging
+import mimetypes
+import os
+import random
 import shlex
-from typing import Union, Iterable
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Tuple, Union, Iterable
 from urllib.parse import urljoin
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 
+from threescale_api import errors
+
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeout in seconds applied when none is specified
+DEFAULT_TIMEOUT = (10, 120)
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar('threescale_deadline', default=None)
+
 
 def extract_response(response: requests.Response, entity: str = None,
                      collection: str = None) -> Union[dict, list]:
@@ -29,6 +49,360 @@ def extract_response(response: requests.Response, entity: str = None,
     return extracted
 
 
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Limit all requests issued within the context to finish in given time
+    Nested deadlines can only shorten the outer one. Requests started after the
+    deadline fail with errors.DeadlineExceeded, the running ones have timeouts
+    shortened to the remaining time.
+    Args:
+        seconds(float): Time budget of the operation
+    """
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        expires = min(expires, outer)
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Returns(Optional[float]): Seconds left until the current deadline, None == no deadline"""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def request_timeout(timeout) -> Tuple[Any, bool]:
+    """Shorten the request timeout to the time left until the current deadline
+    Args:
+        timeout: None, number or (connect, read) tuple as accepted by requests
+    Returns(Tuple): Timeout to use, whether it was shortened by the deadline
+    Raises(errors.DeadlineExceeded): when the deadline already passed
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout, False
+    if remaining <= 0:
+        raise errors.DeadlineExceeded()
+    if timeout is None:
+        return remaining, True
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return (min(connect, remaining), min(read, remaining)), read > remaining
+    return min(timeout, remaining), timeout > remaining
+
+
+def submit(executor, func: Callable, *args, **kwargs):
+    """Submit func to the executor to run in a copy of the caller's context
+    Context variables (scheduler lane, deadline) are thereby propagated to the worker.
+    Returns(concurrent.futures.Future): Future of the call
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def run_parallel(func: Callable, items: Iterable, max_workers: int = 8) \
+        -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """Run func for every item in a bounded thread pool
+    Items are consumed lazily, at most 2 * max_workers of them are in flight at once.
+    Failure of one item does not affect the others, the exception is yielded instead.
+    Workers run in a copy of the caller's context (scheduler lane etc.).
+    Args:
+        func: Callable taking one item
+        items: Items to process
+        max_workers(int): Size of the thread pool
+    Returns(Iterator): (item, result, error) tuples in order of completion
+    """
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {submit(executor, func, item): item
+                   for item in itertools.islice(items, 2 * max_workers)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for new_item in itertools.islice(items, 1):
+                    pending[submit(executor, func, new_item)] = new_item
+                error = future.exception()
+                yield item, None if error else future.result(), error
+
+
+def poll(check: Callable[[], Any], timeout: float, interval: float = 0.5,
+         max_interval: float = 10, factor: float = 2, what: str = 'condition') -> Any:
+    """Call check until it returns a truthy value, backing off exponentially (with jitter)
+    Args:
+        check: Callable returning truthy value once the condition is met
+        timeout(float): Maximal time to wait in seconds
+        interval(float): Initial pause between calls in seconds
+        max_interval(float): Maximal pause between calls in seconds
+        factor(float): Multiplier of the pause after every unsuccessful call
+        what(str): Description of the condition for the timeout message
+    Returns: The truthy value returned by check
+    Raises:
+        errors.WaitTimeout: The condition was not met in time
+    """
+    give_up = time.monotonic() + timeout
+    while True:
+        result = check()
+        if result:
+            return result
+        remaining = give_up - time.monotonic()
+        if remaining <= 0:
+            raise errors.WaitTimeout(f"Waiting for {what} timed out after {timeout}s")
+        time.sleep(min(random.uniform(interval / 2, interval), remaining))
+        interval = min(interval * factor, max_interval)
+
+
+def create_session(pool_maxsize: int = 10) -> requests.Session:
+    """Creates session for admin API calls
+    Cookies are not kept, admin API calls are authenticated by the access token only.
+    Args:
+        pool_maxsize(int): Number of connections kept per host
+    Returns(requests.Session): Session with connection pool
+    """
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of operations, shared by threads
+    Usage:
+        limiter = RateLimiter(rate=10)  # 10 operations per second
+        limiter.acquire()
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Creates instance of the limiter
+        Args:
+            rate(float): Operations per second
+            burst(int): Number of operations allowed at once after idle period
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the operation is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def download(session: requests.Session, url: str, path: str, chunk_size: int = 64 * 1024,
+             checksum: bool = False, timeout=DEFAULT_TIMEOUT, verify: bool = True) \
+        -> Tuple[bool, int]:
+    """Stream the file to disk in chunks unless the same file is already there
+    Local file is the same when its size matches the size of the remote one and,
+    with checksum, its MD5 matches the ETag (S3 ETag of a plain upload is MD5 of the body).
+    When the file exists, only its first byte is requested to learn the size (ranged
+    GET works with pre-signed URLs, unlike HEAD); the body is fetched only if it differs.
+    The file is written under a unique temporary name and replaces the old one only
+    when completely downloaded, so concurrent downloads of one file do not mix.
+    Args:
+        session(requests.Session): Session to use
+        url(str): File url
+        path(str): Local file path
+        chunk_size(int): Size of chunks written to the disk
+        checksum(bool): Whether to compare checksums, not only sizes
+        timeout: (connect, read) timeout of the request
+        verify(bool): Whether to verify the ssl certificate
+    Returns(Tuple[bool, int]): Whether the file was downloaded, file size
+    """
+    timeout, _ = request_timeout(timeout)
+    if os.path.exists(path):
+        with session.get(url, stream=True, timeout=timeout, verify=verify,
+                         headers={'Range': 'bytes=0-0'}) as response:
+            _check_download(response)
+            if response.status_code != 206:
+                # range is not supported, the response carries the whole file
+                if _is_same_file(path, response.headers.get('Content-Length'),
+                                 response.headers, checksum):
+                    return False, os.path.getsize(path)
+                return True, _write_file(response, path, chunk_size)
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            if _is_same_file(path, total, response.headers, checksum):
+                return False, os.path.getsize(path)
+    with session.get(url, stream=True, timeout=timeout, verify=verify) as response:
+        _check_download(response)
+        return True, _write_file(response, path, chunk_size)
+
+
+def _check_download(response: requests.Response):
+    if not response.ok:
+        raise errors.ApiClientError(response.status_code, response.reason, response.content)
+
+
+def _write_file(response: requests.Response, path: str, chunk_size: int) -> int:
+    directory, name = os.path.split(os.path.abspath(path))
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=f'{name}.', suffix='.part',
+                                     delete=False) as file:
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, path)
+    return size
+
+
+def _is_same_file(path: str, size, headers, checksum: bool) -> bool:
+    if not size or not str(size).isdigit() or int(size) != os.path.getsize(path):
+        return False
+    if not checksum:
+        return True
+    etag = headers.get('ETag', '').strip('"').lower()
+    if len(etag) != 32:
+        # not a plain MD5, the file cannot be verified
+        return False
+    digest = hashlib.md5()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest() == etag
+
+
+class MultipartStream:
+    """Streaming multipart/form-data request body
+    Files are read in chunks while the request is sent, so they are never loaded into
+    memory as a whole. Total length is computed upfront and sent as Content-Length.
+    Usage:
+        with MultipartStream(fields=dict(path='/video.mp4'),
+                             files={'attachment': 'video.mp4'}) as body:
+            session.post(url, data=body, headers={'Content-Type': body.content_type})
+    """
+
+    def __init__(self, fields: dict = None, files: dict = None, chunk_size: int = 64 * 1024,
+                 progress: Callable[[int, int], Any] = None):
+        """Creates instance of the body
+        Args:
+            fields(dict): Plain form fields, None values are skipped
+            files(dict): Field name -> path, binary file object or
+                (filename, path or file object[, content type]) tuple;
+                file objects are read from their current position
+            chunk_size(int): Size of chunks read from the files
+            progress: Callable receiving (bytes sent, total bytes) after every chunk
+        """
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.sent = 0
+        self._opened: List[BinaryIO] = []
+        self._parts: List[Tuple[bytes, Optional[BinaryIO], int]] = []
+        for name, value in (fields or {}).items():
+            if value is not None:
+                self._parts.append((self._header(name) + str(value).encode() + b'\r\n',
+                                    None, 0))
+        for name, value in (files or {}).items():
+            self._add_file(name, value)
+        self._parts.append((f'--{self.boundary}--\r\n'.encode(), None, 0))
+        self.len = sum(len(head) + size for head, _, size in self._parts)
+        self._chunks = self._iter_chunks()
+        self._buffer = b''
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def read(self, size: int = -1) -> bytes:
+        """Read next bytes of the body (all remaining if size is negative)"""
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        if data:
+            self.sent += len(data)
+            if self.progress is not None:
+                self.progress(self.sent, self.len)
+        return data
+
+    def close(self):
+        """Close files opened by the body (passed file objects are left open)"""
+        for file in self._opened:
+            file.close()
+        self._opened = []
+
+    def __len__(self) -> int:
+        return self.len
+
+    def __enter__(self) -> 'MultipartStream':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _header(self, name: str, filename: str = None, content_type: str = None) -> bytes:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        header = f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+        if content_type is not None:
+            header += f'Content-Type: {content_type}\r\n'
+        return (header + '\r\n').encode()
+
+    def _add_file(self, name: str, value):
+        if not isinstance(value, tuple):
+            value = (None, value)
+        filename, source, content_type = (value + (None,))[:3]
+        if isinstance(source, (str, os.PathLike)):
+            filename = filename or os.path.basename(source)
+            source = open(source, 'rb')  # pylint: disable=consider-using-with
+            self._opened.append(source)
+        filename = filename or os.path.basename(getattr(source, 'name', None) or name)
+        content_type = content_type or mimetypes.guess_type(filename)[0] \
+            or 'application/octet-stream'
+        position = source.tell()
+        try:
+            size = os.fstat(source.fileno()).st_size - position
+        except (AttributeError, OSError):  # in-memory file
+            size = source.seek(0, os.SEEK_END) - position
+            source.seek(position)
+        self._parts.append((self._header(name, filename, content_type), source, size))
+        self._parts.append((b'\r\n', None, 0))
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        for head, source, size in self._parts:
+            yield head
+            remaining = size
+            while remaining > 0:
+                chunk = source.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    raise ValueError(f"File {getattr(source, 'name', source)} was truncated "
+                                     "during upload")
+                remaining -= len(chunk)
+                yield chunk
+
+
 class HttpClient:
     """3scale specific!!! HTTP Client
 
@@ -45,14 +419,17 @@ class HttpClient:
     :param cert: path to certificate
     :param disable_retry_status_list:
         Iterable collection of status code that should not be retried by requests
+    :param timeout: default (connect, read) timeout of the calls, None == wait forever
     """
 
     def __init__(self, app, endpoint: str = "sandbox_endpoint",
-                 verify: bool = None, cert=None, disable_retry_status_list: Iterable = ()):
+                 verify: bool = None, cert=None, disable_retry_status_list: Iterable = (),
+                 timeout=DEFAULT_TIMEOUT):
         self._app = app
         self._endpoint = endpoint
         self.verify = verify if verify is not None else app.api_client_verify
         self.cert = cert
+        self.timeout = timeout
         self._status_forcelist = {503, 404} - set(disable_retry_status_list)
         self.auth = app.authobj()
         self.session = self._create_session()
@@ -87,6 +464,16 @@ class HttpClient:
         self.retry_for_session(session, self._status_forcelist)
         return session
 
+    def without_retries(self) -> 'HttpClient':
+        """Copy of the client with its own session which retries no call
+        (e.g. for probing within a time limit), close it when done
+        """
+        clone = copy.copy(self)
+        clone._status_forcelist = set()
+        clone.session = requests.Session()
+        self.retry_for_session(clone.session, (), total=0)
+        return clone
+
     def extend_connection_pool(self, maxsize: int):
         """Extend connection pool"""
         self.session.adapters["https://"].poolmanager.connection_pool_kw["maxsize"] = maxsize
@@ -117,6 +504,7 @@ class HttpClient:
 
         logger.info("[CLIENT]: %s", request2curl(prep))
 
+        timeout, _ = request_timeout(timeout if timeout is not None else self.timeout)
         send_kwargs = {
             "timeout": timeout,
             "allow_redirects": allow_redirects